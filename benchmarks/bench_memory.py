@@ -0,0 +1,138 @@
+# ==========================================
+# BENCHMARK ALOKASI MEMORI PER RERUN DASHBOARD
+# ==========================================
+# Menjalankan dashboard.py (AppTest) di proses baru dengan data sintetis, lalu mengukur
+# puncak memori TAMBAHAN (tracemalloc, termasuk buffer numpy) selama satu rerun hangat.
+# Angka juga dinyatakan dalam "salinan frame" = puncak / ukuran frame siap tampil,
+# supaya kelihatan berapa kali data penuh disalin per rerun. Puncak juga dipecah per tahap
+# timed() (anomaly, fig_trend, tbl_logsheet, ...) supaya salinan bisa ditunjuk letaknya.
+#   - rerun_all    : rerun tanpa filter (cache sudah terisi)
+#   - filter_unit  : pilih satu unit
+#   - filter_shift : kembali ke semua unit, pilih satu shift
+#
+# Contoh:
+#   python -m benchmarks.bench_memory --rows 200k
+#   python -m benchmarks.bench_memory --app lama_dashboard.py --out benchmarks/results/memori_lama.json
+#   python -m benchmarks.bench_memory --compare benchmarks/results/memori_lama.json
+import argparse
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime
+
+import refuel_engine as pipeline
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit, parse_size
+from benchmarks.bench_startup import run_python
+from benchmarks.synthetic import generate_refuel_log
+
+KODE_MEMORI = """
+import contextlib, gc, json, time, tracemalloc, warnings
+warnings.filterwarnings('ignore')
+from streamlit.testing.v1 import AppTest
+import refuel_engine.profiling as profiling
+
+at = AppTest.from_file({app!r}, default_timeout=600)
+at.run()
+unit = at.selectbox[0].options[1]
+
+# Puncak per tahap timed() (dashboard meng-import timed tiap rerun -> cukup ganti atribut modul)
+timed_asli = profiling.timed
+per_tahap = {{}}
+
+@contextlib.contextmanager
+def timed_memori(nama, *args, **kwargs):
+    tracemalloc.reset_peak()
+    awal = tracemalloc.get_traced_memory()[0]
+    with timed_asli(nama, *args, **kwargs):
+        yield
+    per_tahap[nama] = per_tahap.get(nama, 0.0) + (tracemalloc.get_traced_memory()[1] - awal) / 1e6
+
+profiling.timed = timed_memori
+
+def ukur(aksi):
+    gc.collect()
+    per_tahap.clear()
+    tracemalloc.start()
+    awal = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    aksi()
+    wall_s = time.perf_counter() - t0
+    puncak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # reset_peak di tiap tahap ikut mereset puncak total -> ambil yang terbesar
+    peak_mb = max([(puncak - awal) / 1e6] + list(per_tahap.values()))
+    return {{'wall_s': wall_s, 'peak_mb': peak_mb, 'stages_mb': dict(per_tahap),
+             'errors': [e.value for e in at.exception]}}
+
+hasil = {{
+    'rerun_all': ukur(lambda: at.run()),
+    'filter_unit': ukur(lambda: at.selectbox[0].set_value(unit).run()),
+    'filter_shift': ukur(lambda: (at.selectbox[0].set_value('ALL UNITS'), at.selectbox[1].set_value('SHIFT 1'), at.run())),
+}}
+print(json.dumps(hasil))
+"""
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark puncak alokasi memori per rerun dashboard.")
+    parser.add_argument('--rows', default='200k', help="jumlah baris data sintetis (default 200k)")
+    parser.add_argument('--seed', type=int, default=39)
+    parser.add_argument('--app', default='dashboard.py', help="skrip Streamlit yang diukur (relatif ke root repo)")
+    parser.add_argument('--out', help="file JSON hasil (default benchmarks/results/memory_<waktu>.json)")
+    parser.add_argument('--compare', help="file JSON hasil lama untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sumber = os.path.join(tmp, 'data.csv')
+        generate_refuel_log(n_rows=parse_size(args.rows), seed=args.seed).to_csv(sumber, index=False)
+        df, _, _ = pipeline.prepare_refuel_frame(pipeline.load_refuel_log(sumber))
+        frame_mb = df.memory_usage(deep=True).sum() / 1e6
+        del df
+        print(f"  frame siap tampil: {frame_mb:.1f} MB")
+
+        runs = run_python(KODE_MEMORI.format(app=args.app),
+                          {'REFUEL_SOURCE': sumber, 'REFUEL_ROLLUP_DIR': os.path.join(tmp, 'rollup')})
+
+    hasil = []
+    for nama, r in runs.items():
+        if r['errors']:
+            print(f"  {nama}: dashboard error -> {r['errors'][0]}")
+        hasil.append({'stage': nama, 'wall_s': r['wall_s'], 'peak_mb': r['peak_mb'],
+                      'frame_copies': r['peak_mb'] / frame_mb, 'stages_mb': r['stages_mb']})
+        print(f"  {nama:<14} puncak {r['peak_mb']:9.1f} MB  = {r['peak_mb'] / frame_mb:5.2f}x frame"
+              f"   ({r['wall_s'] * 1000:.0f} ms, dengan tracemalloc)")
+        for tahap, mb in sorted(r['stages_mb'].items(), key=lambda x: -x[1])[:6]:
+            print(f"      {tahap:<18} {mb:9.1f} MB  = {mb / frame_mb:5.2f}x frame")
+
+    laporan = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'frame_mb': frame_mb,
+            'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        },
+        'results': hasil,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"memory_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(laporan, f, indent=2)
+    print(f"\nHasil disimpan di {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            lama = {r['stage']: r for r in json.load(f)['results']}
+        print(f"\nPerbandingan puncak memori vs {args.compare} (rasio < 1 = lebih hemat):")
+        for r in hasil:
+            ref = lama.get(r['stage'])
+            if ref and ref['peak_mb'] > 0:
+                print(f"  {r['stage']:<14} {r['peak_mb'] / ref['peak_mb']:6.2f}x")
+                for tahap, mb in r['stages_mb'].items():
+                    mb_lama = ref.get('stages_mb', {}).get(tahap)
+                    if mb_lama and mb_lama > 1:
+                        print(f"      {tahap:<18} {mb / mb_lama:6.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+# ==========================================
+# BENCHMARK PIPELINE DATA DASHBOARD
+# ==========================================
+# Mengukur waktu (wall time) & puncak memori tiap tahap pipeline di beberapa ukuran data.
+# Hasil disimpan JSON supaya bisa dibandingkan antar versi. Semua offline (data sintetis).
+#
+# Contoh:
+#   python -m benchmarks.bench_pipeline --sizes 10k,100k
+#   python -m benchmarks.bench_pipeline --sizes 1m --stages clean,performance --compare benchmarks/results/lama.json
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import refuel_engine as pipeline
+from benchmarks.synthetic import generate_refuel_log, to_csv_bytes
+
+DEFAULT_SIZES = '10k,100k,1m,10m'
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+def parse_size(teks):
+    teks = teks.strip().lower()
+    kali = {'k': 1_000, 'm': 1_000_000}.get(teks[-1], 1)
+    return int(float(teks.rstrip('km')) * kali)
+
+# ------------------------------------------
+# DAFTAR TAHAP: nama -> (siapkan input, jalankan tahap)
+# 'siapkan' tidak ikut diukur; 'jalankan' yang diukur.
+# ------------------------------------------
+def _stage_read_csv(ctx):
+    return lambda: pd.read_csv(io.BytesIO(ctx['csv']))
+
+def _stage_clean(ctx):
+    raw = ctx['raw']
+    return lambda: pipeline.clean_refuel_frame(raw.copy(deep=False))
+
+def _stage_dedup(ctx):
+    return lambda: pipeline.deduplicate_scans(ctx['clean'])
+
+def _stage_outliers(ctx):
+    return lambda: pipeline.detect_outliers(ctx['dedup'])
+
+def _stage_shift(ctx):
+    return lambda: pipeline.assign_shift_calendar(ctx['dedup']['timestamp'])
+
+def _stage_performance(ctx):
+    return lambda: pipeline.get_performance_df(ctx['df'])
+
+def _stage_anomaly(ctx):
+    return lambda: pipeline.early_refill_rows(ctx['df'])
+
+def _stage_traffic(ctx):
+    tanggal = pipeline.production_date(ctx['df']['timestamp'].max())
+    return lambda: pipeline.hourly_traffic(ctx['df'], tanggal)
+
+def _stage_queue(ctx):
+    return lambda: pipeline.simulate_bay_queue(ctx['df']['timestamp'], pipeline.JUMLAH_BAY, pipeline.DURASI_SERVIS_MENIT)
+
+def _stage_rollup(ctx):
+    return lambda: pipeline.build_rollups(ctx['df'])
+
+def _stage_rollup_read(ctx):
+    daily, _ = pipeline.build_rollups(ctx['df'])
+    return lambda: pipeline.performance_from_rollup(daily)
+
+def _stage_rollup_late(ctx):
+    # Scan telat: rollup dibangun dari data tanpa 3 baris hari lama (di-prepare ulang, jadi flag outlier
+    # hari-hari sesudahnya ikut beda), lalu baris itu masuk setelah hari berikutnya sudah tutup.
+    # Rollup incremental wajib identik dengan build_rollups dari data lengkap.
+    df, clean = ctx['df'], ctx['clean']
+    hari_kedua = clean['timestamp'].min().normalize() + pd.Timedelta(days=1, hours=12)
+    telat = clean.index[clean['timestamp'].searchsorted(hari_kedua):][:3]
+    tanpa, _, _ = pipeline.prepare_refuel_frame(clean.drop(telat))
+    folder = tempfile.mkdtemp(prefix='rollup_late_')
+    pipeline.update_rollups(tanpa, folder, rebuild=True)
+    daily, hourly = pipeline.update_rollups(df, folder)
+    daily_penuh, hourly_penuh = pipeline.build_rollups(df)
+    try:
+        pd.testing.assert_frame_equal(daily, daily_penuh, check_dtype=False)
+        pd.testing.assert_frame_equal(hourly, hourly_penuh, check_dtype=False)
+    except AssertionError as e:
+        raise AssertionError(f"rollup incremental beda dengan build_rollups setelah scan telat: {e}") from None
+    return lambda: pipeline.update_rollups(df, folder)
+
+def _stage_leaderboard(ctx):
+    daily, _ = pipeline.build_rollups(ctx['df'])
+    mulai, akhir = pipeline.preset_range('7 HARI', ctx['df']['timestamp'].max())
+    return lambda: pipeline.leaderboard(daily, 'l_hr', 5, True, mulai, akhir)
+
+def _stage_hm_check(ctx):
+    # Urutan HM seluruh armada (sort + selisih tetangga) + skor kesehatan per unit
+    def run():
+        return pipeline.hm_health(ctx['df'].assign(hm_status=pipeline.hm_status(ctx['df'])))
+    return run
+
+def _stage_heatmap(ctx):
+    # Matriks [hari x jam] dari rollup per jam + potong & gabung kolom seperti di dashboard
+    _, hourly = pipeline.build_rollups(ctx['df'])
+
+    def run():
+        tanggal, counts = pipeline.traffic_matrix(hourly)
+        tanggal, counts, _ = pipeline.slice_matrix(tanggal, counts)
+        return pipeline.bucket_days(tanggal, counts)
+    return run
+
+def _stage_export(ctx):
+    # Logsheet penuh ke Parquet per potongan; byte dibuang -> puncak memori = satu potongan, bukan satu file
+    def run():
+        for _ in pipeline.export_stream(ctx['df'], 'parquet'):
+            pass
+    return run
+
+def _stage_forecast(ctx):
+    return lambda: pipeline.forecast_demand(pipeline.fit_demand_model(ctx['df']))
+
+def _stage_figures(ctx):
+    from charts import build_leaderboard_figure, build_traffic_figure, build_trend_figure
+    df = ctx['df']
+    tanggal = pipeline.production_date(df['timestamp'].max())
+    hourly = pipeline.hourly_traffic(df, tanggal)
+    daily, _ = pipeline.build_rollups(df)
+    top5 = pipeline.leaderboard(daily, 'l_hr', 5)
+    kosong = pd.DataFrame({'jam': pd.Series(dtype='datetime64[ns]'), 'prakiraan_unit': pd.Series(dtype=float)})
+    urutan_jam = pipeline.hour_order()
+
+    def run():
+        build_trend_figure(df)
+        build_leaderboard_figure(top5)
+        build_traffic_figure(hourly, kosong, urutan_jam)
+    return run
+
+STAGES = {
+    'read_csv': _stage_read_csv,
+    'clean': _stage_clean,
+    'dedup': _stage_dedup,
+    'outliers': _stage_outliers,
+    'shift_calendar': _stage_shift,
+    'performance': _stage_performance,
+    'anomaly': _stage_anomaly,
+    'traffic': _stage_traffic,
+    'queue': _stage_queue,
+    'rollup': _stage_rollup,
+    'rollup_read': _stage_rollup_read,
+    'rollup_late': _stage_rollup_late,
+    'leaderboard': _stage_leaderboard,
+    'heatmap': _stage_heatmap,
+    'hm_check': _stage_hm_check,
+    'export': _stage_export,
+    'forecast': _stage_forecast,
+    'figures': _stage_figures,
+}
+
+def build_context(n_rows, args):
+    raw = generate_refuel_log(n_rows=n_rows, units=args.units, days=args.days,
+                              malformed_rate=args.malformed_rate, seed=args.seed)
+    ctx = {'raw': raw, 'csv': to_csv_bytes(raw)}
+    ctx['raw'] = pd.read_csv(io.BytesIO(ctx['csv']))
+    ctx['clean'] = pipeline.clean_refuel_frame(ctx['raw'].copy(deep=False))
+    ctx['dedup'], _ = pipeline.deduplicate_scans(ctx['clean'])
+    ctx['df'], _, _ = pipeline.prepare_refuel_frame(ctx['clean'])
+    return ctx
+
+def measure(fn, repeat, with_memory):
+    # Waktu: ambil yang tercepat dari beberapa ulangan (tanpa tracemalloc supaya tidak bias)
+    waktu = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        waktu.append(time.perf_counter() - t0)
+
+    peak_mb = None
+    if with_memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / 1024 ** 2
+    return min(waktu), peak_mb
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(hasil, file_lama):
+    with open(file_lama) as f:
+        lama = {(r['rows'], r['stage']): r for r in json.load(f)['results']}
+    print(f"\nPerbandingan vs {file_lama} (rasio > 1 = lebih lambat):")
+    for r in hasil:
+        ref = lama.get((r['rows'], r['stage']))
+        if ref and ref['wall_s'] > 0:
+            print(f"  {r['rows']:>10,} {r['stage']:<15} {r['wall_s'] / ref['wall_s']:6.2f}x")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline data dashboard refueling (offline).")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"jumlah baris, dipisah koma (default {DEFAULT_SIZES})")
+    parser.add_argument('--stages', default=','.join(STAGES), help="tahap yang diukur, dipisah koma")
+    parser.add_argument('--units', type=int, default=500)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--malformed-rate', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="lewati pengukuran puncak memori")
+    parser.add_argument('--seed', type=int, default=39)
+    parser.add_argument('--out', help="file JSON hasil (default benchmarks/results/bench_<waktu>.json)")
+    parser.add_argument('--compare', help="file JSON hasil lama untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    # Fallback parser tanggal memang lambat & berisik untuk timestamp rusak; yang diukur waktunya
+    warnings.filterwarnings('ignore', message='Could not infer format')
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    tidak_dikenal = set(stages) - set(STAGES)
+    if tidak_dikenal:
+        parser.error(f"tahap tidak dikenal: {', '.join(sorted(tidak_dikenal))}")
+
+    hasil = []
+    for n_rows in map(parse_size, args.sizes.split(',')):
+        print(f"\n=== {n_rows:,} baris ===")
+        ctx = build_context(n_rows, args)
+        for nama in stages:
+            wall_s, peak_mb = measure(STAGES[nama](ctx), args.repeat, not args.no_memory)
+            mem = f"{peak_mb:9.1f} MB" if peak_mb is not None else "        -"
+            print(f"  {nama:<15} {wall_s * 1000:10.1f} ms  {mem}")
+            hasil.append({'rows': n_rows, 'stage': nama, 'wall_s': wall_s, 'peak_mb': peak_mb})
+        del ctx
+        gc.collect()
+
+    laporan = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        },
+        'results': hasil,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(laporan, f, indent=2)
+    print(f"\nHasil disimpan di {out}")
+
+    if args.compare:
+        compare(hasil, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# ==========================================
+# BENCHMARK STARTUP DASHBOARD (IMPORT & FIRST PAINT)
+# ==========================================
+# Tiap pengukuran jalan di proses Python BARU (cold), karena import yang sudah ada
+# di sys.modules tidak ikut terhitung. Yang diukur:
+#   - import_*      : waktu import modul yang dibutuhkan dashboard (+ apakah plotly.express ikut ter-load)
+#   - first_paint   : jalankan dashboard.py (AppTest) dengan sumber data kosong
+#                     -> import + CSS + judul + skeleton, tanpa olah data
+#   - cold_run      : jalankan dashboard.py penuh dengan data sintetis (proses baru)
+#   - warm_rerun    : rerun kedua di proses yang sama (cache Streamlit sudah terisi)
+#
+# Contoh:
+#   python -m benchmarks.bench_startup
+#   python -m benchmarks.bench_startup --rows 50k --repeat 5 --compare benchmarks/results/startup_lama.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.bench_pipeline import RESULTS_DIR, git_commit, parse_size
+from benchmarks.synthetic import generate_refuel_log
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Nama -> modul yang di-import (dipisah koma). 'dashboard_deps' = semua yang di-import dashboard.py
+IMPORT_SETS = {
+    'import_pandas': 'pandas',
+    'import_streamlit': 'streamlit',
+    'import_refuel_engine': 'refuel_engine',
+    'import_dashboard_deps': 'streamlit, pandas, refuel_engine, refuel_engine.profiling, charts',
+    'import_plotly_express': 'plotly.express',
+}
+
+KODE_IMPORT = """
+import sys, time, json
+t0 = time.perf_counter()
+import {modul}
+print(json.dumps({{'wall_s': time.perf_counter() - t0, 'plotly': 'plotly.express' in sys.modules}}))
+"""
+
+KODE_APP = """
+import time, json
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('dashboard.py', default_timeout=600)
+at.run()
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+print(json.dumps({'first_s': t1 - t0, 'rerun_s': t2 - t1, 'errors': [e.value for e in at.exception]}))
+"""
+
+def run_python(kode, env=None):
+    hasil = subprocess.run([sys.executable, '-c', kode], capture_output=True, text=True, cwd=ROOT,
+                           env={**os.environ, **(env or {})})
+    if hasil.returncode != 0:
+        raise RuntimeError(hasil.stderr.strip().splitlines()[-1] if hasil.stderr.strip() else 'gagal')
+    return json.loads(hasil.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu import & first paint dashboard.")
+    parser.add_argument('--rows', default='20k', help="jumlah baris data sintetis untuk cold_run (default 20k)")
+    parser.add_argument('--repeat', type=int, default=3, help="ulangan per pengukuran, diambil median")
+    parser.add_argument('--seed', type=int, default=39)
+    parser.add_argument('--out', help="file JSON hasil (default benchmarks/results/startup_<waktu>.json)")
+    parser.add_argument('--compare', help="file JSON hasil lama untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    hasil = []
+    for nama, modul in IMPORT_SETS.items():
+        runs = [run_python(KODE_IMPORT.format(modul=modul)) for _ in range(args.repeat)]
+        wall_s = statistics.median(r['wall_s'] for r in runs)
+        hasil.append({'stage': nama, 'wall_s': wall_s, 'plotly_express_loaded': runs[0]['plotly']})
+        print(f"  {nama:<24} {wall_s * 1000:9.1f} ms   plotly.express ter-load: {'ya' if runs[0]['plotly'] else 'tidak'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kosong = os.path.join(tmp, 'kosong.csv')
+        penuh = os.path.join(tmp, 'data.csv')
+        with open(kosong, 'w') as f:
+            f.write("Timestamp,Kode Unit,Lokasi,Quantity,HM,Shift\n")
+        generate_refuel_log(n_rows=parse_size(args.rows), seed=args.seed).to_csv(penuh, index=False)
+
+        for nama, sumber, kunci in [('first_paint', kosong, 'first_s'), ('cold_run', penuh, 'first_s'),
+                                    ('warm_rerun', penuh, 'rerun_s')]:
+            runs = [run_python(KODE_APP, {'REFUEL_SOURCE': sumber}) for _ in range(args.repeat)]
+            if runs[0]['errors']:
+                print(f"  {nama}: dashboard error -> {runs[0]['errors'][0]}")
+            wall_s = statistics.median(r[kunci] for r in runs)
+            hasil.append({'stage': nama, 'wall_s': wall_s})
+            print(f"  {nama:<24} {wall_s * 1000:9.1f} ms")
+
+    laporan = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        },
+        'results': hasil,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"startup_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(laporan, f, indent=2)
+    print(f"\nHasil disimpan di {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            lama = {r['stage']: r for r in json.load(f)['results']}
+        print(f"\nPerbandingan vs {args.compare} (rasio > 1 = lebih lambat):")
+        for r in hasil:
+            ref = lama.get(r['stage'])
+            if ref and ref['wall_s'] > 0:
+                print(f"  {r['stage']:<24} {r['wall_s'] / ref['wall_s']:6.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# ==========================================
+# GENERATOR LOGSHEET REFUELING SINTETIS
+# ==========================================
+# Bikin data mirip export CSV Google Sheet (kolom & format timestamp sama persis),
+# supaya pipeline bisa diuji di 10k s/d 10 juta baris tanpa internet.
+import io
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine import SHIFT_CALENDAR
+
+FORMAT_SHEET = '%d/%m/%Y %H:%M:%S'
+TIMESTAMP_RUSAK = np.array(['', '-', '#VALUE!', '31/02/2024 25:61:00'], dtype=object)
+
+def generate_refuel_log(n_rows=None, units=200, days=30, refuels_per_day=2.5, shifts=SHIFT_CALENDAR,
+                        malformed_rate=0.01, us_format_rate=0.01, duplicate_rate=0.005,
+                        start='2024-01-01 06:00', seed=39):
+    rng = np.random.default_rng(seed)
+    if n_rows is None:
+        n_rows = int(units * days * refuels_per_day)
+
+    kode_unit = np.array([f"DT{i:04d}" for i in range(units)], dtype=object)
+    unit_idx = rng.integers(0, units, n_rows)
+
+    # Waktu kedatangan acak sepanjang periode, lalu diurutkan seperti urutan submit form
+    detik = np.sort(rng.uniform(0, days * 86400, n_rows)).astype('int64')
+    ts = pd.Timestamp(start) + pd.to_timedelta(detik, unit='s')
+
+    # Tiap unit punya kebiasaan isi sendiri (rata-rata 220-300 L), sebagian early refill < 160 L
+    rata_unit = rng.uniform(220, 300, units)
+    quantity = rng.normal(rata_unit[unit_idx], 20).round()
+    early = rng.random(n_rows) < 0.05
+    quantity[early] = rng.uniform(60, 159, early.sum()).round()
+
+    # HM naik per unit (~10 jam kerja per pengisian) dengan sedikit noise input
+    jarak_hm = rng.normal(10, 1.5, n_rows).clip(min=0.5)
+    hm = pd.Series(jarak_hm).groupby(unit_idx).cumsum().to_numpy() + 1000 + rng.normal(0, 0.2, n_rows)
+
+    jam = ts.hour + ts.minute / 60
+    jam_mulai = np.array([mulai for _, mulai in shifts])
+    nama_shift = np.array([nama for nama, _ in shifts], dtype=object)
+    shift_idx = (np.searchsorted(jam_mulai, jam, side='right') - 1) % len(shifts)
+
+    df = pd.DataFrame({
+        'Timestamp': ts.strftime(FORMAT_SHEET).to_numpy(dtype=object),
+        'Kode Unit': kode_unit[unit_idx],
+        'Lokasi': rng.choice(np.array(['PITSTOP KM 39', 'PITSTOP KM 21'], dtype=object), n_rows, p=[0.8, 0.2]),
+        'Quantity': quantity,
+        'HM': hm.round(1),
+        'Shift': nama_shift[shift_idx],
+    })
+
+    # Timestamp format US (mm/dd) -> jalur fallback parser, dan timestamp rusak -> NaT
+    us = rng.random(n_rows) < us_format_rate
+    df.loc[us, 'Timestamp'] = ts[us].strftime('%m/%d/%Y %H:%M:%S')
+    rusak = rng.random(n_rows) < malformed_rate
+    df.loc[rusak, 'Timestamp'] = rng.choice(TIMESTAMP_RUSAK, rusak.sum())
+
+    # Scan QR ganda: baris yang sama dikirim lagi 1-3 menit kemudian
+    if duplicate_rate > 0:
+        dobel = df[rng.random(n_rows) < duplicate_rate].copy()
+        dobel_ts = pd.to_datetime(dobel['Timestamp'], format=FORMAT_SHEET, errors='coerce')
+        dobel['Timestamp'] = (dobel_ts + pd.to_timedelta(rng.integers(60, 180, len(dobel)), unit='s')).dt.strftime(FORMAT_SHEET)
+        df = pd.concat([df, dobel.dropna(subset=['Timestamp'])]).sort_index(kind='stable').reset_index(drop=True)
+
+    return df
+
+def to_csv_bytes(df):
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False)
+    return buf.getvalue()
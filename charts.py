@@ -0,0 +1,205 @@
+# ==========================================
+# PEMBUAT GRAFIK PLOTLY DASHBOARD
+# ==========================================
+# Dipisah dari dashboard.py supaya biaya bikin figure bisa diukur di benchmark
+# dengan kode yang persis sama dengan yang dirender di layar.
+# Plotly di-import di dalam fungsi (lazy): import plotly.express makan waktu, jadi
+# baru dibayar saat grafik pertama benar-benar digambar, bukan saat startup.
+import pandas as pd
+
+from refuel_engine import early_refill_mask
+
+def build_trend_figure(df_trend, df_forecast=None):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    # Layer Biru (Normal)
+    # Hanya kolom yang digambar -> plotly express tidak ikut menyalin seluruh frame
+    fig_trend = px.area(
+        df_trend[['timestamp', 'quantity']], x='timestamp', y='quantity',
+        title="📈 TREN KONSUMSI SOLAR",
+        hover_data={'timestamp': '|%d %b %Y, %H:%M'}
+    )
+    fig_trend.update_traces(line_color='#00e5ff', fillcolor='rgba(0, 229, 255, 0.2)')
+
+    # Layer Merah (Anomali)
+    anomali_points = df_trend[early_refill_mask(df_trend)]
+    if not anomali_points.empty:
+        fig_trend.add_trace(go.Scatter(
+            x=anomali_points['timestamp'], y=anomali_points['quantity'],
+            mode='markers', name='Early Refill',
+            marker=dict(color='#ff4b4b', size=10, symbol='x', line=dict(width=2, color='white')),
+            hovertemplate='<b>EARLY REFILL!</b><br>Vol: %{y} L<br>Waktu: %{x}<extra></extra>'
+        ))
+
+    # Layer Oranye (Outlier Statistik per unit)
+    outlier_points = df_trend[df_trend['is_outlier']]
+    if not outlier_points.empty:
+        fig_trend.add_trace(go.Scatter(
+            x=outlier_points['timestamp'], y=outlier_points['quantity'],
+            mode='markers', name='Outlier Statistik',
+            marker=dict(color='#ffa500', size=11, symbol='diamond-open', line=dict(width=2)),
+            customdata=outlier_points[['unit', 'outlier_score']],
+            hovertemplate='<b>OUTLIER %{customdata[0]}</b><br>Vol: %{y} L<br>Skor: %{customdata[1]:.1f}<br>Waktu: %{x}<extra></extra>'
+        ))
+
+    # Layer Prakiraan (rata-rata liter per pengisian di jam-jam berikutnya, level armada)
+    if df_forecast is not None and not df_forecast.empty:
+        fc_trend = df_forecast[df_forecast['prakiraan_unit'] > 0]
+        fig_trend.add_trace(go.Scatter(
+            x=fc_trend['jam'], y=fc_trend['prakiraan_liter'] / fc_trend['prakiraan_unit'],
+            mode='lines', name='Prakiraan',
+            line=dict(color='#b0c4de', dash='dash'),
+            hovertemplate='<b>PRAKIRAAN</b><br>Vol: %{y:.0f} L/Pengisian<br>Waktu: %{x}<extra></extra>'
+        ))
+
+    fig_trend.update_layout(
+        height=400, margin=dict(l=10, r=10, t=80, b=10),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=24,
+        xaxis=dict(title="Waktu Pengisian", title_font=dict(size=18), tickfont=dict(size=14)),
+        yaxis=dict(title="Volume (Liter)", title_font=dict(size=18), tickfont=dict(size=14)),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig_trend
+
+def build_leaderboard_figure(df_lb, title="🔥 TOP 5 UNIT TERBOROS", label_nilai="Liter/Jam", warna='#ff4b4b'):
+    import plotly.express as px
+
+    # df_lb dari refuel_engine.leaderboard: peringkat 1 di paling atas, panah = perubahan vs periode lalu
+    def _label(baris):
+        if pd.isna(baris['perubahan']):
+            return f"{baris['nilai']:.1f}"
+        panah = "▲" if baris['perubahan'] > 0 else "▼" if baris['perubahan'] < 0 else "="
+        return f"{baris['nilai']:.1f}  {panah}{abs(int(baris['perubahan'])) or ''}"
+
+    df_plot = df_lb.assign(label=df_lb.apply(_label, axis=1) if not df_lb.empty else [])
+    fig_boros = px.bar(
+        df_plot, x="nilai", y="unit", orientation='h',
+        title=title, text='label',
+        color_discrete_sequence=[warna],
+        hover_data={'peringkat_sebelumnya': True, 'label': False},
+        labels={'nilai': label_nilai, 'unit': 'Unit', 'peringkat_sebelumnya': 'Peringkat Periode Lalu'}
+    )
+    fig_boros.update_layout(
+        height=400, margin=dict(l=10, r=10, t=80, b=10),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=24,
+        xaxis=dict(title=label_nilai, title_font=dict(size=18), tickfont=dict(size=14)),
+        yaxis=dict(title="Unit", title_font=dict(size=18), tickfont=dict(size=14),
+                   categoryorder='array', categoryarray=df_lb['unit'].tolist()[::-1])
+    )
+    return fig_boros
+
+def build_traffic_figure(hourly_counts, fc_daily, urutan_jam, hourly_unit=None, unit=None):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    fig_daily = px.bar(
+        hourly_counts, x='jam_label', y='jumlah',
+        title=f"📊 TRAFFIC ANTREAN" + (f" · {unit} DITANDAI" if unit else ""),
+        text_auto=True, labels={'jam_label': 'Jam', 'jumlah': 'Unit'}
+    )
+    fig_daily.update_traces(marker_color='#00e5ff', width=0.6)
+    if not fc_daily.empty:
+        fig_daily.add_trace(go.Scatter(
+            x=fc_daily['jam'].dt.strftime('%H:00'), y=fc_daily['prakiraan_unit'].round(1),
+            mode='lines+markers', name='Prakiraan', line=dict(color='#b0c4de', dash='dash')
+        ))
+    if hourly_unit is not None and not hourly_unit.empty:
+        # Bagian traffic dari unit yang diklik di leaderboard, ditumpuk di depan bar armada
+        fig_daily.add_trace(go.Bar(
+            x=hourly_unit['jam_label'], y=hourly_unit['jumlah'], name=unit,
+            marker_color='#ffa500', width=0.3, text=hourly_unit['jumlah'], textposition='inside'
+        ))
+    fig_daily.update_layout(
+        barmode='overlay',
+        height=350, margin=dict(l=20, r=20, t=50, b=20),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=18,
+        xaxis=dict(type='category', categoryorder='array', categoryarray=urutan_jam, title_font=dict(size=14), tickfont=dict(size=12)),
+        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', title_font=dict(size=14), tickfont=dict(size=12)),
+        showlegend=False
+    )
+    return fig_daily
+
+def build_queue_figure(df_sim_day, title):
+    import plotly.graph_objects as go
+
+    jam_label = df_sim_day['jam'].dt.strftime('%H:00')
+    fig_sim = go.Figure()
+    fig_sim.add_trace(go.Bar(x=jam_label, y=df_sim_day['maks_antrean'], name='Antrean Maks (Unit)', marker_color='#ffa500'))
+    fig_sim.add_trace(go.Scatter(x=jam_label, y=df_sim_day['rata_tunggu'], name='Rata-Rata Tunggu (Menit)', mode='lines+markers', line=dict(color='#ff4b4b')))
+    fig_sim.add_trace(go.Scatter(x=jam_label, y=df_sim_day['utilisasi'] * 100, name='Utilisasi Bay (%)', mode='lines', line=dict(color='#39ff14', dash='dot'), yaxis='y2'))
+    fig_sim.update_layout(
+        title=title,
+        height=350, margin=dict(l=20, r=20, t=50, b=20),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=18,
+        xaxis=dict(type='category', title="Jam", title_font=dict(size=14), tickfont=dict(size=12)),
+        yaxis=dict(title="Unit / Menit", showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+        yaxis2=dict(title="Utilisasi (%)", overlaying='y', side='right', range=[0, 100], showgrid=False),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig_sim
+
+def build_traffic_heatmap_figure(tanggal, counts, jam_label, hari_per_kolom=1):
+    import plotly.graph_objects as go
+
+    # z = [jam x kolom tanggal]; angka dibulatkan supaya payload JSON tetap ringkas
+    satuan = "Unit" if hari_per_kolom == 1 else f"Unit/Hari (rata-rata {hari_per_kolom} hari)"
+    fig_heat = go.Figure(go.Heatmap(
+        x=[t.strftime('%d %b %y') for t in tanggal], y=jam_label, z=counts.T.round(1),
+        colorscale='Turbo', colorbar=dict(title=dict(text=satuan, side='right')), xgap=1, ygap=1,
+        hovertemplate='Tanggal: %{x}<br>Jam: %{y}<br>' + satuan + ': %{z}<extra></extra>'
+    ))
+    fig_heat.update_layout(
+        title="🗓️ POLA TRAFFIC JAM × TANGGAL" + ("" if hari_per_kolom == 1 else f" (per {hari_per_kolom} hari)"),
+        height=450, margin=dict(l=20, r=20, t=50, b=20),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=18,
+        xaxis=dict(type='category', title="Tanggal Produksi", tickfont=dict(size=11)),
+        yaxis=dict(type='category', title="Jam", autorange='reversed', tickfont=dict(size=11)),
+    )
+    return fig_heat
+
+def build_compare_trend_figure(df_series):
+    import plotly.express as px
+
+    # df_series: index tanggal_produksi, satu kolom per unit (liter per hari)
+    df_long = df_series.rename_axis(columns='unit').stack().rename('liter').reset_index()
+    fig_cmp = px.line(
+        df_long, x='tanggal_produksi', y='liter', color='unit', markers=True,
+        title="📈 TREN SOLAR HARIAN PER UNIT",
+        labels={'tanggal_produksi': 'Tanggal Produksi', 'liter': 'Liter', 'unit': 'Unit'}
+    )
+    fig_cmp.update_layout(
+        height=400, margin=dict(l=10, r=10, t=80, b=10),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=24,
+        xaxis=dict(title="Tanggal Produksi", title_font=dict(size=18), tickfont=dict(size=14)),
+        yaxis=dict(title="Volume (Liter)", title_font=dict(size=18), tickfont=dict(size=14)),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig_cmp
+
+def build_compare_rank_figure(df_cmp, median_l_hr):
+    import plotly.express as px
+
+    # df_cmp: kolom unit, l_hr, rank_l_hr (urut dari yang paling irit di bawah)
+    fig_rank = px.bar(
+        df_cmp, x='l_hr', y='unit', orientation='h',
+        title="🏁 PERINGKAT LITER/JAM (VS MEDIAN ARMADA)",
+        color='l_hr', color_continuous_scale=['#39ff14', '#ffa500', '#ff4b4b'], text_auto='.1f',
+        hover_data={'rank_l_hr': True}, labels={'l_hr': 'Liter/Jam', 'unit': 'Unit', 'rank_l_hr': 'Peringkat Armada'}
+    )
+    fig_rank.add_vline(x=median_l_hr, line_dash='dash', line_color='#b0c4de',
+                       annotation_text=f"Median armada {median_l_hr:.1f}", annotation_position='top')
+    fig_rank.update_layout(
+        height=400, margin=dict(l=10, r=10, t=80, b=10),
+        template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
+        title_font_size=24, coloraxis_showscale=False,
+        xaxis=dict(title="Liter/Jam", title_font=dict(size=18), tickfont=dict(size=14)),
+        yaxis=dict(title="Unit", type='category', title_font=dict(size=18), tickfont=dict(size=14))
+    )
+    return fig_rank
@@ -1,18 +1,40 @@
 # ==========================================
 # LANGKAH 1: IMPORT LIBRARY & SETUP HALAMAN
 # ==========================================
+import os
+import re
+from urllib.parse import urlencode
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import refuel_engine as engine
+from refuel_engine import (
+    MIN_REFILL_TARGET, DEDUP_WINDOW_MENIT, DEDUP_TOLERANSI_L, OUTLIER_Z_LIMIT,
+    JUMLAH_BAY, DURASI_SERVIS_MENIT, DURASI_SERVIS_OBSERVASI,
+    PRAKIRAAN_MINGGU_ACUAN, PRAKIRAAN_HORIZON_JAM, SHIFT_CALENDAR,
+    assign_shift_calendar, data_version, early_refill_rows, forecast_demand,
+    forecast_per_shift, get_performance_df, hour_order, hourly_from_rollup, performance_from_rollup,
+    LEADERBOARD_METRIK, PRESET_RENTANG, build_hour_index, build_unit_index, is_time_sorted, is_whole_days, preset_range, rollup_range, select_rows,
+    hourly_traffic, production_date, production_day_start, quarantine_summary, summarize, unit_daily_series, bucket_days, slice_matrix,
+    EXPORT_FORMAT, EXPORT_MAKS_BARIS_DASHBOARD, EXPORT_TABEL, EXPORT_TOKEN, export_file, export_filename, export_formats, export_table, start_export_server,
+)
+from refuel_engine.live import LiveFeed, start_sse_server
+from refuel_engine.snapshot import SnapshotClient, read_current
+from refuel_engine.store import StoreReader, is_store_path
+from refuel_engine.cache import CACHE, CACHE_BUDGET_MB, estimate_size
+from refuel_engine.profiling import REGISTRY, start_metrics_server, timed
+from charts import (
+    build_compare_rank_figure, build_compare_trend_figure, build_leaderboard_figure, build_queue_figure,
+    build_traffic_figure, build_traffic_heatmap_figure, build_trend_figure,
+)
 
 st.set_page_config(page_title="MACO Refueling 39", layout="wide", initial_sidebar_state="collapsed")
 
 # ==========================================
 # REVISI LANGKAH 2: CUSTOM CSS (FORCE DARK & NEON)
 # ==========================================
-st.markdown("""
+CSS_DASHBOARD = """
     <style>
     /* --- 1. PAKSA BACKGROUND GELAP (GLOBAL) --- */
     /* Ini akan menimpa settingan Light Mode browser user */
@@ -106,121 +128,278 @@ st.markdown("""
     /* --- 5. HILANGKAN PADDING ATAS BAWAAN STREAMLIT --- */
     .block-container { padding-top: 4rem; } 
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# CSS tetap harus dikirim tiap rerun, tapi cukup versi ringkas (tanpa komentar & spasi)
+@st.cache_resource
+def css_ringkas(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    return re.sub(r'\s+', ' ', css).strip()
+
+st.markdown(css_ringkas(CSS_DASHBOARD), unsafe_allow_html=True)
+
+# Judul + kartu kosong (skeleton) tampil duluan, sebelum data selesai diambil
+st.markdown('<p class="main-title">DASHBOARD REFUELING PITSTOP KM 39</p>', unsafe_allow_html=True)
+skeleton = st.empty()
+with skeleton.container():
+    for kolom, label in zip(st.columns(5), ["Total Pemakaian Solar", "Total Pengisian", "Rata-Rata Pengisian", "Fuel Consumption", "Update Data Terakhir"]):
+        kolom.metric(label, "…")
 
 # ==========================================
 # LANGKAH 3: KONEKSI DATA (ANTI-ERROR)
 # ==========================================
-SHEET_ID = "1NN_rGKQBZzhUIKnfY1aOs1gvCP2aFiVo6j1RFagtb4s"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv"
-
-@st.cache_data(ttl=60)
+# Sumber data bisa diganti ke snapshot lokal (CSV/Parquet) lewat env REFUEL_SOURCE
+CSV_URL = os.environ.get('REFUEL_SOURCE', engine.CSV_URL)
+
+# Frame besar di-cache sebagai resource: semua sesi & rerun memakai objek yang SAMA (read-only),
+# bukan salinan hasil unpickle seperti cache_data. Jangan pernah mengubah df di tempat.
+# Ukurannya dicatat ke CACHE (reserve) -> budget untuk artefak turunan di bawah ikut menyusut.
+# Tiap mode mereservasi frame yang benar-benar dipegangnya, per versi yang masih bisa hidup bersamaan:
+#   CSV/Parquet : frame mentah (1 entri) + frame siap (max_entries=2 -> 2 versi)
+#   store lokal : frame reader (1, tumbuh di tempat) + frame siap (2 versi)
+#   LIVE        : frame mentah & siap milik LiveFeed per versi (2: versi baru + yang masih dipakai sesi)
+#   snapshot    : frame hasil mmap + rollup snapshot (1 versi)
+@st.cache_resource(ttl=60)
 def load_data():
     try:
-        df = pd.read_csv(CSV_URL) 
-        df.columns = df.columns.str.lower().str.strip()
-        
-        rename_map = {
-            'timestamp': 'timestamp', 'kode unit': 'unit', 
-            'lokasi': 'location', 'quantity': 'quantity', 'hm': 'hm'
-        }
-        df.rename(columns=rename_map, inplace=True)
-        df = df.dropna(subset=['unit', 'quantity'], how='all')
-
-        if 'timestamp' in df.columns:
-            raw_ts = df['timestamp'].astype(str)
-            df['timestamp'] = pd.to_datetime(raw_ts, dayfirst=True, errors='coerce')
-            
-            mask_failed = df['timestamp'].isna()
-            if mask_failed.any():
-                df.loc[mask_failed, 'timestamp'] = pd.to_datetime(
-                    raw_ts[mask_failed], dayfirst=False, errors='coerce'
-                )
-            
-            df = df.sort_values('timestamp').reset_index(drop=True)
-
-        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0)
-        if 'hm' in df.columns:
-            df['hm'] = pd.to_numeric(df['hm'], errors='coerce')
-        if 'shift' in df.columns:
-            df['shift'] = df['shift'].astype(str).str.upper().str.strip()
-            
-        return df
+        raw = engine.load_refuel_log(CSV_URL)
+        CACHE.reserve('frame_mentah', estimate_size(raw))
+        return raw
     except Exception as e:
         st.error(f"Gagal memuat data: {e}")
         return pd.DataFrame()
 
-df = load_data()
+# Semua olah data ada di paket refuel_engine (tanpa Streamlit), di sini cukup di-cache.
+# Kunci = versi data (frame mentah tidak di-hash tiap rerun)
+@st.cache_resource(ttl=60, max_entries=2)
+def prepare_data(version, _raw):
+    hasil = engine.prepare_refuel_frame(_raw)
+    CACHE.reserve_version('frame_siap', version, hasil, simpan=2)
+    return hasil
+
+# Artefak turunan masuk CACHE (refuel_engine.cache): satu budget memori (REFUEL_CACHE_MB) untuk semua
+# sesi, LRU sadar ukuran + batas entri per fungsi. Hasilnya objek bersama -> read-only seperti df.
+# Simulasi antrean dikunci isi kedatangan + parameter bay (kombinasi input bisa banyak -> dibatasi)
+@CACHE.memoize('simulate_queue', max_entries=16, ttl=60)
+def simulate_queue_cached(arrivals, n_bays, service_min, service_samples=()):
+    return engine.simulate_bay_queue(arrivals, n_bays, service_min, list(service_samples))
+
+# Model prakiraan & ringkasan shift di-cache per versi data (frame besar tidak ikut di-hash)
+@CACHE.memoize('fit_demand_model', max_entries=4)
+def fit_demand_model(version, _data):
+    return engine.fit_demand_model(_data)
+
+@CACHE.memoize('shift_summary', max_entries=4)
+def shift_summary(version, _data):
+    return engine.shift_summary(_data)
+
+# Indeks posisi baris per unit & per jam + status urut waktu, sekali per versi data -> filter unit & rentang
+# waktu cukup binary search (refuel_engine.slicing), tanpa scan boolean seluruh log tiap rerun
+@CACHE.memoize('data_index', max_entries=2)
+def data_index(version, _data):
+    return build_unit_index(_data), build_hour_index(_data), is_time_sorted(_data['timestamp'])
+
+# Titik yang diklik di grafik (on_select) -> nilai sumbu x/y titik pertama, None kalau tidak ada pilihan
+def titik_klik(key, sumbu):
+    titik = (st.session_state.get(key) or {}).get('selection', {}).get('points', [])
+    return titik[0].get(sumbu) if titik else None
+
+# Leaderboard dari rollup harian (tanpa baris mentah), di-cache per versi data + jendela + metrik
+@CACHE.memoize('leaderboard', max_entries=32)
+def leaderboard(version, _daily, metrik, n, largest, mulai, akhir):
+    return engine.leaderboard(_daily, metrik, n, largest, mulai, akhir)
+
+# Matriks traffic [hari x jam] dari rollup per jam, sekali per versi data -> heatmap cukup slice array
+@CACHE.memoize('traffic_matrix', max_entries=2)
+def traffic_matrix(version, _hourly):
+    return engine.traffic_matrix(_hourly)
+
+# Agregat per unit dari rollup harian (sekali per versi) -> mode bandingkan unit cukup .loc
+MAKS_UNIT_BANDING = 20
+
+@CACHE.memoize('unit_summary', max_entries=4)
+def unit_summary(version, _daily):
+    return engine.unit_summary(_daily)
+
+# Skor kesehatan HM per unit dari kolom hm_status (satu groupby), per versi data + filter
+@CACHE.memoize('hm_health', max_entries=8)
+def hm_health_cached(version, _data):
+    return engine.hm_health(_data)
+
+# Rollup harian & per jam disimpan di disk (REFUEL_ROLLUP_DIR); hari yang sudah tutup tidak dihitung ulang
+@CACHE.memoize('rollups', max_entries=4)
+def rollups(version, _data):
+    try:
+        return engine.update_rollups(_data, sumber=CSV_URL)
+    except OSError:
+        # Disk read-only (mis. hosting gratisan) -> tetap jalan dengan rollup di memori
+        return engine.build_rollups(_data)
+
+# Endpoint teks Prometheus (opsional): set env REFUEL_METRICS_PORT, server jalan sekali per proses
+@st.cache_resource
+def metrics_server(port):
+    return start_metrics_server(port, extra=(CACHE.prometheus_text,))
+
+if os.environ.get('REFUEL_METRICS_PORT'):
+    metrics_server(int(os.environ['REFUEL_METRICS_PORT']))
+
+# Endpoint export (opsional): set env REFUEL_EXPORT_PORT -> http://host:port/export?tabel=..&format=..
+# Respons chunked langsung dari frame di memori, tanpa lewat websocket Streamlit
+@st.cache_resource
+def export_server(port):
+    return start_export_server(port)
+
+# Mode LIVE (env REFUEL_LIVE=1): satu poller per proses membaca sumber tiap LIVE_POLL_DETIK,
+# semua layar hanya mengecek nomor versi di memori -> scan baru muncul dalam hitungan detik.
+# Opsional SSE untuk layar lain: env REFUEL_SSE_PORT -> http://host:port/events
+LIVE_MODE = os.environ.get('REFUEL_LIVE') == '1'
+LIVE_CEK_DETIK = 2
+
+@st.cache_resource
+def live_feed(source):
+    feed = LiveFeed(source).start()
+    if os.environ.get('REFUEL_SSE_PORT'):
+        start_sse_server(feed, int(os.environ['REFUEL_SSE_PORT']))
+    return feed
+
+@st.fragment(run_every=LIVE_CEK_DETIK)
+def live_watcher(feed, versi_tampil):
+    # Jalan sendiri tiap beberapa detik tanpa rerun halaman; rerun penuh hanya kalau ada data baru
+    if feed.version != versi_tampil:
+        st.rerun()
+    status = f"⚠️ Gagal baca sumber: {feed.last_error}" if feed.last_error else "🟢 LIVE"
+    st.caption(f"{status} · versi data {versi_tampil} · cek tiap {LIVE_CEK_DETIK} detik")
+
+# Log ingesti lokal (REFUEL_SOURCE=data/refuel_log, diisi ingest_api): tail incremental tiap rerun
+@st.cache_resource
+def store_reader(path):
+    return StoreReader(path)
+
+# Mode multi-worker (run.py --workers N): loader terpisah menulis snapshot Arrow ke REFUEL_SNAPSHOT_DIR,
+# proses ini cukup memetakannya (mmap) -> satu salinan data & satu refresh untuk semua worker
+SNAPSHOT_DIR = os.environ.get('REFUEL_SNAPSHOT_DIR')
+SNAPSHOT_CEK_DETIK = 10
+
+@st.cache_resource
+def snapshot_client(path):
+    return SnapshotClient(path)
+
+@st.fragment(run_every=SNAPSHOT_CEK_DETIK)
+def snapshot_watcher(versi_tampil):
+    # Hanya membaca file CURRENT; rerun penuh kalau loader sudah menulis versi baru
+    current = read_current(SNAPSHOT_DIR)
+    if current.get('version', 0) != versi_tampil:
+        st.rerun()
+    st.caption(f"🗂️ Snapshot bersama versi {versi_tampil} · {current.get('created', '-')}")
+
+with st.spinner("Memuat data refueling..."):
+    if SNAPSHOT_DIR:
+        with timed('load_data'):
+            snap = snapshot_client(SNAPSHOT_DIR).get(timeout=30)
+        df, df_duplikat, df_karantina = snap.frame, snap.duplikat, snap.karantina
+        daily_rollup, hourly_rollup = snap.daily, snap.hourly
+        CACHE.reserve_version('frame_snapshot', snap.version, (df, df_duplikat, df_karantina, daily_rollup, hourly_rollup))
+    else:
+        with timed('load_data'):
+            if LIVE_MODE:
+                feed = live_feed(CSV_URL)
+                feed.wait(0, timeout=30)
+                # Poller sudah menyiapkan frame incremental per batch -> tidak ada prepare ulang per versi
+                feed_version, (df, df_duplikat, df_karantina) = feed.prepared_snapshot()
+                CACHE.reserve_version('frame_live', feed_version, (feed.frame, df, df_duplikat, df_karantina), simpan=2)
+            elif is_store_path(CSV_URL):
+                reader = store_reader(CSV_URL)
+                reader.refresh()
+                df = reader.frame
+                CACHE.reserve_version('frame_store', len(df), df)
+            else:
+                df = load_data()
+
+        if not df.empty:
+            if not LIVE_MODE:
+                with timed('prepare'):
+                    df, df_duplikat, df_karantina = prepare_data(data_version(df), df)
+            with timed('rollup'):
+                daily_rollup, hourly_rollup = rollups(data_version(df), df)
+skeleton.empty()
+
+if SNAPSHOT_DIR:
+    snapshot_watcher(snap.version)
+elif LIVE_MODE:
+    live_watcher(feed, feed_version)
 
 # ==========================================
 # REVISI LANGKAH 4: LOGIKA DATA & ANOMALI
 # ==========================================
 if not df.empty:
-    # 1. Judul & Header (Tetap)
-    st.markdown('<p class="main-title">DASHBOARD REFUELING PITSTOP KM 39</p>', unsafe_allow_html=True)
+    # 1. Judul & Header -> sudah tampil di atas bersama skeleton
+
+    unit_index, hour_index, df_urut = data_index(data_version(df), df)
+    ts_terakhir = df['timestamp'].max()
 
     # 2. Filter & Refresh (Tetap)
-    col_filter, col_btn = st.columns([4, 1]) 
+    col_filter, col_shift, col_range, col_btn = st.columns([2.5, 1, 1.5, 1])
     with col_filter:
-        unit_list = sorted(df['unit'].unique().tolist())
+        unit_list = sorted(unit_index)
         filter_options = ["ALL UNITS"] + unit_list
         selected_unit = st.selectbox("🔍 Filter No Lambung Unit:", options=filter_options, index=0)
 
+    with col_shift:
+        shift_options = ["ALL SHIFT"] + [nama for nama, _ in SHIFT_CALENDAR]
+        selected_shift = st.selectbox("🕒 Filter Shift:", options=shift_options, index=0)
+
+    with col_range:
+        # Rentang global untuk semua panel; "hari ini" = hari produksi scan terakhir
+        preset = st.selectbox("📅 Rentang Waktu:", options=PRESET_RENTANG, index=0, key='rentang')
+        custom = None
+        if preset == 'CUSTOM':
+            hari_terakhir = production_date(ts_terakhir)
+            custom = st.date_input("Tanggal Produksi (dari - sampai):", value=(hari_terakhir - timedelta(days=6), hari_terakhir),
+                                   key='rentang_custom') or None
+    rentang_mulai, rentang_akhir = preset_range(preset, ts_terakhir, custom)
+    hari_utuh = is_whole_days(rentang_mulai, rentang_akhir)
+
     with col_btn:
         st.write(" "); st.write(" ") 
         if st.button("🔄 Refresh Data", use_container_width=True):
-            st.cache_data.clear()
+            CACHE.clear()
+            load_data.clear()
+            prepare_data.clear()
             st.rerun()
 
-    # 3. Saring Data
-    df_filtered = df if selected_unit == "ALL UNITS" else df[df['unit'] == selected_unit]
-    
+    # 3. Saring Data: rentang & unit lewat binary search (potongan iloc), shift baru disaring di potongan kecil
+    with timed('filter'):
+        df_range = select_rows(df, rentang_mulai, rentang_akhir, urut=df_urut)
+        df_unit = select_rows(df, rentang_mulai, rentang_akhir, None if selected_unit == "ALL UNITS" else selected_unit,
+                              unit_index, df_urut)
+        df_filtered = df_unit if selected_shift == "ALL SHIFT" else df_unit[df_unit['shift_produksi'] == selected_shift]
+        daily_range = rollup_range(daily_rollup, rentang_mulai, rentang_akhir)
+
     if df_filtered.empty:
-        st.warning("⚠️ Tidak ada data untuk unit yang dipilih.")
+        st.warning("⚠️ Tidak ada data untuk unit / rentang waktu yang dipilih.")
         st.stop()
 
     # --- LOGIKA BARU: DETEKSI EARLY REFILL (VOLVO FMX) ---
-    # Batas Minimum Pengisian yang Efektif (Setengah Tangki / 160L)
-    MIN_REFILL_TARGET = 160.0 
-    
-    # Kita butuh df ini untuk visualisasi grafik nanti
-    # Menandai baris mana saja yang Quantity-nya "Pelit" (Anomali)
-    df_filtered['is_anomali'] = df_filtered['quantity'] < MIN_REFILL_TARGET
-
-    # 4. Fungsi Analisa Performa (Tetap)
-    def get_performance_df(data_source):
-        active_units = data_source['unit'].unique()
-        performance_data = []
-        for unit in active_units:
-            u_data = data_source[data_source['unit'] == unit]
-            duration = (u_data['timestamp'].max() - u_data['timestamp'].min()).total_seconds() / 3600
-            l_hr = u_data['quantity'].sum() / duration if duration > 0 else 0
-            
-            num_days_unit = u_data['timestamp'].dt.date.nunique()
-            refills_day = len(u_data) / num_days_unit if num_days_unit > 0 else 0
-            
-            performance_data.append({
-                'unit': unit, 
-                'l_hr': l_hr, 
-                'refills_day': refills_day
-            })
-        return pd.DataFrame(performance_data)
-
-    df_perf_global = get_performance_df(df)
-    df_perf_filtered = get_performance_df(df_filtered)
+    # Batas Minimum Pengisian yang Efektif (Setengah Tangki / 160L) -> MIN_REFILL_TARGET di refuel_engine
+    # Penanda "Pelit" (kolom is_anomali) sudah dihitung sekali saat prepare, df_filtered cukup dibaca
+
+    # 4. Analisa Performa (fungsi di refuel_engine)
+    with timed('perf'):
+        # Tanpa filter shift (dan rentang per hari utuh) cukup baca rollup harian; selain itu pakai data mentah
+        if selected_shift == "ALL SHIFT" and hari_utuh:
+            daily_unit = daily_range if selected_unit == "ALL UNITS" else daily_range[daily_range['unit'] == selected_unit]
+            df_perf_filtered = performance_from_rollup(daily_unit)
+        else:
+            df_perf_filtered = get_performance_df(df_filtered)
 
     # Rata-rata & Metrik (Tetap)
-    if not df_perf_filtered.empty:
-        avg_l_per_hr = df_perf_filtered['l_hr'][df_perf_filtered['l_hr'] > 0].mean()
-        avg_refills_per_day = df_perf_filtered['refills_day'].mean()
-    else:
-        avg_l_per_hr = 0
-        avg_refills_per_day = 0
+    ringkasan = summarize(df_filtered, df_perf_filtered)
+    avg_l_per_hr = ringkasan.avg_l_per_hr
+    avg_refills_per_day = ringkasan.avg_refills_per_day
 
-    total_qty = df_filtered['quantity'].sum()
-    total_trx = len(df_filtered)
-    last_update_raw = df_filtered['timestamp'].max()
-    last_update_str = last_update_raw.strftime('%d %b, %H:%M') if pd.notnull(last_update_raw) else "-"
+    total_qty = ringkasan.total_qty
+    total_trx = ringkasan.total_trx
+    last_update_str = ringkasan.last_update.strftime('%d %b, %H:%M') if ringkasan.last_update is not None else "-"
     achievement_rate = (1 - 0.1017) * 100
 
     # ==========================================
@@ -236,18 +415,23 @@ if not df.empty:
     c5.metric("Update Data Terakhir", last_update_str)
 
     st.write("---")
+
+    # Yang hanya dipakai di tab grafik dihitung SETELAH metric card tampil
+    # Prakiraan armada (model di-cache per versi data)
+    with timed('forecast'):
+        df_forecast = forecast_demand(fit_demand_model(data_version(df), df))
     
     # Setup Tab
-    tab1, tab2 = st.tabs(["📊 RINGKASAN VISUAL", "📋 LOGSHEET KESELURUHAN"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 RINGKASAN VISUAL", "📋 LOGSHEET KESELURUHAN", "🧹 DUPLIKAT & KARANTINA", "🕒 RINGKASAN SHIFT", "⚖️ BANDINGKAN UNIT"])
 
 # ==========================================
 # REVISI LANGKAH 6: INTEGRASI DAFTAR ANOMALI (EARLY REFILL LIST)
 # ==========================================
     with tab1:
         # --- 1. ALERT BOX (PERINGATAN ATAS) ---
-        MIN_REFILL_TARGET = 160.0
         # Filter data anomali dari data yang sedang aktif
-        df_early_refill = df_filtered[df_filtered['quantity'] < MIN_REFILL_TARGET].copy()
+        with timed('anomaly'):
+            df_early_refill = early_refill_rows(df_filtered)
 
         if not df_early_refill.empty:
             st.markdown(f"""
@@ -260,165 +444,518 @@ if not df.empty:
             </div>
             """, unsafe_allow_html=True)
 
-        # --- BARIS 1: GRAFIK TREN & TOP 5 (TETAP) ---
-        row1_c1, row1_c2 = st.columns([1.5, 1])
-
-        with row1_c1:
-            df_trend = df_filtered.copy().sort_values('timestamp')
-            
-            # Layer Biru (Normal)
-            fig_trend = px.area(
-                df_trend, x='timestamp', y='quantity', 
-                title="📈 TREN KONSUMSI SOLAR", 
-                hover_data={'timestamp': '|%d %b %Y, %H:%M'}
-            )
-            fig_trend.update_traces(line_color='#00e5ff', fillcolor='rgba(0, 229, 255, 0.2)')
-            
-            # Layer Merah (Anomali)
-            anomali_points = df_trend[df_trend['quantity'] < MIN_REFILL_TARGET]
-            if not anomali_points.empty:
-                fig_trend.add_trace(go.Scatter(
-                    x=anomali_points['timestamp'], y=anomali_points['quantity'],
-                    mode='markers', name='Early Refill',
-                    marker=dict(color='#ff4b4b', size=10, symbol='x', line=dict(width=2, color='white')),
-                    hovertemplate='<b>EARLY REFILL!</b><br>Vol: %{y} L<br>Waktu: %{x}<extra></extra>'
-                ))
-
-            fig_trend.update_layout(
-                height=400, margin=dict(l=10, r=10, t=80, b=10), 
-                template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
-                title_font_size=24,
-                xaxis=dict(title="Waktu Pengisian", title_font=dict(size=18), tickfont=dict(size=14)),
-                yaxis=dict(title="Volume (Liter)", title_font=dict(size=18), tickfont=dict(size=14)),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
-            st.plotly_chart(fig_trend, use_container_width=True)
-
-        with row1_c2:
-            df_boros = df_perf_global.nlargest(5, 'l_hr').sort_values('l_hr', ascending=True)
-            fig_boros = px.bar(
-                df_boros, x="l_hr", y="unit", orientation='h', 
-                title="🔥 TOP 5 UNIT TERBOROS", 
-                color_discrete_sequence=['#ff4b4b'], text_auto='.1f'
-            )
-            fig_boros.update_layout(
-                height=400, margin=dict(l=10, r=10, t=80, b=10), 
-                template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
-                title_font_size=24,
-                xaxis=dict(title="Liter/Jam", title_font=dict(size=18), tickfont=dict(size=14)),
-                yaxis=dict(title="Unit", title_font=dict(size=18), tickfont=dict(size=14))
-            )
-            st.plotly_chart(fig_boros, use_container_width=True)
-
-        # --- BARIS 2: TIGA KOLOM (LIST ANOMALI | TRAFFIC | JAM) ---
-        st.write("---")
-        # Layout: Kiri (List) - Tengah (Chart) - Kanan (Jam)
-        col_list, col_chart, col_clock = st.columns([1.5, 2.5, 1])
+        # --- TANGGAL GRAFIK TRAFFIC (DIPAKAI PANEL INTERAKTIF & SIMULASI ANTREAN) ---
+        # Rentang berubah -> lompat ke hari terakhir di rentang
+        if 'chart_date' not in st.session_state or st.session_state.get('chart_rentang') != (rentang_mulai, rentang_akhir):
+            st.session_state.chart_date = production_date(df_range['timestamp'].max() if not df_range.empty else ts_terakhir)
+            st.session_state.chart_rentang = (rentang_mulai, rentang_akhir)
+        hari_dict = {'Monday': 'Senin', 'Tuesday': 'Selasa', 'Wednesday': 'Rabu', 'Thursday': 'Kamis', 'Friday': 'Jumat', 'Saturday': 'Sabtu', 'Sunday': 'Minggu'}
+        bulan_dict = {'January': 'Januari', 'February': 'Februari', 'March': 'Maret', 'April': 'April', 'May': 'Mei', 'June': 'Juni', 'July': 'Juli', 'August': 'Agustus', 'September': 'September', 'October': 'Oktober', 'November': 'November', 'December': 'Desember'}
+
+        eng_day = st.session_state.chart_date.strftime("%A")
+        eng_month = st.session_state.chart_date.strftime("%B")
+        tgl_angka = st.session_state.chart_date.day
+        tahun = st.session_state.chart_date.year
+        indo_str = f"{hari_dict.get(eng_day, eng_day)}, {tgl_angka} {bulan_dict.get(eng_month, eng_month)} {tahun}"
+        # Tanggal = tanggal produksi (shift malam yang lewat 00:00 tetap satu hari)
+        chart_ts = pd.Timestamp(st.session_state.chart_date)
+
+        # --- PANEL INTERAKTIF (BARIS 1 & 2) DENGAN CROSS-FILTER ---
+        # Klik bar unit di leaderboard / bar jam di traffic -> tren, daftar early refill & traffic ikut
+        # tersaring. Semua di satu fragment: klik hanya me-rerun panel ini, bukan seluruh halaman
+        # (metric card, heatmap, simulasi & tab lain tetap). Potongannya dari indeks unit/jam yang
+        # sudah di-cache per versi data -> binary search, tanpa scan seluruh log.
+        @st.fragment
+        def panel_interaktif():
+            # Unit hasil klik hanya dipakai kalau filter unit di atas masih "ALL UNITS"
+            klik_unit = titik_klik('klik_unit', 'y') if selected_unit == "ALL UNITS" else None
+            klik_jam = titik_klik('klik_jam', 'x')
+            jam_cf = None if klik_jam is None else int(str(klik_jam)[:2])
+            with timed('cross_filter'):
+                if klik_unit is None and jam_cf is None:
+                    df_cf, df_early_cf = df_filtered, df_early_refill
+                else:
+                    unit_cf = klik_unit or (None if selected_unit == "ALL UNITS" else selected_unit)
+                    df_cf = select_rows(df, rentang_mulai, rentang_akhir, unit_cf, unit_index, df_urut, jam_cf, hour_index)
+                    if selected_shift != "ALL SHIFT":
+                        df_cf = df_cf[df_cf['shift_produksi'] == selected_shift]
+                    df_early_cf = early_refill_rows(df_cf)
+
+            if klik_unit is not None or jam_cf is not None:
+                pilihan = " · ".join(x for x in [klik_unit and f"Unit {klik_unit}", jam_cf is not None and f"Jam {jam_cf:02d}:00 (semua hari di rentang)"] if x)
+                st.info(f"🎯 Cross-filter aktif: {pilihan} → {len(df_cf)} pengisian. Klik dua kali di area grafik untuk melepas pilihan.")
+
+            # --- BARIS 1: GRAFIK TREN & TOP 5 (TETAP) ---
+            row1_c1, row1_c2 = st.columns([1.5, 1])
+
+            with row1_c1:
+                if df_cf.empty:
+                    st.info("💤 Tidak ada pengisian untuk pilihan cross-filter ini.")
+                else:
+                    with timed('fig_trend'):
+                        # Frame sudah urut waktu sejak ingesti -> tidak perlu sort/copy lagi
+                        df_trend = df_cf if df_cf['timestamp'].is_monotonic_increasing else df_cf.sort_values('timestamp')
+
+                        # Prakiraan hanya relevan kalau rentang sampai ke data terbaru (dan tidak ada cross-filter)
+                        tampil_prakiraan = (selected_unit == "ALL UNITS" and klik_unit is None and jam_cf is None
+                                            and (rentang_akhir is None or rentang_akhir > ts_terakhir))
+                        fig_trend = build_trend_figure(df_trend, df_forecast if tampil_prakiraan else None)
+                        st.plotly_chart(fig_trend, use_container_width=True)
+
+            with row1_c2:
+                # Leaderboard: metrik & arah bisa diganti, default tetap "Top 5 Terboros" (liter/jam tertinggi)
+                lb_c1, lb_c2 = st.columns([2, 1])
+                metrik_lb = lb_c1.selectbox("🏆 Peringkat:", options=list(LEADERBOARD_METRIK), format_func=LEADERBOARD_METRIK.get, key='lb_metrik')
+                arah_lb = lb_c2.selectbox("Urutan:", options=["TERTINGGI", "TERENDAH"], key='lb_arah')
+                with timed('leaderboard'):
+                    df_lb = leaderboard(data_version(df), daily_rollup, metrik_lb, 5, arah_lb == "TERTINGGI", rentang_mulai, rentang_akhir)
+                with timed('fig_top5'):
+                    if metrik_lb == 'l_hr' and arah_lb == "TERTINGGI":
+                        judul_lb, warna_lb = "🔥 TOP 5 UNIT TERBOROS", '#ff4b4b'
+                    else:
+                        judul_lb = f"🏆 5 UNIT {LEADERBOARD_METRIK[metrik_lb].upper()} {arah_lb}"
+                        warna_lb = '#ff4b4b' if arah_lb == "TERTINGGI" else '#39ff14'
+                    fig_boros = build_leaderboard_figure(df_lb, judul_lb, LEADERBOARD_METRIK[metrik_lb], warna_lb)
+                    st.plotly_chart(fig_boros, use_container_width=True, on_select="rerun", selection_mode="points", key='klik_unit')
+                if rentang_mulai is not None:
+                    st.caption("▲/▼ = naik/turun peringkat dibanding periode sebelumnya yang sama panjang (per hari produksi utuh).")
+
+            # --- BARIS 2: TIGA KOLOM (LIST ANOMALI | TRAFFIC | JAM) ---
+            st.write("---")
+            # Layout: Kiri (List) - Tengah (Chart) - Kanan (Jam)
+            col_list, col_chart, col_clock = st.columns([1.5, 2.5, 1])
         
-        # --- KOLOM 1: DAFTAR UNIT PELANGGAR (FITUR BARU) ---
-        with col_list:
-            st.markdown('<p style="font-size: 18px; color: #ff4b4b; font-weight: bold; text-align: center; margin-bottom: 10px;">📋 DAFTAR UNIT REFUELING DIBAWAH 160L</p>', unsafe_allow_html=True)
+            # --- KOLOM 1: DAFTAR UNIT PELANGGAR (FITUR BARU) ---
+            with col_list:
+                st.markdown('<p style="font-size: 18px; color: #ff4b4b; font-weight: bold; text-align: center; margin-bottom: 10px;">📋 DAFTAR UNIT REFUELING DIBAWAH 160L</p>', unsafe_allow_html=True)
             
-            if not df_early_refill.empty:
-                # Rapikan tabel untuk tampilan
-                df_show = df_early_refill[['timestamp', 'unit', 'quantity']].copy()
-                df_show = df_show.sort_values('timestamp', ascending=False) # Yang terbaru paling atas
-                
-                # Format Waktu agar enak dibaca (Jam:Menit)
-                df_show['Waktu'] = df_show['timestamp'].dt.strftime('%d %b, %H:%M')
-                
-                # Rename kolom
-                df_show = df_show.rename(columns={'unit': 'No Unit', 'quantity': 'Isi (L)'})
-                
-                # Tampilkan tabel tanpa index
-                st.dataframe(
-                    df_show[['Waktu', 'No Unit', 'Isi (L)']], 
-                    use_container_width=True, 
-                    hide_index=True,
-                    height=350 # Tinggi disamakan dengan grafik sebelahnya
-                )
-            else:
-                st.success("✅ Tidak ada unit yang melanggar batas minimum pengisian.")
-
-        # --- KOLOM 2: GRAFIK TRAFFIC (TENGAH) ---
-        with col_chart:
-            # 1. SETUP SESSION STATE
-            if 'chart_date' not in st.session_state:
-                st.session_state.chart_date = df['timestamp'].max().date()
-
-            # 2. NAVIGASI TANGGAL
-            c_prev, c_date, c_next = st.columns([1, 4, 1])
-            with c_prev:
-                if st.button("⬅️ Prev", use_container_width=True):
-                    st.session_state.chart_date -= pd.Timedelta(days=1); st.rerun()
-            with c_next:
-                if st.button("Next ➡️", use_container_width=True):
-                    st.session_state.chart_date += pd.Timedelta(days=1); st.rerun()
-            with c_date:
-                hari_dict = {'Monday': 'Senin', 'Tuesday': 'Selasa', 'Wednesday': 'Rabu', 'Thursday': 'Kamis', 'Friday': 'Jumat', 'Saturday': 'Sabtu', 'Sunday': 'Minggu'}
-                bulan_dict = {'January': 'Januari', 'February': 'Februari', 'March': 'Maret', 'April': 'April', 'May': 'Mei', 'June': 'Juni', 'July': 'Juli', 'August': 'Agustus', 'September': 'September', 'October': 'Oktober', 'November': 'November', 'December': 'Desember'}
-                
-                eng_day = st.session_state.chart_date.strftime("%A")
-                eng_month = st.session_state.chart_date.strftime("%B")
-                tgl_angka = st.session_state.chart_date.day
-                tahun = st.session_state.chart_date.year
-                indo_str = f"{hari_dict.get(eng_day, eng_day)}, {tgl_angka} {bulan_dict.get(eng_month, eng_month)} {tahun}"
-                
-                st.markdown(f"<h3 style='text-align: center; color: #00e5ff; margin: 0; font-size: 20px;'>{indo_str}</h3>", unsafe_allow_html=True)
-
-            # 3. RENDER GRAFIK
-            df_daily = df[df['timestamp'].dt.date == st.session_state.chart_date].copy()
-            if not df_daily.empty:
-                df_daily['jam'] = df_daily['timestamp'].dt.hour
-                hourly_counts = df_daily.groupby('jam').size().reset_index(name='jumlah')
-                hourly_counts = hourly_counts.sort_values('jam')
-                hourly_counts['jam_label'] = hourly_counts['jam'].apply(lambda x: f"{x:02d}:00")
-
-                fig_daily = px.bar(
-                    hourly_counts, x='jam_label', y='jumlah',
-                    title=f"📊 TRAFFIC ANTREAN",
-                    text_auto=True, labels={'jam_label': 'Jam', 'jumlah': 'Unit'}
-                )
-                fig_daily.update_traces(marker_color='#00e5ff', width=0.6)
-                fig_daily.update_layout(
-                    height=350, margin=dict(l=20, r=20, t=50, b=20),
-                    template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)',
-                    title_font_size=18,
-                    xaxis=dict(type='category', title_font=dict(size=14), tickfont=dict(size=12)), 
-                    yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)', title_font=dict(size=14), tickfont=dict(size=12))
-                )
-                st.plotly_chart(fig_daily, use_container_width=True)
+                if not df_early_cf.empty:
+                    # Rapikan tabel untuk tampilan: hanya 3 kolom yang dibangun, yang terbaru paling atas
+                    # (data sudah urut waktu -> cukup dibalik)
+                    terbaru = df_early_cf.iloc[::-1]
+                    df_show = pd.DataFrame({
+                        'Waktu': terbaru['timestamp'].dt.strftime('%d %b, %H:%M'),  # Format Waktu agar enak dibaca (Jam:Menit)
+                        'No Unit': terbaru['unit'],
+                        'Isi (L)': terbaru['quantity'],
+                    })
+
+                    # Tampilkan tabel tanpa index
+                    with timed('tbl_early_refill'):
+                        st.dataframe(
+                            df_show, 
+                            use_container_width=True, 
+                            hide_index=True,
+                            height=350 # Tinggi disamakan dengan grafik sebelahnya
+                        )
+                else:
+                    st.success("✅ Tidak ada unit yang melanggar batas minimum pengisian.")
+
+            # --- KOLOM 2: GRAFIK TRAFFIC (TENGAH) ---
+            with col_chart:
+                # 1. NAVIGASI TANGGAL (ganti tanggal -> rerun penuh, simulasi antrean ikut tanggal ini)
+                c_prev, c_date, c_next = st.columns([1, 4, 1])
+                with c_prev:
+                    if st.button("⬅️ Prev", use_container_width=True):
+                        st.session_state.chart_date -= pd.Timedelta(days=1); st.rerun()
+                with c_next:
+                    if st.button("Next ➡️", use_container_width=True):
+                        st.session_state.chart_date += pd.Timedelta(days=1); st.rerun()
+                with c_date:
+                    st.markdown(f"<h3 style='text-align: center; color: #00e5ff; margin: 0; font-size: 20px;'>{indo_str}</h3>", unsafe_allow_html=True)
+
+                # 2. RENDER GRAFIK (unit hasil klik leaderboard ditumpuk di atas traffic armada)
+                fc_kalender = assign_shift_calendar(df_forecast['jam'])
+                fc_mask = fc_kalender['tanggal_produksi'] == chart_ts
+                if selected_shift != "ALL SHIFT":
+                    fc_mask &= fc_kalender['shift_produksi'] == selected_shift
+                fc_daily = df_forecast[fc_mask]
+                urutan_jam = hour_order()
+                with timed('traffic'):
+                    hourly_counts = hourly_from_rollup(hourly_rollup, chart_ts, None if selected_shift == "ALL SHIFT" else selected_shift)
+                    hourly_unit = None
+                    if klik_unit is not None:
+                        df_unit_hari = select_rows(df, production_day_start(chart_ts), production_day_start(chart_ts) + pd.Timedelta(days=1),
+                                                   klik_unit, unit_index, df_urut)
+                        if selected_shift != "ALL SHIFT":
+                            df_unit_hari = df_unit_hari[df_unit_hari['shift_produksi'] == selected_shift]
+                        hourly_unit = hourly_traffic(df_unit_hari, chart_ts)
+                if not hourly_counts.empty or not fc_daily.empty:
+                    with timed('fig_traffic'):
+                        fig_daily = build_traffic_figure(hourly_counts, fc_daily, urutan_jam, hourly_unit, klik_unit)
+                        st.plotly_chart(fig_daily, use_container_width=True, on_select="rerun", selection_mode="points", key='klik_jam')
+                else:
+                    st.info(f"💤 Tidak ada data pada {indo_str}.")
+
+            # --- KOLOM 3: JAM DIGITAL (KANAN) ---
+            with col_clock:
+                st.write(""); st.write("") 
+                servis_menit = st.session_state.get('sim_servis', DURASI_SERVIS_MENIT)
+                durasi_str = f"{int(servis_menit):02d}:{int(round(servis_menit % 1 * 60)):02d}s"
+                html_clock = f"""
+    <div class="clock-card" style="margin-top: 10px; padding: 15px;">
+    <p style="color: #888; font-size: 12px; margin-bottom: 5px;"> DURASI REFUELING</p>
+    <div class="digital-font" style="font-size: 30px;">
+    {durasi_str}
+    </div>
+    <p style="font-size: 14px; color: #00e5ff;">MENIT / UNIT</p>
+    </div>
+    """
+                st.markdown(html_clock, unsafe_allow_html=True)
+                st.markdown("""
+                <div style="text-align: center; color: #aaa; font-size: 11px; margin-top: 10px;">
+                <i>*Durasi refueling diambil dari hasil observasi ketika unit masuk bays s/d keluar bays.</i>
+                </div>
+                """, unsafe_allow_html=True)
+
+        panel_interaktif()
+
+        # --- BARIS 2B: SIMULASI ANTREAN BAY (WHAT-IF) ---
+        st.write("---")
+        st.markdown('<p style="font-size: 18px; color: #00e5ff; font-weight: bold; text-align: center; margin-bottom: 10px;">🚦 SIMULASI ANTREAN & UTILISASI BAY</p>', unsafe_allow_html=True)
+        col_sim_input, col_sim_chart = st.columns([1, 4])
+
+        with col_sim_input:
+            n_bays = st.number_input("Jumlah Bay", min_value=1, max_value=10, value=JUMLAH_BAY, step=1, key='sim_bay')
+            st.number_input("Durasi Servis (Menit/Unit)", min_value=1.0, max_value=60.0, value=DURASI_SERVIS_MENIT, step=0.5, key='sim_servis')
+            sampel_servis = ()
+            if DURASI_SERVIS_OBSERVASI:
+                if st.radio("Durasi Servis", ["Konstan", "Distribusi Observasi"], horizontal=True) == "Distribusi Observasi":
+                    sampel_servis = tuple(DURASI_SERVIS_OBSERVASI)
+
+        # Simulasi selalu pakai seluruh kedatangan di rentang (semua unit berbagi bay yang sama)
+        with timed('queue'):
+            df_sim = simulate_queue_cached(df_range['timestamp'], n_bays, st.session_state.sim_servis, sampel_servis)
+
+        with col_sim_input:
+            if not df_sim.empty:
+                st.metric("Rata-Rata Tunggu (Rentang)" if rentang_mulai is not None else "Rata-Rata Tunggu (Semua Data)", f"{(df_sim['rata_tunggu'] * df_sim['kedatangan']).sum() / df_sim['kedatangan'].sum():.1f} Menit")
+                st.metric("Utilisasi Bay (Rentang)" if rentang_mulai is not None else "Utilisasi Bay (Semua Data)", f"{df_sim['utilisasi'].mean() * 100:.0f} %")
+
+        with col_sim_chart:
+            df_sim_day = df_sim[assign_shift_calendar(df_sim['jam'])['tanggal_produksi'] == chart_ts]
+            if not df_sim_day.empty:
+                with timed('fig_queue'):
+                    fig_sim = build_queue_figure(df_sim_day, f"🚦 ESTIMASI ANTREAN - {indo_str} ({n_bays} Bay, {st.session_state.sim_servis:g} Menit/Unit)")
+                    st.plotly_chart(fig_sim, use_container_width=True)
             else:
-                st.info(f"💤 Tidak ada data pada {indo_str}.")
-
-        # --- KOLOM 3: JAM DIGITAL (KANAN) ---
-        with col_clock:
-            st.write(""); st.write("") 
-            html_clock = """
-<div class="clock-card" style="margin-top: 10px; padding: 15px;">
-<p style="color: #888; font-size: 12px; margin-bottom: 5px;"> DURASI REFUELING</p>
-<div class="digital-font" style="font-size: 30px;">
-08:00s
-</div>
-<p style="font-size: 14px; color: #00e5ff;">MENIT / UNIT</p>
-</div>
-"""
-            st.markdown(html_clock, unsafe_allow_html=True)
-            st.markdown("""
-            <div style="text-align: center; color: #aaa; font-size: 11px; margin-top: 10px;">
-            <i>*Durasi refueling diambil dari hasil observasi ketika unit masuk bays s/d keluar bays.</i>
-            </div>
-            """, unsafe_allow_html=True)
+                st.info(f"💤 Tidak ada kedatangan unit pada {indo_str}.")
+
+        # --- BARIS 2C: HEATMAP TRAFFIC JAM x TANGGAL ---
+        # Semua unit (bay dipakai bersama), ikut rentang & shift; rentang panjang digabung per
+        # beberapa hari supaya figure maksimal HEATMAP_MAKS_KOLOM kolom berapa pun lama datanya
+        st.write("---")
+        with timed('heatmap'):
+            tgl_matrix, count_matrix = traffic_matrix(data_version(df), hourly_rollup)
+            tgl_heat, count_heat, slot_heat = slice_matrix(tgl_matrix, count_matrix, rentang_mulai, rentang_akhir,
+                                                           None if selected_shift == "ALL SHIFT" else selected_shift)
+            tgl_heat, count_heat, hari_per_kolom = bucket_days(tgl_heat, count_heat)
+        if len(tgl_heat) and count_heat.any():
+            with timed('fig_heatmap'):
+                fig_heat = build_traffic_heatmap_figure(tgl_heat, count_heat, [hour_order()[i] for i in slot_heat], hari_per_kolom)
+                st.plotly_chart(fig_heat, use_container_width=True)
+        else:
+            st.info("💤 Tidak ada data traffic pada rentang ini.")
+
+        # --- BARIS 3: OUTLIER STATISTIK PER UNIT ---
+        st.write("---")
+        st.markdown(f'<p style="font-size: 18px; color: #ffa500; font-weight: bold; text-align: center; margin-bottom: 10px;">🧪 OUTLIER PENGISIAN (ROBUST Z-SCORE &gt; {OUTLIER_Z_LIMIT})</p>', unsafe_allow_html=True)
+        df_outlier = df_filtered[df_filtered['is_outlier']]
+        if not df_outlier.empty:
+            df_outlier_show = df_outlier.sort_values('outlier_score', ascending=False)
+            df_outlier_show = pd.DataFrame({
+                'Waktu': df_outlier_show['timestamp'].dt.strftime('%d %b, %H:%M'),
+                'No Unit': df_outlier_show['unit'],
+                'Isi (L)': df_outlier_show['quantity'],
+                'Skor': df_outlier_show['outlier_score'].round(1),
+                'Arah': df_outlier_show['outlier_arah'],
+            })
+            with timed('tbl_outlier'):
+                st.dataframe(df_outlier_show, use_container_width=True, hide_index=True, height=300)
+            st.caption("*TINGGI = isi jauh diatas kebiasaan unit (indikasi kebocoran/pencurian), RENDAH = jauh dibawah (indikasi salah scan).")
+        else:
+            st.success("✅ Tidak ada pengisian yang menyimpang dari pola unitnya.")
+
+        # --- BARIS 4: PRAKIRAAN KEBUTUHAN SOLAR PER SHIFT ---
+        st.write("---")
+        st.markdown(f'<p style="font-size: 18px; color: #00e5ff; font-weight: bold; text-align: center; margin-bottom: 10px;">🔮 PRAKIRAAN KEBUTUHAN SOLAR {PRAKIRAAN_HORIZON_JAM} JAM KE DEPAN</p>', unsafe_allow_html=True)
+        if not df_forecast.empty:
+            with timed('tbl_forecast'):
+                df_fc_shift = forecast_per_shift(df_forecast)
+                st.dataframe(pd.DataFrame({
+                    'Tanggal Produksi': df_fc_shift['tanggal_produksi'].dt.strftime('%d %b %Y'),
+                    'Shift': df_fc_shift['shift_produksi'],
+                    'Estimasi Unit Masuk': df_fc_shift['unit'].round(0),
+                    'Estimasi Solar (L)': df_fc_shift['liter'].round(0),
+                }), use_container_width=True, hide_index=True)
+            st.caption(f"*Profil hari x jam dari {PRAKIRAAN_MINGGU_ACUAN} minggu terakhir dikali tren mingguan. Dipakai untuk jadwal fuel truck.")
+        else:
+            st.info("💤 Data belum cukup untuk prakiraan.")
 
     # ==========================================
     # LANGKAH 7: TABEL DATA
     # ==========================================
     with tab2:
         st.subheader("📋 Riwayat Lengkap Logsheet (Terfilter)")
-        df_full = df_filtered.sort_values(by='timestamp', ascending=False).copy()
-        df_full['timestamp'] = df_full['timestamp'].dt.strftime('%d/%m/%Y %H:%M:%S')
-        st.dataframe(df_full, use_container_width=True, height=600, hide_index=True)
+        with timed('tbl_logsheet'):
+            # Tanpa salinan + strftime per baris: urutan dibalik sekali, format waktu dikerjakan di browser
+            df_full = df_filtered.iloc[::-1]
+            st.dataframe(df_full, use_container_width=True, height=600, hide_index=True,
+                         column_config={'timestamp': st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm:ss")})
+
+        # Export data terfilter & tabel turunan: file baru dibuat saat tombol diklik (callable, thread
+        # terpisah), ditulis bertahap per potongan ke file sementara -> rerun biasa tidak membuat file apa pun.
+        # Streamlit tetap memegang hasilnya utuh sebagai bytes -> logsheet besar diarahkan ke endpoint export
+        st.write("---")
+        st.subheader("💾 Export Data")
+        ex1, ex2, ex3 = st.columns([2, 2, 1])
+        tabel_export = ex1.selectbox("Tabel", list(EXPORT_TABEL), format_func=EXPORT_TABEL.get, key='export_tabel')
+        format_export = ex2.radio("Format", export_formats(), horizontal=True, key='export_format',
+                                  format_func=str.upper)
+
+        def isi_export(tabel=tabel_export, fmt=format_export, data=df_filtered):
+            with timed('export'), export_file(export_table(tabel, data), fmt) as f:
+                return f.read()
+
+        terlalu_besar = tabel_export == 'logsheet' and len(df_filtered) > EXPORT_MAKS_BARIS_DASHBOARD
+        ex3.download_button("⬇️ Download", data=isi_export, on_click='ignore', use_container_width=True,
+                            file_name=export_filename(tabel_export, format_export, rentang_mulai, rentang_akhir),
+                            mime=EXPORT_FORMAT[format_export][0], disabled=terlalu_besar)
+        if terlalu_besar:
+            st.warning(f"⚠️ {len(df_filtered):,} baris melebihi batas download dashboard ({EXPORT_MAKS_BARIS_DASHBOARD:,} baris): "
+                       "file dibuat utuh di memori server. Persempit filter, atau pakai link export langsung (streaming).")
+        else:
+            st.caption("File dibuat saat tombol diklik dan disimpan utuh di memori server sampai selesai diunduh.")
+        if 'xlsx' not in export_formats():
+            st.caption("Format XLSX butuh paket openpyxl di server.")
+        if os.environ.get('REFUEL_EXPORT_PORT'):
+            server = export_server(int(os.environ['REFUEL_EXPORT_PORT']))
+            server.sumber = (df, unit_index, df_urut)
+            q = {'tabel': tabel_export, 'format': format_export}
+            if selected_unit != "ALL UNITS":
+                q['unit'] = selected_unit
+            if selected_shift != "ALL SHIFT":
+                q['shift'] = selected_shift
+            if rentang_mulai is not None:
+                q['mulai'], q['akhir'] = rentang_mulai.isoformat(), rentang_akhir.isoformat()
+            if EXPORT_TOKEN:
+                # Penonton dashboard memang sudah melihat data yang sama -> token boleh ikut di link
+                q['token'] = EXPORT_TOKEN
+            st.caption(f"Link export langsung (streaming, untuk file besar): "
+                       f"`:{os.environ['REFUEL_EXPORT_PORT']}/export?{urlencode(q)}`")
+
+    # ==========================================
+    # LANGKAH 8: LAPORAN DUPLIKAT SCAN
+    # ==========================================
+    with tab3:
+        st.subheader("🧹 Scan QR Ganda yang Dibuang")
+        df_dup_filtered = df_duplikat if selected_unit == "ALL UNITS" else df_duplikat[df_duplikat['unit'] == selected_unit]
+        if rentang_mulai is not None:
+            df_dup_filtered = df_dup_filtered[(df_dup_filtered['timestamp'] >= rentang_mulai) & (df_dup_filtered['timestamp'] < rentang_akhir)]
+        st.caption(f"Aturan: unit sama, selisih waktu ≤ {DEDUP_WINDOW_MENIT} menit dan selisih isi ≤ {DEDUP_TOLERANSI_L:.0f} L dari scan sebelumnya.")
+
+        d1, d2 = st.columns(2)
+        d1.metric("Scan Duplikat Dibuang", f"{len(df_dup_filtered)} Kali")
+        d2.metric("Volume Tidak Dihitung Ganda", f"{df_dup_filtered['quantity'].sum():,.0f} L")
+
+        if not df_dup_filtered.empty:
+            df_dup_show = pd.DataFrame({
+                'Waktu Scan Ganda': df_dup_filtered['timestamp'].dt.strftime('%d/%m/%Y %H:%M:%S'),
+                'Scan Asli': df_dup_filtered['duplikat_dari'].dt.strftime('%d/%m/%Y %H:%M:%S'),
+                'Selisih (Menit)': df_dup_filtered['selisih_menit'],
+                'No Unit': df_dup_filtered['unit'],
+                'Isi (L)': df_dup_filtered['quantity'],
+            }).iloc[::-1]
+            with timed('tbl_duplikat'):
+                st.dataframe(df_dup_show, use_container_width=True, height=400, hide_index=True)
+        else:
+            st.success("✅ Tidak ada scan ganda yang terdeteksi.")
+
+        # --- KARANTINA: BARIS YANG GAGAL VALIDASI (refuel_engine.validation) ---
+        st.write("---")
+        st.subheader("🚫 Baris Dikarantina (Gagal Validasi)")
+        st.caption("Dicek sekali per versi data sebelum dedup: timestamp tak terbaca/masa depan, quantity kosong/≤0/melebihi tangki, "
+                   "kode unit/lokasi tidak dikenal, HM mundur. Baris DIBUANG tidak ikut metrik; HM DIKOSONGKAN tetap dihitung tanpa HM.")
+        df_kar_filtered = df_karantina if selected_unit == "ALL UNITS" else df_karantina[df_karantina['unit'] == selected_unit]
+        if rentang_mulai is not None:
+            # Baris tanpa timestamp tidak bisa ditaruh di rentang -> selalu ditampilkan
+            ts_kar = df_kar_filtered['timestamp']
+            df_kar_filtered = df_kar_filtered[ts_kar.isna() | ((ts_kar >= rentang_mulai) & (ts_kar < rentang_akhir))]
+
+        k1, k2 = st.columns(2)
+        k1.metric("Baris Dibuang", f"{(df_kar_filtered['tindakan'] == 'DIBUANG').sum()} Baris")
+        k2.metric("HM Dikosongkan", f"{(df_kar_filtered['tindakan'] == 'HM DIKOSONGKAN').sum()} Baris")
+
+        if not df_kar_filtered.empty:
+            with timed('tbl_karantina'):
+                st.dataframe(quarantine_summary(df_kar_filtered).rename(columns={'alasan': 'Alasan', 'baris': 'Jumlah Baris'}),
+                             use_container_width=True, hide_index=True)
+                st.dataframe(pd.DataFrame({
+                    'Waktu': df_kar_filtered['timestamp'],
+                    'No Unit': df_kar_filtered['unit'],
+                    'Isi (L)': df_kar_filtered['quantity'],
+                    'HM': df_kar_filtered['hm'] if 'hm' in df_kar_filtered.columns else None,
+                    'Alasan': df_kar_filtered['alasan'],
+                    'Tindakan': df_kar_filtered['tindakan'],
+                }).iloc[::-1], use_container_width=True, height=400, hide_index=True,
+                    column_config={'Waktu': st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm:ss")})
+        else:
+            st.success("✅ Semua baris lolos validasi.")
+
+        # --- KESEHATAN DATA HM PER UNIT (hm_status dihitung sekali per versi data saat validasi) ---
+        st.write("---")
+        st.subheader("🩺 Kesehatan Data HM per Unit")
+        st.caption("Skor = % pembacaan HM yang terisi & wajar. MUNDUR = HM turun dari pembacaan sebelumnya, "
+                   "LOMPAT = naik lebih cepat dari jam dinding dan jauh di atas langkah HM biasa unit itu (indikasi salah ketik).")
+        with timed('hm_health'):
+            df_hm = hm_health_cached((data_version(df), str(rentang_mulai), str(rentang_akhir), selected_unit),
+                                     df_range if selected_unit == "ALL UNITS" else df_unit)
+        if not df_hm.empty:
+            h1, h2, h3 = st.columns(3)
+            h1.metric("Skor Kesehatan HM", f"{100 * (1 - df_hm[['hm_kosong', 'hm_mundur', 'hm_lompat']].sum().sum() / df_hm['pembacaan'].sum()):.1f} %")
+            h2.metric("HM Mundur / Lompat", f"{df_hm['hm_mundur'].sum()} / {df_hm['hm_lompat'].sum()} Baris")
+            h3.metric("Unit Skor < 90", f"{(df_hm['skor'] < 90).sum()} Unit")
+            st.dataframe(pd.DataFrame({
+                'No Unit': df_hm.index,
+                'Skor': df_hm['skor'],
+                'Pembacaan': df_hm['pembacaan'],
+                'HM Kosong': df_hm['hm_kosong'],
+                'HM Mundur': df_hm['hm_mundur'],
+                'HM Lompat': df_hm['hm_lompat'],
+            }), use_container_width=True, height=400, hide_index=True,
+                column_config={'Skor': st.column_config.ProgressColumn(format="%.1f", min_value=0, max_value=100)})
+        else:
+            st.info("💤 Tidak ada data HM pada rentang ini.")
+
+    # ==========================================
+    # LANGKAH 9: RINGKASAN PER SHIFT PRODUKSI
+    # ==========================================
+    with tab4:
+        st.subheader("🕒 Ringkasan per Shift Produksi")
+        jadwal = ", ".join(f"{nama} mulai {int(mulai):02d}:{int(mulai % 1 * 60):02d}" for nama, mulai in SHIFT_CALENDAR)
+        st.caption(f"Kalender shift: {jadwal}. Pengisian lewat tengah malam tetap dihitung ke tanggal produksi shift tersebut.")
+
+        with timed('tbl_shift'):
+            if selected_unit == "ALL UNITS" and selected_shift == "ALL SHIFT" and rentang_mulai is None:
+                df_shift_sum = shift_summary(data_version(df), df)
+            else:
+                # Subset kecil -> langsung dihitung, versi dibedakan per filter
+                df_shift_sum = shift_summary((selected_unit, selected_shift, str(rentang_mulai)) + data_version(df_filtered), df_filtered)
+
+            st.dataframe(pd.DataFrame({
+                'Tanggal Produksi': df_shift_sum['tanggal_produksi'].dt.strftime('%d %b %Y'),
+                'Shift': df_shift_sum['shift_produksi'],
+                'Total Pengisian': df_shift_sum['pengisian'],
+                'Total Solar (L)': df_shift_sum['liter'].round(0),
+                'Unit Aktif': df_shift_sum['unit_aktif'],
+                'Early Refill': df_shift_sum['early_refill'],
+                'Outlier': df_shift_sum['outlier'],
+            }), use_container_width=True, height=500, hide_index=True)
+
+    # ==========================================
+    # LANGKAH 9B: BANDINGKAN BEBERAPA UNIT
+    # ==========================================
+    with tab5:
+        st.subheader("⚖️ Perbandingan Antar Unit")
+        st.caption(f"Dihitung dari rollup harian (semua shift, per hari produksi utuh dalam rentang). Peringkat 1 = liter/jam tertinggi di armada. Maksimal {MAKS_UNIT_BANDING} unit.")
+
+        with timed('compare'):
+            df_unit_sum = unit_summary((data_version(df), str(rentang_mulai), str(rentang_akhir)), daily_range)
+            # Default: 5 unit paling boros (seluruh periode, supaya pilihan tidak berubah saat rentang diganti)
+            default_banding = unit_summary(data_version(df), daily_rollup)['l_hr'].nlargest(5).index.tolist()
+            units_banding = st.multiselect("Pilih Unit:", options=unit_list, default=default_banding,
+                                           max_selections=MAKS_UNIT_BANDING, key='unit_banding')
+
+        if units_banding:
+            with timed('compare'):
+                # Unit tanpa pengisian di rentang tidak ikut ditampilkan
+                df_cmp = df_unit_sum.reindex(units_banding).dropna(subset=['pengisian'])
+                median_l_hr = df_unit_sum['l_hr'][df_unit_sum['l_hr'] > 0].median()
+
+            # Kartu metrik per unit (5 per baris), delta = selisih terhadap median armada
+            for awal in range(0, len(df_cmp), 5):
+                kolom_kartu = st.columns(5)
+                for kolom, (unit, baris) in zip(kolom_kartu, df_cmp.iloc[awal:awal + 5].iterrows()):
+                    kolom.metric(
+                        f"{unit} · #{baris['rank_l_hr'] if pd.notna(baris['rank_l_hr']) else '-'}",
+                        f"{baris['l_hr']:.1f} L/Jam",
+                        delta=f"{(baris['l_hr_vs_median'] - 1) * 100:+.0f}% vs median",
+                        delta_color="inverse",
+                    )
+                    kolom.caption(f"{baris['pengisian']:.0f}x isi · {baris['liter']:,.0f} L · {baris['refills_day']:.1f} isi/hari · {baris['early_refill']:.0f} early refill")
+
+            cmp_c1, cmp_c2 = st.columns([1.5, 1])
+            with cmp_c1:
+                with timed('fig_compare'):
+                    fig_cmp = build_compare_trend_figure(unit_daily_series(daily_range, units_banding))
+                    st.plotly_chart(fig_cmp, use_container_width=True)
+            with cmp_c2:
+                with timed('fig_compare'):
+                    fig_rank = build_compare_rank_figure(df_cmp.sort_values('l_hr').reset_index(), median_l_hr)
+                    st.plotly_chart(fig_rank, use_container_width=True)
+
+            st.dataframe(pd.DataFrame({
+                'No Unit': df_cmp.index,
+                'Peringkat Armada': df_cmp['rank_l_hr'],
+                'Liter/Jam': df_cmp['l_hr'].round(1),
+                'vs Median (%)': ((df_cmp['l_hr_vs_median'] - 1) * 100).round(0),
+                'Isi/Hari': df_cmp['refills_day'].round(1),
+                'Total Pengisian': df_cmp['pengisian'],
+                'Total Solar (L)': df_cmp['liter'].round(0),
+                'Early Refill': df_cmp['early_refill'],
+                'Outlier': df_cmp['outlier'],
+                'Hari Aktif': df_cmp['hari'],
+            }), use_container_width=True, hide_index=True)
+        else:
+            st.info("Pilih minimal satu unit untuk dibandingkan.")
 
 # --- BAGIAN INI UNTUK MENANGANI JIKA DATA KOSONG ---
 else:
-    st.warning("Menunggu data... Pastikan Google Sheet Anda dapat diakses publik (CSV Mode).")
\ No newline at end of file
+    st.warning("Menunggu data... Pastikan Google Sheet Anda dapat diakses publik (CSV Mode).")
+
+# ==========================================
+# LANGKAH 10: PANEL PROFILING (ADMIN, TERSEMBUNYI)
+# ==========================================
+# Hanya muncul kalau URL diberi ?admin=1. Statistik terkumpul dari semua sesi di proses ini.
+if st.query_params.get("admin") == "1":
+    st.write("---")
+    st.subheader("🛠️ Profiling Tahap Dashboard")
+    stats = REGISTRY.snapshot()
+    if stats:
+        df_prof = pd.DataFrame(stats).drop(columns='buckets')
+        st.dataframe(df_prof.round(2).rename(columns={
+            'stage': 'Tahap', 'count': 'Jumlah', 'total_ms': 'Total (ms)', 'mean_ms': 'Rata-Rata (ms)',
+            'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)', 'max_ms': 'Maks (ms)',
+        }), use_container_width=True, hide_index=True)
+        st.caption("p50/p95 diperkirakan dari bucket histogram. Tahap yang di-cache hanya mahal saat cache kosong (fetch/parse/clean).")
+
+        e1, e2, e3 = st.columns(3)
+        e1.download_button("⬇️ Prometheus (metrics.txt)", REGISTRY.prometheus_text(), file_name="metrics.txt", mime="text/plain", use_container_width=True)
+        e2.download_button("⬇️ Log Terstruktur (JSONL)", REGISTRY.events_jsonl(), file_name="profiling.jsonl", mime="application/json", use_container_width=True)
+        if e3.button("♻️ Reset Statistik", use_container_width=True):
+            REGISTRY.reset()
+            st.rerun()
+    else:
+        st.info("Belum ada data profiling.")
+
+    # Statistik cache artefak (semua sesi): eviksi tinggi / hit rate rendah = budget terlalu kecil untuk pola pakai
+    st.subheader("🧠 Cache Artefak & Budget Memori")
+    terpakai_mb, cadangan_mb = CACHE.used_bytes / 1e6, CACHE.reserved_bytes / 1e6
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Cache Terpakai", f"{terpakai_mb:,.1f} MB")
+    m2.metric("Frame Data (di luar cache)", f"{cadangan_mb:,.1f} MB")
+    m3.metric("Budget", f"{CACHE_BUDGET_MB:,.0f} MB", f"{CACHE_BUDGET_MB - terpakai_mb - cadangan_mb:,.0f} MB sisa",
+              delta_color="off")
+    df_cache = pd.DataFrame(CACHE.snapshot())
+    if not df_cache.empty:
+        st.dataframe(df_cache.rename(columns={
+            'namespace': 'Cache', 'entries': 'Entri', 'max_entries': 'Maks Entri', 'mb': 'Ukuran (MB)', 'hits': 'Hit',
+            'misses': 'Miss', 'hit_rate': 'Hit Rate', 'evictions': 'Eviksi', 'expired': 'Kedaluwarsa', 'compute_s': 'Waktu Hitung (s)',
+        }).round(3), use_container_width=True, hide_index=True,
+            column_config={'Hit Rate': st.column_config.ProgressColumn(format="%.2f", min_value=0, max_value=1)})
+    k1, k2 = st.columns(2)
+    if k1.button("🧹 Kosongkan Cache Artefak", use_container_width=True):
+        CACHE.clear()
+        st.rerun()
+    if k2.button("♻️ Reset Statistik Cache", use_container_width=True):
+        CACHE.reset_stats()
+        st.rerun()
\ No newline at end of file
@@ -0,0 +1,44 @@
+# ==========================================
+# REFUEL ENGINE: INTI KOMPUTASI DASHBOARD (TANPA STREAMLIT)
+# ==========================================
+# Ingesti, metrik, anomali, shift, traffic & prakiraan sebagai fungsi pandas/numpy biasa.
+# dashboard.py hanya me-render; CLI, batch job & benchmark memakai engine yang sama.
+from refuel_engine.anomalies import (
+    MIN_REFILL_TARGET, OUTLIER_Z_LIMIT, detect_outliers, early_refill_mask, early_refill_rows,
+)
+from refuel_engine.cache import CACHE, CACHE_BUDGET_MB, ArtifactCache, estimate_size
+from refuel_engine.export import (
+    EXPORT_CHUNK_BARIS, EXPORT_FORMAT, EXPORT_MAKS_BARIS_DASHBOARD, EXPORT_TABEL, EXPORT_TOKEN, XLSX_TERSEDIA,
+    export_file, export_filename, export_formats, export_stream, export_table, start_export_server,
+)
+from refuel_engine.forecast import (
+    PRAKIRAAN_HORIZON_JAM, PRAKIRAAN_MINGGU_ACUAN, DemandModel, fit_demand_model, forecast_demand,
+    forecast_per_shift,
+)
+from refuel_engine.ingestion import (
+    CSV_URL, DEDUP_TOLERANSI_L, DEDUP_WINDOW_MENIT, clean_refuel_frame, coerce_types, deduplicate_scans,
+    load_refuel_log, normalize_columns, parse_timestamps, read_source,
+)
+from refuel_engine.leaderboard import LEADERBOARD_METRIK, leaderboard, metric_values, previous_window, select_top
+from refuel_engine.metrics import FleetSummary, data_version, get_performance_df, summarize
+from refuel_engine.pipeline import EKOR_PER_UNIT, enrich, prepare_increment, prepare_refuel_frame
+from refuel_engine.rollup import (
+    ROLLUP_DIR, build_rollups, daily_totals, hourly_from_rollup, load_rollups, performance_from_rollup,
+    stale_days, unit_daily_series, unit_summary, update_rollups,
+)
+from refuel_engine.slicing import (
+    PRESET_RENTANG, build_hour_index, build_unit_index, is_time_sorted, is_whole_days, preset_range, production_day_start,
+    rollup_range, select_rows, time_bounds,
+)
+from refuel_engine.shifts import (
+    SHIFT_CALENDAR, SITE_TZ, assign_shift_calendar, hour_order, production_date, shift_summary, site_now,
+)
+from refuel_engine.validation import (
+    HM_KOSONG, HM_LOMPAT, HM_MUNDUR, HM_OK, HM_STATUS, KAPASITAS_TANGKI_DEFAULT_L, KAPASITAS_TANGKI_L, LOKASI_DIKENAL,
+    UNIT_DIKENAL, hm_health, hm_rollback_mask, hm_status, quarantine_summary, tank_capacity, validate_refuel_frame,
+    validation_rules,
+)
+from refuel_engine.traffic import (
+    DURASI_SERVIS_MENIT, DURASI_SERVIS_OBSERVASI, HEATMAP_MAKS_KOLOM, JUMLAH_BAY, bucket_days, hourly_traffic,
+    simulate_bay_queue, slice_matrix, traffic_matrix,
+)
@@ -0,0 +1,70 @@
+# ==========================================
+# ANOMALI: EARLY REFILL & OUTLIER STATISTIK
+# ==========================================
+from __future__ import annotations
+
+import pandas as pd
+
+# Batas Minimum Pengisian yang Efektif (Setengah Tangki / 160L)
+MIN_REFILL_TARGET = 160.0
+
+def early_refill_mask(data: pd.DataFrame) -> pd.Series:
+    # Quantity "Pelit" (Anomali) -> unit masuk pitstop saat tangki masih > setengah
+    # Frame siap tampil sudah membawa kolom is_anomali (dihitung sekali di enrich) -> pakai ulang
+    if 'is_anomali' in data.columns:
+        return data['is_anomali']
+    return data['quantity'] < MIN_REFILL_TARGET
+
+def early_refill_rows(data: pd.DataFrame) -> pd.DataFrame:
+    return data[early_refill_mask(data)]
+
+# ------------------------------------------
+# OUTLIER STATISTIK (ROBUST Z-SCORE)
+# ------------------------------------------
+# Acuan tiap unit = median & MAD dari N pengisian sebelumnya (rolling per unit).
+# Semua dihitung pakai groupby + rolling (vectorized), tanpa loop per unit.
+OUTLIER_WINDOW = 20        # jumlah pengisian terakhir per unit sebagai acuan
+OUTLIER_MIN_PERIODS = 5    # minimal histori sebelum unit boleh dinilai
+OUTLIER_Z_LIMIT = 3.5      # ambang robust z-score (Iglewicz & Hoaglin)
+OUTLIER_MAD_FLOOR = {'quantity': 5.0, 'l_per_hm': 0.5}  # cegah MAD = 0 (isi selalu full tank)
+
+def _robust_z(values: pd.Series, units: pd.Series, col: str) -> pd.Series:
+    # Median & MAD hanya dari pengisian SEBELUMNYA (shift 1), supaya outlier tidak ikut jadi acuan
+    prev = values.groupby(units, sort=False).shift(1)
+    roll = prev.groupby(units, sort=False).rolling(OUTLIER_WINDOW, min_periods=OUTLIER_MIN_PERIODS)
+    median = roll.median().reset_index(level=0, drop=True)
+
+    dev = (values - median).abs()
+    prev_dev = dev.groupby(units, sort=False).shift(1)
+    mad = (prev_dev.groupby(units, sort=False)
+           .rolling(OUTLIER_WINDOW, min_periods=OUTLIER_MIN_PERIODS - 1).median()
+           .reset_index(level=0, drop=True))
+    mad = mad.clip(lower=OUTLIER_MAD_FLOOR[col])
+
+    return 0.6745 * (values - median) / mad
+
+def detect_outliers(data: pd.DataFrame) -> pd.DataFrame:
+    hasil = pd.DataFrame(index=data.index)
+    if data.empty:
+        return hasil.assign(z_qty=pd.Series(dtype=float), z_hm=pd.Series(dtype=float),
+                            outlier_score=pd.Series(dtype=float), outlier_arah=pd.Series(dtype=object),
+                            is_outlier=pd.Series(dtype=bool))
+
+    units = data['unit']
+    hasil['z_qty'] = _robust_z(data['quantity'], units, 'quantity')
+
+    # Konsumsi berbasis HM: liter diisi / selisih HM sejak pengisian sebelumnya
+    if 'hm' in data.columns:
+        delta_hm = data['hm'].groupby(units, sort=False).diff()
+        l_per_hm = (data['quantity'] / delta_hm).where(delta_hm > 0)
+        hasil['z_hm'] = _robust_z(l_per_hm, units, 'l_per_hm')
+    else:
+        hasil['z_hm'] = float('nan')
+
+    # Skor akhir = penyimpangan terbesar dari kedua acuan (tanda tetap dipertahankan)
+    pakai_hm = hasil['z_hm'].abs() > hasil['z_qty'].abs().fillna(0)
+    skor = hasil['z_qty'].where(~pakai_hm, hasil['z_hm'])
+    hasil['outlier_score'] = skor.abs()
+    hasil['outlier_arah'] = skor.gt(0).map({True: 'TINGGI', False: 'RENDAH'}).where(skor.notna())
+    hasil['is_outlier'] = hasil['outlier_score'] > OUTLIER_Z_LIMIT
+    return hasil
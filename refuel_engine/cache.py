@@ -0,0 +1,263 @@
+# ==========================================
+# CACHE ARTEFAK DASHBOARD: SATU BUDGET MEMORI, LRU SADAR UKURAN
+# ==========================================
+# Dulu tiap fungsi punya @st.cache_data / @st.cache_resource sendiri dengan max_entries masing-masing
+# (sebagian tanpa batas sama sekali) -> jumlah total tidak ada yang mengawasi. Di edge box 2 GB,
+# banyak viewer x banyak kombinasi filter bisa membuat proses di-OOM-kill.
+# Sekarang artefak turunan (indeks, rollup, model, ringkasan, simulasi) masuk ke satu ArtifactCache:
+#   - tiap entri diukur ukurannya (estimate_size) saat disimpan
+#   - total entri + memori di luar cache (reserve: frame utama, per versi yang masih hidup) dijaga
+#     <= budget (env REFUEL_CACHE_MB)
+#   - kalau lewat budget, entri yang paling lama tidak dipakai (LRU) dibuang dulu
+#   - per namespace tetap bisa diberi max_entries & ttl, dan punya statistik hit/miss/eviksi
+# Hasil cache = objek bersama (seperti cache_resource), bukan salinan -> pemakai wajib read-only.
+# Argumen berawalan _ tidak ikut kunci (sama seperti konvensi Streamlit).
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+
+import numpy as np
+import pandas as pd
+
+CACHE_BUDGET_MB = float(os.environ.get('REFUEL_CACHE_MB', 768))
+
+def estimate_size(obj, _dilihat: set | None = None) -> int:
+    # Perkiraan byte yang ditahan obj (frame/array dihitung isinya, kontainer ditelusuri)
+    dilihat = set() if _dilihat is None else _dilihat
+    if id(obj) in dilihat:
+        return 0
+    dilihat.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_size(x, dilihat) for x in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k, dilihat) + estimate_size(v, dilihat) for k, v in obj.items())
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return sys.getsizeof(obj) + sum(estimate_size(getattr(obj, f.name), dilihat) for f in fields(obj))
+    return sys.getsizeof(obj)
+
+def _key_part(nilai):
+    # Argumen kunci harus hashable; data besar (Series/array) diringkas jadi sidik jari isi
+    if isinstance(nilai, (pd.Series, pd.Index, pd.DataFrame)):
+        return (type(nilai).__name__, len(nilai),
+                hashlib.blake2b(pd.util.hash_pandas_object(nilai, index=False).to_numpy().tobytes(), digest_size=16).hexdigest())
+    if isinstance(nilai, np.ndarray):
+        return ('ndarray', nilai.shape, hashlib.blake2b(np.ascontiguousarray(nilai).tobytes(), digest_size=16).hexdigest())
+    if isinstance(nilai, (list, tuple)):
+        return tuple(_key_part(x) for x in nilai)
+    if isinstance(nilai, dict):
+        return tuple(sorted((k, _key_part(v)) for k, v in nilai.items()))
+    return nilai
+
+@dataclass
+class NamespaceStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+    entries: int = 0
+    bytes: int = 0
+    compute_s: float = 0.0
+
+@dataclass
+class _Entry:
+    value: object
+    size: int
+    created: float
+    namespace: str
+
+class ArtifactCache:
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()      # (namespace, key) -> _Entry, urut dari paling lama tidak dipakai
+        self._stats = {}                   # namespace -> NamespaceStats
+        self._limits = {}                  # namespace -> (max_entries, ttl detik)
+        self._reserved = {}                # nama / (nama, versi) -> byte di luar cache
+        self._versi = {}                   # nama -> versi yang direservasi, urut lama -> baru
+
+    # ------------------------------------------
+    # API DASAR
+    # ------------------------------------------
+    def get(self, namespace: str, key):
+        # Return (ketemu, nilai); entri yang dipakai dipindah ke ujung "baru dipakai"
+        with self._lock:
+            st = self._stats.setdefault(namespace, NamespaceStats())
+            entry = self._entries.get((namespace, key))
+            ttl = self._limits.get(namespace, (None, None))[1]
+            if entry is not None and ttl is not None and time.monotonic() - entry.created > ttl:
+                self._drop((namespace, key))
+                st.expired += 1
+                entry = None
+            if entry is None:
+                st.misses += 1
+                return False, None
+            st.hits += 1
+            self._entries.move_to_end((namespace, key))
+            return True, entry.value
+
+    def put(self, namespace: str, key, value, size: int | None = None) -> None:
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            st = self._stats.setdefault(namespace, NamespaceStats())
+            if (namespace, key) in self._entries:
+                self._drop((namespace, key))
+            if size + self.reserved_bytes > self.budget_bytes:
+                # Lebih besar dari seluruh budget -> tidak disimpan sama sekali (dihitung ulang tiap kali)
+                st.evictions += 1
+                return
+            self._entries[(namespace, key)] = _Entry(value, size, time.monotonic(), namespace)
+            st.entries += 1
+            st.bytes += size
+
+            maks = self._limits.get(namespace, (None, None))[0]
+            if maks is not None and st.entries > maks:
+                self._evict(lambda e: e.namespace == namespace, st.entries - maks)
+            self._evict_to_budget()
+
+    def reserve(self, nama: str, nbytes: int) -> None:
+        # Memori besar di luar cache (mis. frame utama) ikut dihitung ke budget, tidak bisa dibuang
+        with self._lock:
+            self._reserved[nama] = int(nbytes)
+            self._evict_to_budget()
+
+    def reserve_version(self, nama: str, versi, obj, simpan: int = 1) -> None:
+        # Frame yang hidup dalam beberapa versi sekaligus (cache_resource max_entries=2, versi live lama
+        # yang masih dipegang sesi lain) -> satu reservasi per versi, hanya `simpan` versi terbaru dihitung.
+        # Ukuran diukur sekali per versi (estimate_size frame besar tidak murah)
+        with self._lock:
+            if (nama, versi) in self._reserved:
+                return
+        nbytes = estimate_size(obj)
+        with self._lock:
+            urutan = self._versi.setdefault(nama, [])
+            if versi not in urutan:
+                urutan.append(versi)
+            self._reserved[(nama, versi)] = nbytes
+            for lama in urutan[:-simpan]:
+                self._reserved.pop((nama, lama), None)
+            del urutan[:-simpan]
+            self._evict_to_budget()
+
+    def configure(self, namespace: str, max_entries: int | None = None, ttl: float | None = None) -> None:
+        with self._lock:
+            self._limits[namespace] = (max_entries, ttl)
+            self._stats.setdefault(namespace, NamespaceStats())
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._lock:
+            for k in [k for k in self._entries if namespace is None or k[0] == namespace]:
+                self._drop(k)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for st in self._stats.values():
+                st.hits = st.misses = st.evictions = st.expired = 0
+                st.compute_s = 0.0
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(st.bytes for st in self._stats.values())
+
+    @property
+    def reserved_bytes(self) -> int:
+        return sum(self._reserved.values())
+
+    # ------------------------------------------
+    # EVIKSI
+    # ------------------------------------------
+    def _drop(self, k) -> _Entry:
+        entry = self._entries.pop(k)
+        st = self._stats[entry.namespace]
+        st.entries -= 1
+        st.bytes -= entry.size
+        return entry
+
+    def _evict(self, cocok, n: int) -> None:
+        # Buang n entri paling lama tidak dipakai yang memenuhi syarat (urutan OrderedDict = LRU)
+        for k in [k for k, e in self._entries.items() if cocok(e)][:n]:
+            self._stats[self._drop(k).namespace].evictions += 1
+
+    def _evict_to_budget(self) -> None:
+        while self._entries and self.used_bytes + self.reserved_bytes > self.budget_bytes:
+            k = next(iter(self._entries))
+            self._stats[self._drop(k).namespace].evictions += 1
+
+    # ------------------------------------------
+    # DEKORATOR & STATISTIK
+    # ------------------------------------------
+    def memoize(self, namespace: str | None = None, max_entries: int | None = None, ttl: float | None = None):
+        def dekorator(fungsi):
+            nama = namespace or fungsi.__name__
+            self.configure(nama, max_entries, ttl)
+            signature = inspect.signature(fungsi)
+
+            @functools.wraps(fungsi)
+            def wrapper(*args, **kwargs):
+                terikat = signature.bind(*args, **kwargs)
+                terikat.apply_defaults()
+                key = tuple((k, _key_part(v)) for k, v in terikat.arguments.items() if not k.startswith('_'))
+                ketemu, nilai = self.get(nama, key)
+                if ketemu:
+                    return nilai
+                # Dihitung di luar lock: sesi lain tidak tertahan; kalau dua sesi miss bersamaan, hasil terakhir menang
+                t0 = time.perf_counter()
+                nilai = fungsi(*args, **kwargs)
+                with self._lock:
+                    self._stats[nama].compute_s += time.perf_counter() - t0
+                self.put(nama, key, nilai)
+                return nilai
+
+            wrapper.clear = lambda: self.clear(nama)
+            return wrapper
+        return dekorator
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            baris = []
+            for nama, st in self._stats.items():
+                akses = st.hits + st.misses
+                baris.append({
+                    'namespace': nama,
+                    'entries': st.entries,
+                    'max_entries': self._limits.get(nama, (None, None))[0],
+                    'mb': st.bytes / 1e6,
+                    'hits': st.hits,
+                    'misses': st.misses,
+                    'hit_rate': st.hits / akses if akses else None,
+                    'evictions': st.evictions,
+                    'expired': st.expired,
+                    'compute_s': st.compute_s,
+                })
+            return sorted(baris, key=lambda r: r['mb'], reverse=True)
+
+    def prometheus_text(self, prefix: str = 'refuel_dashboard_cache') -> str:
+        baris = [f'# HELP {prefix}_bytes Ukuran artefak di cache dashboard per namespace.', f'# TYPE {prefix}_bytes gauge']
+        with self._lock:
+            for nama, st in sorted(self._stats.items()):
+                baris.append(f'{prefix}_bytes{{namespace="{nama}"}} {st.bytes}')
+            for jenis in ('hits', 'misses', 'evictions'):
+                baris.append(f'# TYPE {prefix}_{jenis}_total counter')
+                for nama, st in sorted(self._stats.items()):
+                    baris.append(f'{prefix}_{jenis}_total{{namespace="{nama}"}} {getattr(st, jenis)}')
+            baris.append(f'# TYPE {prefix}_reserved_bytes gauge')
+            baris.append(f'{prefix}_reserved_bytes {self.reserved_bytes}')
+            baris.append(f'# TYPE {prefix}_budget_bytes gauge')
+            baris.append(f'{prefix}_budget_bytes {self.budget_bytes}')
+        return '\n'.join(baris) + '\n'
+
+# Satu cache per proses (modul hanya di-import sekali walau Streamlit rerun) -> budget berlaku untuk semua sesi
+CACHE = ArtifactCache(int(CACHE_BUDGET_MB * 1e6))
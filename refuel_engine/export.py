@@ -0,0 +1,231 @@
+# ==========================================
+# EXPORT DATA TERFILTER (CSV / PARQUET / XLSX) SECARA BERTAHAP
+# ==========================================
+# Frame dipotong per EXPORT_CHUNK_BARIS baris (iloc = view, tanpa salinan) dan tiap potongan
+# langsung diubah jadi bytes lalu di-yield -> memori kerja sebesar satu potongan, bukan satu
+# file utuh, walau yang diekspor setahun data ALL UNITS.
+#   - CSV     : header sekali, lalu potongan to_csv
+#   - Parquet : satu row group per potongan (ParquetWriter ke sink yang dikuras tiap potongan)
+#   - XLSX    : openpyxl mode write_only (opsional), sheet baru tiap batas baris Excel
+#
+# Dua jalur pakai:
+#   - dashboard: tombol download (data dibuat hanya saat diklik, ditulis ke file sementara). Streamlit
+#     memegang hasil utuh di memori -> logsheet dibatasi EXPORT_MAKS_BARIS_DASHBOARD baris
+#   - endpoint HTTP (env REFUEL_EXPORT_PORT): respons chunked, tidak lewat memori Streamlit
+#       GET /export?tabel=logsheet&format=csv&unit=DT012&shift=SHIFT%201&mulai=2026-10-01T06:00&akhir=...
+#     Default hanya mendengar 127.0.0.1 (REFUEL_EXPORT_HOST); kalau dibuka ke jaringan, pasang
+#     REFUEL_EXPORT_TOKEN -> header 'Authorization: Bearer <token>' atau ?token=<token> wajib
+from __future__ import annotations
+
+import hmac
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from refuel_engine.anomalies import early_refill_rows
+from refuel_engine.metrics import get_performance_df
+from refuel_engine.slicing import select_rows
+
+logger = logging.getLogger('refuel.export')
+
+EXPORT_CHUNK_BARIS = 50_000
+EXPORT_MAKS_BARIS_DASHBOARD = 200_000  # di atas ini tombol download dimatikan, pakai endpoint
+EXPORT_HOST = os.environ.get('REFUEL_EXPORT_HOST', '127.0.0.1')
+EXPORT_TOKEN = os.environ.get('REFUEL_EXPORT_TOKEN') or None
+XLSX_MAKS_BARIS = 1_048_575            # batas baris per sheet Excel (minus header)
+XLSX_TERSEDIA = importlib.util.find_spec('openpyxl') is not None
+
+# format -> (mime, ekstensi)
+EXPORT_FORMAT = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+# tabel -> label tampilan
+EXPORT_TABEL = {
+    'logsheet': 'Logsheet Terfilter',
+    'performa': 'Performa per Unit',
+    'early_refill': 'Daftar Early Refill',
+    'traffic_jam': 'Traffic per Jam',
+}
+
+def export_formats() -> list[str]:
+    return [f for f in EXPORT_FORMAT if f != 'xlsx' or XLSX_TERSEDIA]
+
+def export_table(tabel: str, data: pd.DataFrame) -> pd.DataFrame:
+    # data = frame yang sudah terfilter (unit / shift / rentang); tabel turunan dihitung dari situ
+    if tabel == 'logsheet':
+        return data
+    if tabel == 'performa':
+        return get_performance_df(data) if not data.empty else pd.DataFrame()
+    if tabel == 'early_refill':
+        return early_refill_rows(data)
+    if tabel == 'traffic_jam':
+        if data.empty:
+            return pd.DataFrame(columns=['tanggal_produksi', 'jam', 'pengisian', 'liter'])
+        return (data.groupby([data['tanggal_produksi'], data['timestamp'].dt.hour.rename('jam')])['quantity']
+                .agg(pengisian='size', liter='sum').reset_index())
+    raise ValueError(f"tabel tidak dikenal: {tabel}")
+
+def iter_frames(data: pd.DataFrame, baris: int = EXPORT_CHUNK_BARIS) -> Iterator[pd.DataFrame]:
+    for awal in range(0, max(len(data), 1), baris):
+        yield data.iloc[awal:awal + baris]
+
+def iter_csv(data: pd.DataFrame, baris: int = EXPORT_CHUNK_BARIS) -> Iterator[bytes]:
+    for i, potongan in enumerate(iter_frames(data, baris)):
+        yield potongan.to_csv(index=False, header=i == 0).encode()
+
+class _ChunkSink:
+    # File-like minimal untuk ParquetWriter: tampung tulisan, dikuras setelah tiap row group
+    def __init__(self):
+        self._bagian = []
+        self.closed = False
+
+    def write(self, data):
+        self._bagian.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        isi, self._bagian = b''.join(self._bagian), []
+        return isi
+
+def iter_parquet(data: pd.DataFrame, baris: int = EXPORT_CHUNK_BARIS) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    schema = pa.Schema.from_pandas(data.iloc[:baris], preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for potongan in iter_frames(data, baris):
+            writer.write_table(pa.Table.from_pandas(potongan, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+def _nilai_excel(nilai):
+    # NaN/NaT -> sel kosong, Timestamp -> datetime biasa (openpyxl tidak kenal tipe pandas)
+    if nilai is None or (not isinstance(nilai, str) and pd.isna(nilai)):
+        return None
+    if isinstance(nilai, pd.Timestamp):
+        return nilai.to_pydatetime()
+    return nilai
+
+def iter_xlsx(data: pd.DataFrame, baris: int = EXPORT_CHUNK_BARIS, blok_bytes: int = 1 << 20) -> Iterator[bytes]:
+    # XLSX = arsip zip, baru utuh setelah disimpan -> baris ditulis bertahap (write_only), file
+    # ditampung di file sementara (pindah ke disk kalau besar) lalu dikirim per blok
+    if not XLSX_TERSEDIA:
+        raise RuntimeError("export XLSX butuh paket openpyxl (pip install openpyxl)")
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws, isi_sheet = None, XLSX_MAKS_BARIS
+    kolom = [str(c) for c in data.columns]
+    for potongan in iter_frames(data, baris):
+        for row in potongan.itertuples(index=False, name=None):
+            if isi_sheet >= XLSX_MAKS_BARIS:
+                ws = wb.create_sheet(f"data_{len(wb.worksheets) + 1}")
+                ws.append(kolom)
+                isi_sheet = 0
+            ws.append([_nilai_excel(v) for v in row])
+            isi_sheet += 1
+    if ws is None:
+        wb.create_sheet('data_1').append(kolom)
+
+    with tempfile.SpooledTemporaryFile(max_size=16 << 20) as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while blok := tmp.read(blok_bytes):
+            yield blok
+
+def export_stream(data: pd.DataFrame, fmt: str, baris: int = EXPORT_CHUNK_BARIS) -> Iterator[bytes]:
+    penulis = {'csv': iter_csv, 'parquet': iter_parquet, 'xlsx': iter_xlsx}
+    if fmt not in penulis:
+        raise ValueError(f"format tidak dikenal: {fmt}")
+    return penulis[fmt](data, baris)
+
+def export_file(data: pd.DataFrame, fmt: str, baris: int = EXPORT_CHUNK_BARIS):
+    # File sementara (pindah ke disk di atas 16 MB) berisi hasil export, posisi di awal
+    tmp = tempfile.SpooledTemporaryFile(max_size=16 << 20)
+    for potongan in export_stream(data, fmt, baris):
+        tmp.write(potongan)
+    tmp.seek(0)
+    return tmp
+
+def export_filename(tabel: str, fmt: str, mulai=None, akhir=None) -> str:
+    periode = "semua" if mulai is None else f"{pd.Timestamp(mulai):%Y%m%d}-{pd.Timestamp(akhir):%Y%m%d}"
+    return f"refuel_{tabel}_{periode}.{EXPORT_FORMAT[fmt][1]}"
+
+# ------------------------------------------
+# ENDPOINT HTTP (RESPONS CHUNKED)
+# ------------------------------------------
+# server.sumber = (frame siap tampil, indeks unit, status urut) diperbarui dashboard tiap rerun;
+# handler hanya membaca referensinya, jadi export jalan di thread sendiri tanpa menahan sesi lain.
+def start_export_server(port: int, host: str = EXPORT_HOST, token: str | None = EXPORT_TOKEN) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/export':
+                self.send_error(404)
+                return
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if token:
+                # Link dari browser tidak bisa kirim header -> token juga boleh lewat query
+                diberikan = q.pop('token', None) or self.headers.get('Authorization', '').removeprefix('Bearer ')
+                if not hmac.compare_digest(diberikan.encode(), token.encode()):
+                    self.send_error(401, "token salah / tidak ada")
+                    return
+            tabel, fmt = q.get('tabel', 'logsheet'), q.get('format', 'csv')
+            if tabel not in EXPORT_TABEL or fmt not in export_formats() or self.server.sumber is None:
+                self.send_error(400 if self.server.sumber is not None else 503)
+                return
+            try:
+                mulai = pd.Timestamp(q['mulai']) if q.get('mulai') else None
+                akhir = pd.Timestamp(q['akhir']) if q.get('akhir') else None
+            except ValueError:
+                self.send_error(400, "mulai/akhir harus format ISO 8601")
+                return
+
+            df, unit_index, urut = self.server.sumber
+            data = select_rows(df, mulai, akhir, q.get('unit') or None, unit_index, urut)
+            if q.get('shift'):
+                data = data[data['shift_produksi'] == q['shift']]
+
+            self.send_response(200)
+            self.send_header('Content-Type', EXPORT_FORMAT[fmt][0])
+            self.send_header('Content-Disposition', f'attachment; filename="{export_filename(tabel, fmt, mulai, akhir)}"')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for potongan in export_stream(export_table(tabel, data), fmt):
+                    if potongan:
+                        self.wfile.write(f"{len(potongan):X}\r\n".encode() + potongan + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            except Exception as e:
+                # Header sudah terkirim -> putuskan koneksi supaya klien tahu file tidak lengkap
+                logger.warning("export gagal: %s", e)
+                self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    if not token and host not in ('127.0.0.1', 'localhost', '::1'):
+        logger.warning("endpoint export di %s:%d tanpa token: seluruh log refuel terbuka untuk jaringan", host, port)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.sumber = None
+    threading.Thread(target=server.serve_forever, daemon=True, name='refuel-export').start()
+    return server
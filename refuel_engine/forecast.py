@@ -0,0 +1,70 @@
+# ==========================================
+# PRAKIRAAN KEBUTUHAN SOLAR (24-72 JAM KE DEPAN)
+# ==========================================
+# Model = profil musiman per jam-dalam-minggu (hari x jam) dari N minggu terakhir, dikali faktor tren
+# (7 hari terakhir vs 7 hari sebelumnya). Dashboard meng-cache model per versi data, jadi tidak
+# di-fit ulang setiap rerun Streamlit; fit ulang hanya kalau ada data baru masuk.
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine.shifts import assign_shift_calendar
+
+PRAKIRAAN_MINGGU_ACUAN = 4
+PRAKIRAAN_HORIZON_JAM = 72
+
+@dataclass(frozen=True)
+class DemandModel:
+    jam_akhir: int              # jam terakhir data (jam sejak epoch)
+    profil_unit: np.ndarray     # rata-rata unit masuk per jam-dalam-minggu (168,)
+    profil_liter: np.ndarray    # rata-rata liter per jam-dalam-minggu (168,)
+    tren: float
+
+def fit_demand_model(data: pd.DataFrame) -> DemandModel | None:
+    ts = data['timestamp'].dropna()
+    if ts.empty:
+        return None
+    jam_idx = (ts.to_numpy(dtype='datetime64[h]').astype('int64'))
+    qty = data.loc[ts.index, 'quantity'].to_numpy(dtype=float)
+
+    jam_akhir = int(jam_idx.max())
+    n_slot = min(PRAKIRAAN_MINGGU_ACUAN * 168, jam_akhir - int(jam_idx.min()) + 1)
+    jam_awal = jam_akhir - n_slot + 1
+    dalam_acuan = jam_idx >= jam_awal
+    pos = jam_idx[dalam_acuan] - jam_awal
+    unit_per_slot = np.bincount(pos, minlength=n_slot)
+    liter_per_slot = np.bincount(pos, weights=qty[dalam_acuan], minlength=n_slot)
+
+    # Jam-dalam-minggu tiap slot (epoch 1970-01-01 = Kamis -> geser 3 hari supaya 0 = Senin)
+    how_slot = (np.arange(jam_awal, jam_akhir + 1) + 3 * 24) % 168
+    n_how = np.bincount(how_slot, minlength=168).clip(min=1)
+    profil_unit = np.bincount(how_slot, weights=unit_per_slot, minlength=168) / n_how
+    profil_liter = np.bincount(how_slot, weights=liter_per_slot, minlength=168) / n_how
+
+    # Tren: perbandingan 7 hari terakhir vs 7 hari sebelumnya (dibatasi supaya tidak liar)
+    tren = 1.0
+    if n_slot >= 2 * 168:
+        minggu_ini, minggu_lalu = unit_per_slot[-168:].sum(), unit_per_slot[-336:-168].sum()
+        if minggu_lalu > 0:
+            tren = float(np.clip(minggu_ini / minggu_lalu, 0.5, 1.5))
+
+    return DemandModel(jam_akhir=jam_akhir, profil_unit=profil_unit, profil_liter=profil_liter, tren=tren)
+
+def forecast_demand(model: DemandModel | None, horizon_jam: int = PRAKIRAAN_HORIZON_JAM) -> pd.DataFrame:
+    if model is None:
+        return pd.DataFrame(columns=['jam', 'prakiraan_unit', 'prakiraan_liter'])
+    jam_ke_depan = np.arange(model.jam_akhir + 1, model.jam_akhir + 1 + horizon_jam)
+    how = (jam_ke_depan + 3 * 24) % 168
+    return pd.DataFrame({
+        'jam': pd.to_datetime(jam_ke_depan, unit='h'),
+        'prakiraan_unit': model.profil_unit[how] * model.tren,
+        'prakiraan_liter': model.profil_liter[how] * model.tren,
+    })
+
+def forecast_per_shift(df_forecast: pd.DataFrame) -> pd.DataFrame:
+    return (df_forecast.assign(**assign_shift_calendar(df_forecast['jam']))
+            .groupby(['tanggal_produksi', 'shift_produksi'], as_index=False)
+            .agg(unit=('prakiraan_unit', 'sum'), liter=('prakiraan_liter', 'sum')))
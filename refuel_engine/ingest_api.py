@@ -0,0 +1,181 @@
+# ==========================================
+# ENDPOINT INGESTI SCAN QR (HTTP, TANPA GOOGLE SHEET)
+# ==========================================
+# Aplikasi scan mengirim record langsung ke sini -> divalidasi -> ditulis ke log append-only (store.py).
+# Balasan 201 baru dikirim setelah record ikut fsync (group commit di AppendStore).
+#
+#   POST /refuels   body: satu objek JSON atau list objek
+#                   {"unit": "DT012", "quantity": 220, "location": "PITSTOP KM 39",
+#                    "hm": 1452.9, "shift": "1", "timestamp": "2026-10-19T14:21:53+08:00"}
+#   GET  /health
+#
+# Jalankan: python -m refuel_engine.ingest_api --port 8780 --store data/refuel_log
+# Dashboard membaca log ini dengan REFUEL_SOURCE=data/refuel_log
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from refuel_engine.profiling import timed
+from refuel_engine.shifts import SITE_TZ, site_now
+from refuel_engine.store import STORE_PATH, AppendStore
+
+logger = logging.getLogger('refuel.ingest')
+
+MAX_QUANTITY_L = 1000.0                 # lebih dari ini pasti salah ketik (tangki terbesar < 1000 L)
+MAX_BODY_BYTES = 1_000_000
+MAX_RECORD_PER_REQUEST = 1000
+TOLERANSI_MASA_DEPAN = timedelta(minutes=10)   # jam HP scanner boleh sedikit maju
+
+class _IngestServer(ThreadingHTTPServer):
+    # Backlog bawaan (5) terlalu kecil saat banyak scanner kirim bersamaan -> koneksi di-reset
+    request_queue_size = 128
+    daemon_threads = True
+
+def _as_number(nilai, nama, errors):
+    if isinstance(nilai, bool):
+        errors.append(f"{nama} harus angka")
+        return None
+    try:
+        return float(nilai)
+    except (TypeError, ValueError):
+        errors.append(f"{nama} harus angka")
+        return None
+
+def validate_record(raw: dict, now: datetime | None = None) -> tuple[dict | None, list[str]]:
+    # Return (record siap simpan, daftar error). Record None kalau ada error.
+    if not isinstance(raw, dict):
+        return None, ["record harus objek JSON"]
+    now = now or site_now().to_pydatetime()
+    errors = []
+
+    unit = str(raw.get('unit') or '').strip().upper()
+    if not unit:
+        errors.append("unit wajib diisi")
+
+    quantity = _as_number(raw.get('quantity'), 'quantity', errors)
+    if quantity is not None and not 0 < quantity <= MAX_QUANTITY_L:
+        errors.append(f"quantity harus > 0 dan <= {MAX_QUANTITY_L:.0f} L")
+
+    hm = None
+    if raw.get('hm') not in (None, ''):
+        hm = _as_number(raw['hm'], 'hm', errors)
+        if hm is not None and hm < 0:
+            errors.append("hm tidak boleh negatif")
+
+    # Timestamp ISO 8601; yang ber-zona waktu dikonversi ke jam site (REFUEL_TZ), bukan jam server
+    ts = now
+    if raw.get('timestamp'):
+        try:
+            ts = datetime.fromisoformat(str(raw['timestamp']))
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(ZoneInfo(SITE_TZ)).replace(tzinfo=None)
+            if ts > now + TOLERANSI_MASA_DEPAN:
+                errors.append("timestamp ada di masa depan")
+        except ValueError:
+            errors.append("timestamp harus format ISO 8601 (YYYY-MM-DDTHH:MM:SS)")
+
+    if errors:
+        return None, errors
+    return {
+        'timestamp': ts.isoformat(timespec='seconds'),
+        'unit': unit,
+        'location': str(raw.get('location') or '').strip() or None,
+        'quantity': quantity,
+        'hm': hm,
+        'shift': str(raw['shift']).strip() if raw.get('shift') not in (None, '') else None,
+    }, []
+
+def start_ingest_server(store: AppendStore, port: int, host: str = '0.0.0.0',
+                        token: str | None = None) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/health':
+                self.send_error(404)
+                return
+            self._reply(200, {'status': 'ok', 'store': store.path})
+
+        def do_POST(self):
+            if self.path.split('?')[0] != '/refuels':
+                self.send_error(404)
+                return
+            if token and self.headers.get('Authorization') != f"Bearer {token}":
+                self._reply(401, {'error': 'token salah / tidak ada'})
+                return
+            try:
+                panjang = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                self._reply(400, {'error': 'Content-Length bukan angka'})
+                return
+            if not 0 < panjang <= MAX_BODY_BYTES:
+                self._reply(413 if panjang > MAX_BODY_BYTES else 400, {'error': f'body harus 1..{MAX_BODY_BYTES} byte'})
+                return
+            try:
+                body = json.loads(self.rfile.read(panjang))
+            except ValueError:
+                self._reply(400, {'error': 'body bukan JSON valid'})
+                return
+
+            items = body if isinstance(body, list) else [body]
+            if len(items) > MAX_RECORD_PER_REQUEST:
+                self._reply(413, {'error': f'maksimal {MAX_RECORD_PER_REQUEST} record per request'})
+                return
+
+            # Satu batch ditolak utuh kalau ada record invalid -> aplikasi bisa kirim ulang tanpa dobel
+            now = site_now().to_pydatetime()
+            records, ditolak = [], []
+            for i, raw in enumerate(items):
+                record, errors = validate_record(raw, now)
+                if errors:
+                    ditolak.append({'index': i, 'errors': errors})
+                else:
+                    records.append(record)
+            if ditolak:
+                self._reply(422, {'accepted': 0, 'rejected': ditolak})
+                return
+
+            with timed('ingest'):
+                store.append(records)
+            self._reply(201, {'accepted': len(records)})
+
+        def log_message(self, *args):
+            pass
+
+    return _IngestServer((host, port), _Handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Endpoint HTTP ingesti scan QR refueling -> store lokal append-only.")
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--store', default=STORE_PATH, help=f"folder log segmen (default {STORE_PATH})")
+    parser.add_argument('--token', default=os.environ.get('REFUEL_INGEST_TOKEN'),
+                        help="wajibkan header 'Authorization: Bearer <token>' (default env REFUEL_INGEST_TOKEN)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    store = AppendStore(args.store)
+    server = start_ingest_server(store, args.port, args.host, args.token)
+    logger.info("Ingesti di http://%s:%d/refuels -> %s", args.host, args.port, args.store)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# ==========================================
+# INGESTI: SUMBER DATA -> FRAME BERSIH
+# ==========================================
+# Baca export CSV Google Sheet (atau snapshot lokal), normalisasi kolom, parse timestamp,
+# paksa tipe data, lalu buang scan QR ganda.
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+
+from refuel_engine.profiling import timed
+
+SHEET_ID = "1NN_rGKQBZzhUIKnfY1aOs1gvCP2aFiVo6j1RFagtb4s"
+CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv"
+
+def read_source(source: str = CSV_URL) -> pd.DataFrame:
+    # source boleh URL export CSV, path file lokal (.csv / .parquet) atau folder log ingesti
+    with timed('fetch'):
+        if os.path.isdir(str(source)):
+            from refuel_engine.store import read_store
+            return read_store(source)
+        if str(source).endswith('.parquet'):
+            return pd.read_parquet(source)
+        return pd.read_csv(source)
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.str.lower().str.strip()
+
+    rename_map = {
+        'timestamp': 'timestamp', 'kode unit': 'unit',
+        'lokasi': 'location', 'quantity': 'quantity', 'hm': 'hm'
+    }
+    df.rename(columns=rename_map, inplace=True)
+    return df.dropna(subset=['unit', 'quantity'], how='all')
+
+def parse_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    if 'timestamp' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        raw_ts = df['timestamp'].astype(str)
+        df['timestamp'] = pd.to_datetime(raw_ts, dayfirst=True, errors='coerce')
+
+        mask_failed = df['timestamp'].isna()
+        if mask_failed.any():
+            df.loc[mask_failed, 'timestamp'] = pd.to_datetime(
+                raw_ts[mask_failed], dayfirst=False, errors='coerce'
+            )
+
+    if 'timestamp' in df.columns:
+        df = df.sort_values('timestamp').reset_index(drop=True)
+    return df
+
+def coerce_types(df: pd.DataFrame) -> pd.DataFrame:
+    # Nilai yang gagal diparse dibiarkan kosong (NaN/NaT) -> dikarantina oleh validation, bukan jadi 0
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
+    if 'hm' in df.columns:
+        df['hm'] = pd.to_numeric(df['hm'], errors='coerce')
+    if 'shift' in df.columns:
+        df['shift'] = df['shift'].astype(str).str.upper().str.strip()
+    return df
+
+def clean_refuel_frame(df: pd.DataFrame) -> pd.DataFrame:
+    with timed('parse'):
+        df = parse_timestamps(normalize_columns(df))
+    with timed('clean'):
+        return coerce_types(df)
+
+def load_refuel_log(source: str = CSV_URL) -> pd.DataFrame:
+    return clean_refuel_frame(read_source(source))
+
+# ==========================================
+# DEDUP SCAN QR GANDA
+# ==========================================
+# Operator kadang scan 2x -> form terkirim dobel. Baris dianggap duplikat jika
+# unit sama, selisih waktu <= N menit dan selisih isi <= toleransi dari baris sebelumnya.
+# Cukup sort (unit, waktu) lalu bandingkan dengan baris tetangga -> linear setelah sort.
+DEDUP_WINDOW_MENIT = 5
+DEDUP_TOLERANSI_L = 5.0
+
+def deduplicate_scans(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    if data.empty or 'timestamp' not in data.columns:
+        return data, data.iloc[0:0]
+
+    urut = data.sort_values(['unit', 'timestamp'], kind='stable')
+    per_unit = urut.groupby('unit', sort=False)
+    prev_ts = per_unit['timestamp'].shift(1)
+    prev_qty = per_unit['quantity'].shift(1)
+
+    selisih_menit = (urut['timestamp'] - prev_ts).dt.total_seconds() / 60
+    is_dup = (selisih_menit <= DEDUP_WINDOW_MENIT) & ((urut['quantity'] - prev_qty).abs() <= DEDUP_TOLERANSI_L)
+
+    df_dup = urut[is_dup].assign(
+        duplikat_dari=prev_ts[is_dup],
+        selisih_menit=selisih_menit[is_dup].round(1),
+    )
+    # Kembalikan ke urutan waktu asli (index load_data sudah urut timestamp)
+    return data.drop(index=df_dup.index), df_dup.sort_index()
@@ -0,0 +1,75 @@
+# ==========================================
+# LEADERBOARD UNIT: TOP/BOTTOM N + PERUBAHAN PERINGKAT
+# ==========================================
+# Sumbernya rollup harian (diperbarui incremental oleh update_rollups), bukan baris mentah:
+# jendela waktu -> potong rollup (rollup_range) -> agregat per unit (unit_summary, ribuan baris).
+# N teratas dipilih dengan seleksi parsial (argpartition, O(unit)) lalu hanya N itu yang diurutkan.
+# Peringkat periode sebelumnya = jendela sama panjang tepat sebelum jendela aktif. Rollup harian hanya
+# punya resolusi hari produksi -> jendela sebagian hari (mis. SHIFT INI) dibulatkan ke hari produksi
+# utuh dulu, supaya jendela "sebelumnya" tidak jatuh ke hari produksi yang sama.
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine.rollup import unit_summary
+from refuel_engine.shifts import production_date
+from refuel_engine.slicing import is_whole_days, production_day_start, rollup_range
+
+# metrik -> label tampilan
+LEADERBOARD_METRIK = {
+    'l_hr': 'Liter/Jam',
+    'liter': 'Total Solar (L)',
+    'pengisian': 'Jumlah Pengisian',
+    'anomali_rate': 'Early Refill (%)',
+    'l_per_hm': 'Liter/HM',
+}
+# Rasio dengan penyebut waktu/HM: nilai 0/kosong = unit tidak cukup data, jangan ikut diperingkat
+METRIK_RASIO = {'l_hr', 'l_per_hm'}
+
+def metric_values(summary: pd.DataFrame, metrik: str) -> pd.Series:
+    if metrik not in summary.columns:
+        return pd.Series(dtype=float)
+    nilai = summary[metrik].astype(float)
+    if metrik in METRIK_RASIO:
+        nilai = nilai.where(nilai > 0)
+    return nilai.dropna()
+
+def select_top(values: pd.Series, n: int, largest: bool = True) -> pd.Series:
+    # Seleksi parsial: argpartition memisahkan n terbesar tanpa mengurutkan semua unit
+    arr = values.to_numpy(dtype=float)
+    kunci = -arr if largest else arr
+    if n <= 0 or arr.size == 0:
+        return values.iloc[0:0]
+    idx = np.argpartition(kunci, n - 1)[:n] if n < arr.size else np.arange(arr.size)
+    return values.iloc[idx[np.argsort(kunci[idx], kind='stable')]]
+
+def previous_window(mulai, akhir) -> tuple[pd.Timestamp | None, pd.Timestamp | None]:
+    if mulai is None or akhir is None:
+        return None, None
+    if not is_whole_days(mulai, akhir):
+        mulai = production_day_start(production_date(mulai))
+        akhir = production_day_start(production_date(pd.Timestamp(akhir) - pd.Timedelta(microseconds=1))) + pd.Timedelta(days=1)
+    panjang = pd.Timestamp(akhir) - pd.Timestamp(mulai)
+    return pd.Timestamp(mulai) - panjang, pd.Timestamp(mulai)
+
+def leaderboard(daily: pd.DataFrame, metrik: str = 'l_hr', n: int = 5, largest: bool = True,
+                mulai=None, akhir=None) -> pd.DataFrame:
+    # Return unit, nilai, peringkat (1 = teratas sesuai arah), peringkat_sebelumnya, perubahan (+ = naik)
+    kolom = ['unit', 'nilai', 'peringkat', 'peringkat_sebelumnya', 'perubahan']
+    jendela = rollup_range(daily, mulai, akhir)
+    if jendela.empty:
+        return pd.DataFrame(columns=kolom)
+    top = select_top(metric_values(unit_summary(jendela), metrik), n, largest)
+    hasil = pd.DataFrame({'unit': top.index, 'nilai': top.to_numpy(), 'peringkat': np.arange(1, len(top) + 1)})
+
+    lalu_mulai, lalu_akhir = previous_window(mulai, akhir)
+    lalu = rollup_range(daily, lalu_mulai, lalu_akhir) if lalu_mulai is not None else jendela.iloc[0:0]
+    if lalu.empty:
+        hasil['peringkat_sebelumnya'] = pd.array([pd.NA] * len(hasil), dtype='Int64')
+    else:
+        # Peringkat lama dihitung untuk semua unit (dari agregat, bukan baris mentah)
+        peringkat_lalu = metric_values(unit_summary(lalu), metrik).rank(ascending=not largest, method='min')
+        hasil['peringkat_sebelumnya'] = hasil['unit'].map(peringkat_lalu).astype('Int64')
+    hasil['perubahan'] = hasil['peringkat_sebelumnya'] - hasil['peringkat']
+    return hasil[kolom]
@@ -0,0 +1,260 @@
+# ==========================================
+# LIVE FEED: SATU POLLER, DORONG KE SEMUA SESI
+# ==========================================
+# Dulu tiap layar membaca sheet sendiri tiap 60 detik (TTL cache). Sekarang satu LiveFeed per
+# proses yang mem-poll sumber, mendeteksi baris baru (sheet = append-only), membersihkan HANYA
+# baris baru itu lalu menambahkannya ke frame bersama. Frame siap tampil (validasi, dedup, outlier,
+# cek HM) juga diperbarui incremental di thread poller: hanya batch baru + ekor histori per unit
+# (prepare_increment), bukan seluruh histori tiap batch. Sesi dashboard cukup menunggu nomor versi
+# berubah lalu membaca hasil jadi (tanpa menyentuh sheet); layar lain bisa lewat SSE (/events).
+#
+# Uji lokal tanpa Google Sheet (stub menulis baris acak ke CSV yang terus bertambah):
+#   python -m refuel_engine.live --stub data/stub.csv --sse-port 8765
+#   REFUEL_SOURCE=data/stub.csv REFUEL_LIVE=1 streamlit run dashboard.py
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from refuel_engine.ingestion import CSV_URL, clean_refuel_frame, read_source
+from refuel_engine.pipeline import prepare_increment, prepare_refuel_frame
+from refuel_engine.profiling import timed
+from refuel_engine.shifts import site_now
+from refuel_engine.store import StoreReader, is_store_path
+
+logger = logging.getLogger('refuel.live')
+
+LIVE_POLL_DETIK = 5.0        # jeda poll sumber (sekali per proses, bukan per layar)
+SSE_HEARTBEAT_DETIK = 15.0   # komentar kosong supaya proxy tidak memutus koneksi SSE
+SSE_MAX_ANTREAN = 100        # batch yang belum terkirim per klien SSE sebelum klien dianggap macet
+
+class LiveFeed:
+    def __init__(self, source: str = CSV_URL, interval: float = LIVE_POLL_DETIK):
+        self.source = source
+        self.interval = interval
+        self.version = 0
+        self.frame = pd.DataFrame()
+        self.prepared = (pd.DataFrame(), pd.DataFrame(), pd.DataFrame())   # (df, duplikat, karantina)
+        self.last_error = None
+        self._n_raw = 0
+        self._hash_raw = 0
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reader = StoreReader(source) if is_store_path(source) else None
+
+    def _poll_store(self) -> int:
+        # Store ingesti append-only: cukup baca byte baru sejak offset terakhir
+        baru = self._reader.refresh()
+        if baru.empty:
+            return 0
+        prepared = self._prepare(baru, self._reader.frame)
+        with self._cond:
+            self.frame = self._reader.frame
+            self.prepared = prepared
+            self.version += 1
+            self._cond.notify_all()
+        self._publish('append', baru)
+        return len(baru)
+
+    def poll_once(self) -> int:
+        # Return jumlah baris baru (0 = tidak ada perubahan)
+        if self._reader is not None:
+            return self._poll_store()
+        raw = read_source(self.source)
+        n_lama = self._n_raw
+        # Baris lama diedit/dihapus -> sidik jari prefix berubah -> muat ulang penuh.
+        # Hash per baris dihitung sekali: jumlah prefix = sidik jari lama, jumlah semua = sidik jari baru
+        hash_baris = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+        prefix_sama = len(raw) >= n_lama and (n_lama == 0 or int(hash_baris[:n_lama].sum()) == self._hash_raw)
+        if prefix_sama and len(raw) == n_lama:
+            return 0
+
+        with timed('live_update'):
+            if prefix_sama and n_lama > 0:
+                baru = clean_refuel_frame(raw.iloc[n_lama:].copy())
+                frame = pd.concat([self.frame, baru], ignore_index=True)
+                if not frame['timestamp'].is_monotonic_increasing:
+                    frame = frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+                event = 'append'
+            else:
+                baru = frame = clean_refuel_frame(raw.copy())
+                event = 'reset'
+            prepared = self._prepare(baru if event == 'append' else None, frame)
+
+        self._n_raw = len(raw)
+        self._hash_raw = int(hash_baris.sum())
+        with self._cond:
+            self.frame = frame
+            self.prepared = prepared
+            self.version += 1
+            self._cond.notify_all()
+        self._publish(event, baru)
+        return len(baru)
+
+    def _prepare(self, baru: pd.DataFrame | None, frame: pd.DataFrame):
+        # Append batch ke frame siap tampil; hitung ulang penuh kalau reset / ada scan telat
+        hasil = None if baru is None else prepare_increment(self.prepared, baru)
+        if hasil is None:
+            with timed('live_prepare_full'):
+                hasil = prepare_refuel_frame(frame)
+        return hasil
+
+    def snapshot(self) -> tuple[int, pd.DataFrame]:
+        with self._cond:
+            return self.version, self.frame
+
+    def prepared_snapshot(self) -> tuple[int, tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+        with self._cond:
+            return self.version, self.prepared
+
+    def wait(self, version: int, timeout: float) -> int:
+        # Blok sampai ada versi lebih baru dari `version` (atau timeout), return versi terkini
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version, timeout)
+            return self.version
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                n = self.poll_once()
+                self.last_error = None
+                if n:
+                    logger.info("live feed: %d baris baru (versi %d)", n, self.version)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("live feed gagal poll: %s", e)
+            self._stop.wait(self.interval)
+
+    def start(self) -> 'LiveFeed':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name='refuel-live')
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Pelanggan SSE: tiap klien punya antrean sendiri ---
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=SSE_MAX_ANTREAN)
+        with self._cond:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._cond:
+            self._subscribers.discard(q)
+
+    def _publish(self, event: str, rows: pd.DataFrame):
+        payload = {'event': event, 'version': self.version,
+                   'rows': json.loads(rows.to_json(orient='records', date_format='iso'))}
+        with self._cond:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                self.unsubscribe(q)
+
+def start_sse_server(feed: LiveFeed, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/events':
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            q = feed.subscribe()
+            try:
+                self.wfile.write(f"event: hello\ndata: {json.dumps({'version': feed.version})}\n\n".encode())
+                self.wfile.flush()
+                while True:
+                    try:
+                        payload = q.get(timeout=SSE_HEARTBEAT_DETIK)
+                        pesan = f"event: {payload['event']}\nid: {payload['version']}\ndata: {json.dumps(payload['rows'])}\n\n"
+                    except queue.Empty:
+                        pesan = ": heartbeat\n\n"
+                    self.wfile.write(pesan.encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                feed.unsubscribe(q)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name='refuel-sse').start()
+    return server
+
+# ------------------------------------------
+# STUB SUMBER DATA (UNTUK UJI LOKAL)
+# ------------------------------------------
+def run_stub_source(path: str, interval: float = 3.0, units: int = 40, batch: tuple[int, int] = (0, 3),
+                    seed: int = 39, stop: threading.Event | None = None):
+    # Tulis baris acak berformat export sheet (dd/mm/YYYY) ke CSV, append tiap `interval` detik
+    rng = random.Random(seed)
+    kolom = "Timestamp,Kode Unit,Lokasi,Quantity,HM,Shift\n"
+    hm = {f"DT{i:03d}": 1000.0 + rng.random() * 500 for i in range(1, units + 1)}
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(kolom)
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        sekarang = site_now()
+        baris = []
+        for _ in range(rng.randint(*batch)):
+            unit = rng.choice(list(hm))
+            hm[unit] += rng.uniform(6, 12)
+            shift = 1 if 6 <= sekarang.hour < 18 else 2
+            baris.append(f"{sekarang:%d/%m/%Y %H:%M:%S},{unit},PITSTOP KM 39,"
+                         f"{rng.choice([120, 180, 220, 250, 280, 300])}.0,{hm[unit]:.1f},{shift}\n")
+        if baris:
+            with open(path, 'a') as f:
+                f.writelines(baris)
+        stop.wait(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live feed refueling: satu poller + SSE (/events).")
+    parser.add_argument('--source', default=os.environ.get('REFUEL_SOURCE', CSV_URL))
+    parser.add_argument('--interval', type=float, default=LIVE_POLL_DETIK, help="jeda poll sumber (detik)")
+    parser.add_argument('--sse-port', type=int, default=8765)
+    parser.add_argument('--stub', metavar='CSV', help="jalankan stub yang terus menambah baris ke CSV ini, lalu pakai sebagai sumber")
+    parser.add_argument('--stub-interval', type=float, default=3.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    source = args.source
+    if args.stub:
+        threading.Thread(target=run_stub_source, args=(args.stub, args.stub_interval), daemon=True,
+                         name='refuel-stub').start()
+        source = args.stub
+        time.sleep(0.2)
+
+    feed = LiveFeed(source, args.interval).start()
+    start_sse_server(feed, args.sse_port)
+    logger.info("SSE di http://localhost:%d/events, sumber %s", args.sse_port, source)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        feed.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# ==========================================
+# METRIK PERFORMA UNIT & RINGKASAN ARMADA
+# ==========================================
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from refuel_engine.anomalies import early_refill_mask
+
+def data_version(data: pd.DataFrame) -> tuple:
+    # Sidik jari murah: berubah setiap ada baris baru / koreksi isi
+    if data.empty:
+        return (0, None, 0.0)
+    return (len(data), str(data['timestamp'].max()), float(data['quantity'].sum()))
+
+def get_performance_df(data_source: pd.DataFrame) -> pd.DataFrame:
+    # Satu groupby untuk semua unit (dulu loop + filter per unit -> O(unit x baris))
+    per_unit = data_source.groupby('unit', sort=False).agg(
+        ts_awal=('timestamp', 'min'), ts_akhir=('timestamp', 'max'),
+        liter=('quantity', 'sum'), pengisian=('quantity', 'size'),
+        hari=('tanggal_produksi', 'nunique'),
+    )
+    duration = (per_unit['ts_akhir'] - per_unit['ts_awal']).dt.total_seconds() / 3600
+    return pd.DataFrame({
+        'unit': per_unit.index,
+        'l_hr': (per_unit['liter'] / duration).where(duration > 0, 0.0).to_numpy(),
+        'refills_day': (per_unit['pengisian'] / per_unit['hari']).where(per_unit['hari'] > 0, 0.0).to_numpy(),
+    })
+
+@dataclass(frozen=True)
+class FleetSummary:
+    total_qty: float
+    total_trx: int
+    avg_l_per_hr: float
+    avg_refills_per_day: float
+    early_refill: int
+    last_update: pd.Timestamp | None
+
+def summarize(data: pd.DataFrame, df_perf: pd.DataFrame) -> FleetSummary:
+    # Angka-angka untuk metric card (dan laporan CLI)
+    if not df_perf.empty:
+        avg_l_per_hr = df_perf['l_hr'][df_perf['l_hr'] > 0].mean()
+        avg_refills_per_day = df_perf['refills_day'].mean()
+    else:
+        avg_l_per_hr = 0
+        avg_refills_per_day = 0
+
+    last_update = data['timestamp'].max() if not data.empty else None
+    return FleetSummary(
+        total_qty=float(data['quantity'].sum()),
+        total_trx=len(data),
+        avg_l_per_hr=0.0 if pd.isna(avg_l_per_hr) else float(avg_l_per_hr),
+        avg_refills_per_day=0.0 if pd.isna(avg_refills_per_day) else float(avg_refills_per_day),
+        early_refill=int(early_refill_mask(data).sum()),
+        last_update=last_update if pd.notnull(last_update) else None,
+    )
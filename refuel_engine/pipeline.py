@@ -0,0 +1,76 @@
+# ==========================================
+# RANGKAIAN LENGKAP: DATA BERSIH -> SIAP TAMPIL
+# ==========================================
+# prepare_refuel_frame = seluruh histori sekaligus. Mode live memakai prepare_increment: hanya
+# batch baru + ekor histori per unit yang disentuh (acuan dedup, HM & rolling outlier), hasilnya
+# di-append ke frame siap tampil yang sudah ada.
+from __future__ import annotations
+
+import pandas as pd
+
+from refuel_engine.anomalies import OUTLIER_WINDOW, detect_outliers, early_refill_mask
+from refuel_engine.ingestion import deduplicate_scans
+from refuel_engine.profiling import timed
+from refuel_engine.shifts import assign_shift_calendar
+from refuel_engine.validation import validate_refuel_frame
+
+def enrich(df: pd.DataFrame) -> pd.DataFrame:
+    # Tambah kolom outlier, kalender shift & penanda early refill ke frame yang sudah di-dedup
+    if df.empty:
+        return df
+    with timed('outliers'):
+        df = df.join(detect_outliers(df))
+    with timed('shift_calendar'):
+        return df.assign(**assign_shift_calendar(df['timestamp']), is_anomali=early_refill_mask(df))
+
+def prepare_refuel_frame(df_clean: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Urutan sama dengan dashboard: validasi (karantina) -> dedup -> outlier -> kalender shift
+    with timed('validate'):
+        df, df_karantina = validate_refuel_frame(df_clean)
+    with timed('dedup'):
+        df, df_duplikat = deduplicate_scans(df)
+    return enrich(df), df_duplikat, df_karantina
+
+# Rolling median (OUTLIER_WINDOW pengisian sebelumnya) + rolling MAD atas deviasi sebelumnya
+# -> baris baru butuh 2 x OUTLIER_WINDOW pengisian terakhir unitnya supaya skornya sama dengan hitung penuh
+EKOR_PER_UNIT = 2 * OUTLIER_WINDOW + 1
+
+def prepare_increment(siap: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame],
+                      baru: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
+    # siap = hasil prepare sebelumnya, baru = baris bersih (clean_refuel_frame) yang belum pernah diproses.
+    # Return None kalau tidak bisa incremental (belum ada data / ada scan lebih tua dari pengisian
+    # terakhir unitnya) -> pemanggil hitung ulang penuh dengan prepare_refuel_frame.
+    df, df_duplikat, df_karantina = siap
+    if df.empty:
+        return None
+    if baru.empty:
+        return siap
+    baru = baru.sort_values('timestamp', kind='stable', ignore_index=True)
+
+    # Ekor histori hanya untuk unit yang muncul di batch (satu isin + tail, bukan pipeline penuh)
+    ekor = df[df['unit'].isin(baru['unit'].unique())].groupby('unit', sort=False).tail(EKOR_PER_UNIT)
+    terakhir = ekor.groupby('unit', sort=False)['timestamp'].max()
+    if (baru['timestamp'] < baru['unit'].map(terakhir)).any():
+        return None
+
+    with timed('validate'):
+        bersih, karantina_baru = validate_refuel_frame(baru, konteks=ekor)
+    if bersih.empty:
+        return df, df_duplikat, pd.concat([df_karantina, karantina_baru], ignore_index=True)
+
+    # Ekor + batch dengan label index 0..n-1 (kolom turunan ekor dibuang, dihitung ulang bersama)
+    gabung = pd.concat([ekor[bersih.columns], bersih], ignore_index=True)
+    n_ekor = len(ekor)
+    with timed('dedup'):
+        sisa, dup_baru = deduplicate_scans(gabung)
+    # Hanya baris batch yang boleh dibuang; baris ekor sudah dinilai di batch sebelumnya
+    dup_baru = dup_baru[dup_baru.index >= n_ekor]
+    sisa = gabung.drop(index=dup_baru.index)
+    hasil = enrich(sisa)
+    hasil = hasil[hasil.index >= n_ekor]
+
+    df = pd.concat([df, hasil], ignore_index=True)
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+    return (df, pd.concat([df_duplikat, dup_baru], ignore_index=True),
+            pd.concat([df_karantina, karantina_baru], ignore_index=True))
@@ -0,0 +1,125 @@
+# ==========================================
+# INSTRUMENTASI WAKTU PER TAHAP (HOT PATH)
+# ==========================================
+# Pencatat ringan: tiap tahap dashboard dibungkus `with timed('nama'):`, durasinya masuk
+# histogram per tahap (bucket ala Prometheus) + ring buffer event untuk log terstruktur.
+# Registry ini satu per proses (modul hanya di-import sekali walau Streamlit rerun),
+# jadi statistik terkumpul dari semua sesi/viewer.
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('refuel.profiling')
+
+BUCKETS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+MAX_EVENTS = 5000
+
+class StageRegistry:
+    def __init__(self, buckets=BUCKETS_S, max_events=MAX_EVENTS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._events = deque(maxlen=max_events)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            st = self._stages.get(stage)
+            if st is None:
+                st = self._stages[stage] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0, 'max': 0.0}
+            for i, batas in enumerate(self.buckets):
+                if seconds <= batas:
+                    st['counts'][i] += 1
+                    break
+            st['sum'] += seconds
+            st['count'] += 1
+            st['max'] = max(st['max'], seconds)
+            event = {'ts': time.time(), 'stage': stage, 'duration_ms': round(seconds * 1000, 3)}
+            self._events.append(event)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(event))
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._events.clear()
+
+    def _quantile(self, st, q):
+        # Perkiraan kuantil dari histogram (batas atas bucket tempat kuantil jatuh)
+        target = q * st['count']
+        kumulatif = 0
+        for batas, n in zip(self.buckets, st['counts']):
+            kumulatif += n
+            if kumulatif >= target:
+                return st['max'] if batas == float('inf') else min(batas, st['max'])
+        return st['max']
+
+    def snapshot(self):
+        with self._lock:
+            baris = []
+            for stage, st in self._stages.items():
+                baris.append({
+                    'stage': stage,
+                    'count': st['count'],
+                    'total_ms': st['sum'] * 1000,
+                    'mean_ms': st['sum'] / st['count'] * 1000,
+                    'p50_ms': self._quantile(st, 0.5) * 1000,
+                    'p95_ms': self._quantile(st, 0.95) * 1000,
+                    'max_ms': st['max'] * 1000,
+                    'buckets': dict(zip((str(b) for b in self.buckets), st['counts'])),
+                })
+            return sorted(baris, key=lambda r: r['total_ms'], reverse=True)
+
+    def events_jsonl(self):
+        with self._lock:
+            return '\n'.join(json.dumps(e) for e in self._events) + '\n'
+
+    def prometheus_text(self, prefix='refuel_dashboard_stage_seconds'):
+        baris = [f'# HELP {prefix} Durasi tiap tahap dashboard refueling.', f'# TYPE {prefix} histogram']
+        with self._lock:
+            for stage, st in sorted(self._stages.items()):
+                kumulatif = 0
+                for batas, n in zip(self.buckets, st['counts']):
+                    kumulatif += n
+                    le = '+Inf' if batas == float('inf') else f'{batas:g}'
+                    baris.append(f'{prefix}_bucket{{stage="{stage}",le="{le}"}} {kumulatif}')
+                baris.append(f'{prefix}_sum{{stage="{stage}"}} {st["sum"]:.6f}')
+                baris.append(f'{prefix}_count{{stage="{stage}"}} {st["count"]}')
+        return '\n'.join(baris) + '\n'
+
+REGISTRY = StageRegistry()
+
+@contextmanager
+def timed(stage, registry=REGISTRY):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(stage, time.perf_counter() - t0)
+
+# ==========================================
+# ENDPOINT TEKS PROMETHEUS (OPSIONAL)
+# ==========================================
+def start_metrics_server(port, host='0.0.0.0', registry=REGISTRY, extra=()):
+    # extra = fungsi lain yang mengembalikan teks Prometheus (mis. statistik cache), ditempel di belakang
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = ''.join([registry.prometheus_text()] + [f() for f in extra]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='refuel-metrics').start()
+    return server
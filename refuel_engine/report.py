@@ -0,0 +1,162 @@
+# ==========================================
+# LAPORAN BATCH OFFLINE (TANPA BROWSER)
+# ==========================================
+# Laporan akhir shift / bulanan langsung dari engine, tanpa screen-scrape dashboard.
+# Data dibersihkan + dedup + outlier SEKALI di proses utama (butuh histori penuh per unit),
+# lalu dipotong per tanggal produksi (dan per lokasi) dan dihitung paralel di process pool.
+#
+# Contoh:
+#   python report.py --start 2026-09-01 --end 2026-09-30 --format csv,html
+#   python -m refuel_engine.report --source snapshot.parquet --per-site --workers 8 --format parquet
+from __future__ import annotations
+
+import argparse
+import html
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from refuel_engine.anomalies import early_refill_rows
+from refuel_engine.ingestion import CSV_URL, load_refuel_log
+from refuel_engine.metrics import get_performance_df, summarize
+from refuel_engine.pipeline import prepare_refuel_frame
+from refuel_engine.traffic import hourly_traffic
+
+FORMAT_LAPORAN = ('csv', 'parquet', 'html')
+SEMUA_LOKASI = 'ALL'
+KOLOM_EARLY_REFILL = ['timestamp', 'unit', 'location', 'quantity', 'shift_produksi']
+
+def _partition_report(tanggal: pd.Timestamp, lokasi: str, part: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    # Dijalankan di worker: semua tabel untuk satu tanggal produksi x satu lokasi
+    kunci = {'tanggal_produksi': tanggal, 'lokasi': lokasi}
+    df_perf = get_performance_df(part)
+    ringkasan = summarize(part, df_perf)
+
+    df_summary = pd.DataFrame([{
+        **kunci,
+        'total_liter': ringkasan.total_qty,
+        'total_pengisian': ringkasan.total_trx,
+        'unit_aktif': part['unit'].nunique(),
+        'avg_l_hr': ringkasan.avg_l_per_hr,
+        'avg_refills_day': ringkasan.avg_refills_per_day,
+        'early_refill': ringkasan.early_refill,
+        'outlier': int(part['is_outlier'].sum()),
+    }])
+    df_early = early_refill_rows(part)[[c for c in KOLOM_EARLY_REFILL if c in part.columns]]
+    df_traffic = hourly_traffic(part, tanggal)[['jam_label', 'jumlah']]
+
+    return {
+        'summary': df_summary,
+        'performance': df_perf.assign(**kunci),
+        'early_refill': df_early.assign(**kunci),
+        'traffic': df_traffic.assign(**kunci),
+    }
+
+def _run_partition(job: tuple) -> dict[str, pd.DataFrame]:
+    return _partition_report(*job)
+
+def iter_partitions(df: pd.DataFrame, per_site: bool):
+    kunci = ['tanggal_produksi', 'location'] if per_site and 'location' in df.columns else ['tanggal_produksi']
+    for key, part in df.groupby(kunci, sort=True):
+        key = key if isinstance(key, tuple) else (key,)
+        lokasi = str(key[1]) if len(key) > 1 else SEMUA_LOKASI
+        yield key[0], lokasi, part
+
+def build_report(df: pd.DataFrame, per_site: bool = False, workers: int | None = None) -> dict[str, pd.DataFrame]:
+    # df = hasil prepare_refuel_frame (sudah ada tanggal_produksi, shift_produksi, is_outlier)
+    jobs = list(iter_partitions(df, per_site))
+    if workers == 1 or len(jobs) <= 1:
+        hasil = [_run_partition(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            hasil = list(pool.map(_run_partition, jobs, chunksize=4))
+
+    tabel = {}
+    for nama in ('summary', 'performance', 'early_refill', 'traffic'):
+        bagian = [h[nama] for h in hasil if not h[nama].empty]
+        tabel[nama] = pd.concat(bagian, ignore_index=True) if bagian else pd.DataFrame()
+
+    # Performa unit untuk seluruh periode (sama dengan angka di dashboard saat filter periode ini)
+    tabel['performance_periode'] = get_performance_df(df) if not df.empty else pd.DataFrame()
+    return tabel
+
+def write_html(tabel: dict[str, pd.DataFrame], path: str, judul: str):
+    bagian = [f"<h1>{html.escape(judul)}</h1>"]
+    for nama, df in tabel.items():
+        bagian.append(f"<h2>{html.escape(nama.replace('_', ' ').upper())}</h2>")
+        bagian.append(df.to_html(index=False, float_format=lambda x: f"{x:,.1f}", border=0) if not df.empty else "<p>-</p>")
+    gaya = ("body{font-family:sans-serif;background:#0e1117;color:#fafafa;margin:24px}"
+            "table{border-collapse:collapse;margin-bottom:24px}"
+            "th,td{padding:4px 10px;border-bottom:1px solid #333;text-align:right}"
+            "th{color:#00e5ff}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(judul)}</title>"
+                f"<style>{gaya}</style></head><body>{''.join(bagian)}</body></html>")
+
+def write_report(tabel: dict[str, pd.DataFrame], out_dir: str, formats: list[str], judul: str) -> list[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for nama, df in tabel.items():
+        if 'csv' in formats:
+            files.append(os.path.join(out_dir, f"{nama}.csv"))
+            df.to_csv(files[-1], index=False)
+        if 'parquet' in formats:
+            files.append(os.path.join(out_dir, f"{nama}.parquet"))
+            df.to_parquet(files[-1], index=False)
+    if 'html' in formats:
+        files.append(os.path.join(out_dir, 'report.html'))
+        write_html(tabel, files[-1], judul)
+    return files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan refueling offline (totals, performa unit, early refill, traffic per jam).")
+    parser.add_argument('--source', default=os.environ.get('REFUEL_SOURCE', CSV_URL),
+                        help="URL export CSV sheet atau snapshot lokal .csv/.parquet (default: Google Sheet)")
+    parser.add_argument('--start', help="tanggal produksi awal, YYYY-MM-DD (default: paling awal)")
+    parser.add_argument('--end', help="tanggal produksi akhir (inklusif), YYYY-MM-DD (default: paling akhir)")
+    parser.add_argument('--per-site', action='store_true', help="pecah laporan per lokasi")
+    parser.add_argument('--workers', type=int, default=None, help="jumlah proses paralel (default: jumlah CPU)")
+    parser.add_argument('--format', default='csv,html', help=f"format output dipisah koma: {', '.join(FORMAT_LAPORAN)}")
+    parser.add_argument('--out-dir', help="folder output (default reports/laporan_<waktu>)")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip().lower() for f in args.format.split(',') if f.strip()]
+    tidak_dikenal = set(formats) - set(FORMAT_LAPORAN)
+    if tidak_dikenal:
+        parser.error(f"format tidak dikenal: {', '.join(sorted(tidak_dikenal))}")
+
+    # Fallback parser tanggal (format US) berisik di data besar, hasilnya tetap dipakai
+    warnings.filterwarnings('ignore', message='Could not infer format')
+
+    mulai = time.perf_counter()
+    df, df_duplikat, df_karantina = prepare_refuel_frame(load_refuel_log(args.source))
+    if df.empty:
+        parser.exit(1, "Data kosong, tidak ada laporan yang dibuat.\n")
+
+    if args.start:
+        df = df[df['tanggal_produksi'] >= pd.Timestamp(args.start)]
+    if args.end:
+        df = df[df['tanggal_produksi'] <= pd.Timestamp(args.end)]
+    t_siap = time.perf_counter() - mulai
+
+    tabel = build_report(df, per_site=args.per_site, workers=args.workers)
+    awal = df['tanggal_produksi'].min()
+    akhir = df['tanggal_produksi'].max()
+    periode = f"{awal:%d %b %Y} - {akhir:%d %b %Y}" if not df.empty else "-"
+
+    out_dir = args.out_dir or os.path.join('reports', f"laporan_{datetime.now():%Y%m%d-%H%M%S}")
+    files = write_report(tabel, out_dir, formats, f"LAPORAN REFUELING {periode}")
+
+    print(f"Periode       : {periode}")
+    print(f"Pengisian     : {len(df):,} baris ({len(df_duplikat):,} scan duplikat dibuang dari seluruh sumber)")
+    if not df_karantina.empty:
+        print(f"Karantina     : {len(df_karantina):,} baris gagal validasi ({(df_karantina['tindakan'] == 'DIBUANG').sum():,} dibuang)")
+    print(f"Waktu         : {t_siap:.2f} s siapkan data, {time.perf_counter() - mulai:.2f} s total")
+    print(f"Output ({len(files)} file) di {out_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# ==========================================
+# ROLLUP HARIAN & PER JAM (TERSIMPAN DI DISK)
+# ==========================================
+# Sebagian besar tampilan cuma butuh agregat per hari / per jam. Rollup disimpan sebagai
+# parquet; hari produksi yang sudah TUTUP tidak dihitung ulang, tiap refresh hanya hari yang
+# masih berjalan (dan hari baru) yang di-agregasi ulang dari data mentah. Scan QR bisa telat
+# masuk (atau baris lama dikoreksi/dibuang). Tiap baris rollup harian membawa sidik isi = jumlah hash
+# baris mentahnya (unit, lokasi, timestamp, HM, liter, shift, flag early & outlier). Hari tutup yang
+# sidiknya tidak lagi sama dengan data mentah ikut dibuka & dihitung ulang, termasuk:
+#   - koreksi yang tidak mengubah jumlah baris / liter (kode unit, lokasi, HM, pindah jam)
+#   - hari-hari SESUDAH scan telat yang flag outlier-nya ikut berubah (acuan rolling
+#     OUTLIER_WINDOW pengisian per unit bergeser) -> syarat: data = hasil prepare penuh terbaru
+#
+#   daily.parquet  : tanggal_produksi x unit x location -> pengisian, liter, early, outlier, ts_awal, ts_akhir,
+#                    hm_awal, hm_akhir, liter_pertama (untuk konsumsi liter/HM), sidik
+#   hourly.parquet : tanggal_produksi x jam x shift_produksi x location -> pengisian, liter, early, outlier
+#   meta.json      : batas hari tutup + versi skema (beda versi / sumber -> bangun ulang)
+from __future__ import annotations
+
+import json
+import os
+
+import pandas as pd
+
+from refuel_engine.anomalies import early_refill_mask
+from refuel_engine.profiling import timed
+from refuel_engine.shifts import SHIFT_CALENDAR, production_date
+
+ROLLUP_DIR = os.environ.get('REFUEL_ROLLUP_DIR', os.path.join('data', 'rollup'))
+ROLLUP_SCHEMA = 3
+KUNCI_HARIAN = ['tanggal_produksi', 'unit', 'location']
+KUNCI_PER_JAM = ['tanggal_produksi', 'jam', 'shift_produksi', 'location']
+KOLOM_SIDIK = ['unit', 'location', 'timestamp', 'hm', 'quantity', 'shift_produksi', 'early', 'outlier']
+
+def _with_flags(data: pd.DataFrame) -> pd.DataFrame:
+    return data.assign(
+        early=early_refill_mask(data),
+        outlier=data['is_outlier'] if 'is_outlier' in data.columns else False,
+        location=data['location'].fillna('-') if 'location' in data.columns else '-',
+        hm=data['hm'] if 'hm' in data.columns else float('nan'),
+        jam=data['timestamp'].dt.hour,
+    )
+
+def _row_fingerprint(d: pd.DataFrame) -> pd.Series:
+    # Hash uint64 per baris; dijumlah per grup (overflow membungkus, urutan baris tidak berpengaruh)
+    return pd.util.hash_pandas_object(d[KOLOM_SIDIK], index=False)
+
+def build_rollups(data: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # data = frame siap tampil (sudah ada tanggal_produksi & shift_produksi)
+    d = _with_flags(data)
+    d['sidik'] = _row_fingerprint(d)
+    daily = (d.groupby(KUNCI_HARIAN, as_index=False, sort=True)
+             .agg(pengisian=('quantity', 'size'), liter=('quantity', 'sum'),
+                  early_refill=('early', 'sum'), outlier=('outlier', 'sum'),
+                  ts_awal=('timestamp', 'min'), ts_akhir=('timestamp', 'max'),
+                  hm_awal=('hm', 'min'), hm_akhir=('hm', 'max'), liter_pertama=('quantity', 'first'),
+                  sidik=('sidik', 'sum')))
+    hourly = (d.groupby(KUNCI_PER_JAM, as_index=False, sort=True)
+              .agg(pengisian=('quantity', 'size'), liter=('quantity', 'sum'),
+                   early_refill=('early', 'sum'), outlier=('outlier', 'sum')))
+    return daily, hourly
+
+def _paths(rollup_dir: str) -> dict[str, str]:
+    return {nama: os.path.join(rollup_dir, f) for nama, f in
+            [('daily', 'daily.parquet'), ('hourly', 'hourly.parquet'), ('meta', 'meta.json')]}
+
+def _write_atomic(df: pd.DataFrame, path: str):
+    tmp = path + '.tmp'
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+def load_rollups(rollup_dir: str = ROLLUP_DIR) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    p = _paths(rollup_dir)
+    if not all(os.path.exists(f) for f in p.values()):
+        return pd.DataFrame(), pd.DataFrame(), {}
+    with open(p['meta']) as f:
+        meta = json.load(f)
+    return pd.read_parquet(p['daily']), pd.read_parquet(p['hourly']), meta
+
+def stale_days(data: pd.DataFrame, daily: pd.DataFrame, sampai) -> pd.DatetimeIndex:
+    # Hari produksi <= sampai yang sidik isi mentahnya beda dengan rollup tersimpan
+    # (baris masuk / dibuang / dikoreksi, atau flag outlier bergeser karena scan telat di hari sebelumnya)
+    sampai = pd.Timestamp(sampai)
+    d = _with_flags(data[data['tanggal_produksi'] <= sampai])
+    mentah = _row_fingerprint(d).groupby(d['tanggal_produksi']).sum()
+    simpan = daily[daily['tanggal_produksi'] <= sampai].groupby('tanggal_produksi')['sidik'].sum()
+    # Hari yang hanya ada di salah satu sisi selalu basi; reindex + isin menjaga uint64 (tanpa jadi float)
+    hari = mentah.index.union(simpan.index)
+    ada = hari.isin(mentah.index) & hari.isin(simpan.index)
+    beda = ~ada | (mentah.reindex(hari, fill_value=0).to_numpy() != simpan.reindex(hari, fill_value=0).to_numpy())
+    return pd.DatetimeIndex(hari[beda])
+
+def update_rollups(data: pd.DataFrame, rollup_dir: str = ROLLUP_DIR, sumber: str | None = None,
+                   rebuild: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
+    if data.empty:
+        return build_rollups(data)
+
+    daily_lama, hourly_lama, meta = load_rollups(rollup_dir)
+    if meta.get('schema') != ROLLUP_SCHEMA or meta.get('sumber') != sumber:
+        rebuild = True
+
+    # Hari produksi yang masih berjalan = hari dari scan terakhir; semua sebelum itu dianggap tutup
+    tutup_baru = pd.Timestamp(production_date(data['timestamp'].max())) - pd.Timedelta(days=1)
+    tutup_lama = None if rebuild or not meta.get('tertutup_sampai') else pd.Timestamp(meta['tertutup_sampai'])
+
+    with timed('rollup'):
+        if tutup_lama is None:
+            daily, hourly = build_rollups(data)
+        else:
+            # data urut timestamp -> potong baris hari terbuka pakai searchsorted, tanpa scan penuh
+            mulai = tutup_lama + pd.Timedelta(days=1, hours=SHIFT_CALENDAR[0][1])
+            terbuka = data.iloc[data['timestamp'].searchsorted(mulai):]
+            # Hari tutup yang kemasukan scan telat / koreksi -> dihitung ulang juga
+            basi = stale_days(data, daily_lama, tutup_lama)
+            if len(basi):
+                terbuka = pd.concat([data[data['tanggal_produksi'].isin(basi)], terbuka])
+            daily_baru, hourly_baru = build_rollups(terbuka)
+            simpan_d = (daily_lama['tanggal_produksi'] <= tutup_lama) & ~daily_lama['tanggal_produksi'].isin(basi)
+            simpan_h = (hourly_lama['tanggal_produksi'] <= tutup_lama) & ~hourly_lama['tanggal_produksi'].isin(basi)
+            daily = (pd.concat([daily_lama[simpan_d], daily_baru], ignore_index=True)
+                     .sort_values(KUNCI_HARIAN, kind='stable', ignore_index=True))
+            hourly = (pd.concat([hourly_lama[simpan_h], hourly_baru], ignore_index=True)
+                      .sort_values(KUNCI_PER_JAM, kind='stable', ignore_index=True))
+
+    os.makedirs(rollup_dir, exist_ok=True)
+    p = _paths(rollup_dir)
+    _write_atomic(daily, p['daily'])
+    _write_atomic(hourly, p['hourly'])
+    with open(p['meta'] + '.tmp', 'w') as f:
+        json.dump({'schema': ROLLUP_SCHEMA, 'sumber': sumber,
+                   'tertutup_sampai': max(tutup_baru, tutup_lama or tutup_baru).date().isoformat()}, f)
+    os.replace(p['meta'] + '.tmp', p['meta'])
+    return daily, hourly
+
+# ------------------------------------------
+# PEMBACA ROLLUP (HASIL SAMA DENGAN VERSI DATA MENTAH)
+# ------------------------------------------
+def performance_from_rollup(daily: pd.DataFrame) -> pd.DataFrame:
+    # Setara get_performance_df(data) tapi dari ribuan baris rollup, bukan jutaan baris mentah
+    per_unit = daily.groupby('unit', sort=False).agg(
+        ts_awal=('ts_awal', 'min'), ts_akhir=('ts_akhir', 'max'),
+        liter=('liter', 'sum'), pengisian=('pengisian', 'sum'),
+        hari=('tanggal_produksi', 'nunique'),
+    )
+    duration = (per_unit['ts_akhir'] - per_unit['ts_awal']).dt.total_seconds() / 3600
+    return pd.DataFrame({
+        'unit': per_unit.index,
+        'l_hr': (per_unit['liter'] / duration).where(duration > 0, 0.0).to_numpy(),
+        'refills_day': (per_unit['pengisian'] / per_unit['hari']).where(per_unit['hari'] > 0, 0.0).to_numpy(),
+    })
+
+def unit_summary(daily: pd.DataFrame) -> pd.DataFrame:
+    # Agregat per unit (index = unit) dari rollup harian, dihitung sekali per versi data.
+    # Perbandingan berapa pun unit cukup .loc[units] -> tidak scan ulang log mentah per unit.
+    per_unit = daily.groupby('unit').agg(
+        pengisian=('pengisian', 'sum'), liter=('liter', 'sum'),
+        early_refill=('early_refill', 'sum'), outlier=('outlier', 'sum'),
+        hari=('tanggal_produksi', 'nunique'),
+        ts_awal=('ts_awal', 'min'), ts_akhir=('ts_akhir', 'max'),
+    )
+    duration = (per_unit['ts_akhir'] - per_unit['ts_awal']).dt.total_seconds() / 3600
+    per_unit['l_hr'] = (per_unit['liter'] / duration).where(duration > 0, 0.0)
+    per_unit['refills_day'] = (per_unit['pengisian'] / per_unit['hari']).where(per_unit['hari'] > 0, 0.0)
+    per_unit['anomali_rate'] = per_unit['early_refill'] / per_unit['pengisian'] * 100
+    if 'hm_awal' in daily.columns:
+        # Liter/HM: solar setelah pengisian pertama di jendela dibagi selisih HM pertama -> terakhir
+        hm = daily.groupby('unit').agg(hm_awal=('hm_awal', 'min'), hm_akhir=('hm_akhir', 'max'))
+        pertama = daily.loc[daily.groupby('unit')['ts_awal'].idxmin()].set_index('unit')['liter_pertama']
+        delta_hm = hm['hm_akhir'] - hm['hm_awal']
+        per_unit['l_per_hm'] = ((per_unit['liter'] - pertama) / delta_hm).where(delta_hm > 0)
+    # Posisi relatif di armada: peringkat 1 = paling boros, rasio terhadap median armada (unit aktif)
+    aktif = per_unit['l_hr'] > 0
+    per_unit['rank_l_hr'] = per_unit['l_hr'].where(aktif).rank(ascending=False, method='min').astype('Int64')
+    per_unit['l_hr_vs_median'] = per_unit['l_hr'] / per_unit['l_hr'][aktif].median()
+    return per_unit
+
+def unit_daily_series(daily: pd.DataFrame, units: list[str]) -> pd.DataFrame:
+    # Liter per hari produksi (baris) x unit (kolom) untuk grafik tren bertumpuk
+    pilih = daily[daily['unit'].isin(units)]
+    return pilih.pivot_table(index='tanggal_produksi', columns='unit', values='liter', aggfunc='sum').reindex(columns=units)
+
+def hourly_from_rollup(hourly: pd.DataFrame, tanggal, shift: str | None = None) -> pd.DataFrame:
+    # Setara hourly_traffic(data, tanggal) (opsional hanya satu shift)
+    pilih = hourly['tanggal_produksi'] == pd.Timestamp(tanggal)
+    if shift is not None:
+        pilih &= hourly['shift_produksi'] == shift
+    hourly_counts = hourly[pilih].groupby('jam')['pengisian'].sum().reset_index(name='jumlah')
+    # Timestamp gagal parse (NaT) membuat kolom jam jadi float walau barisnya tidak ikut di-group
+    hourly_counts['jam'] = hourly_counts['jam'].astype(int)
+    hourly_counts['jam_label'] = hourly_counts['jam'].apply(lambda x: f"{x:02d}:00")
+    return hourly_counts
+
+def daily_totals(daily: pd.DataFrame) -> pd.DataFrame:
+    # Total armada per hari produksi (liter, pengisian, unit aktif)
+    return (daily.groupby('tanggal_produksi', as_index=False)
+            .agg(liter=('liter', 'sum'), pengisian=('pengisian', 'sum'),
+                 unit_aktif=('unit', 'nunique'), early_refill=('early_refill', 'sum')))
@@ -0,0 +1,54 @@
+# ==========================================
+# KALENDER SHIFT PRODUKSI
+# ==========================================
+# Hari produksi dimulai di jam mulai shift pertama, jadi shift malam yang lewat tengah malam
+# tetap masuk tanggal produksi yang sama. Cukup geser timestamp (offset vectorized) lalu
+# tentukan shift pakai searchsorted terhadap jam mulai tiap shift.
+from __future__ import annotations
+
+import datetime as dt
+import os
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine.anomalies import early_refill_mask
+
+SHIFT_CALENDAR = [('SHIFT 1', 6.0), ('SHIFT 2', 18.0)]   # (nama shift, jam mulai), urut dari shift pertama
+# Timestamp di sheet/log = jam lokal site tanpa zona waktu, sedangkan server (container, Streamlit
+# Cloud) biasanya UTC. "Sekarang" & timestamp ber-zona selalu dikonversi ke zona site dulu (env REFUEL_TZ).
+SITE_TZ = os.environ.get('REFUEL_TZ', 'Asia/Makassar')
+
+def site_now() -> pd.Timestamp:
+    # Jam dinding site sekarang, tanpa zona (sebanding langsung dengan kolom timestamp)
+    return pd.Timestamp.now(tz=SITE_TZ).tz_localize(None)
+
+def assign_shift_calendar(timestamps: pd.Series) -> dict[str, pd.Series]:
+    jam_mulai_hari = SHIFT_CALENDAR[0][1]
+    geser = timestamps - pd.Timedelta(hours=jam_mulai_hari)
+    jam_ke = (geser - geser.dt.normalize()).dt.total_seconds() / 3600
+
+    offset_shift = np.array([(mulai - jam_mulai_hari) % 24 for _, mulai in SHIFT_CALENDAR])
+    nama_shift = np.array([nama for nama, _ in SHIFT_CALENDAR], dtype=object)
+    idx_shift = np.searchsorted(offset_shift, jam_ke.fillna(0).to_numpy(), side='right') - 1
+
+    return {
+        'tanggal_produksi': geser.dt.normalize(),
+        'shift_produksi': pd.Series(nama_shift[idx_shift], index=timestamps.index).where(timestamps.notna()),
+    }
+
+def production_date(ts) -> dt.date:
+    # Tanggal produksi untuk satu timestamp (dipakai navigasi tanggal)
+    return (pd.Timestamp(ts) - pd.Timedelta(hours=SHIFT_CALENDAR[0][1])).date()
+
+def hour_order() -> list[str]:
+    # Urutan label jam dalam satu hari produksi (mulai dari jam shift pertama)
+    return [f"{(int(SHIFT_CALENDAR[0][1]) + i) % 24:02d}:00" for i in range(24)]
+
+def shift_summary(data: pd.DataFrame) -> pd.DataFrame:
+    return (data.assign(early=early_refill_mask(data))
+            .groupby(['tanggal_produksi', 'shift_produksi'], as_index=False)
+            .agg(pengisian=('quantity', 'size'), liter=('quantity', 'sum'),
+                 unit_aktif=('unit', 'nunique'), early_refill=('early', 'sum'),
+                 outlier=('is_outlier', 'sum'))
+            .sort_values(['tanggal_produksi', 'shift_produksi'], ascending=[False, True]))
@@ -0,0 +1,126 @@
+# ==========================================
+# RENTANG WAKTU: POTONG DATA PAKAI BINARY SEARCH
+# ==========================================
+# Frame siap tampil selalu urut timestamp (ingesti), jadi batas rentang cukup dicari dengan
+# searchsorted (O(log n)) lalu iloc[a:b] -> tanpa scan boolean seluruh log. Filter unit memakai
+# indeks posisi baris per unit (dibangun sekali per versi data): posisi unit yang jatuh di
+# rentang juga dicari dengan searchsorted, jadi biaya = O(log n + baris hasil). Indeks per jam
+# (jam dalam hari) bekerja sama -> klik jam di grafik tidak perlu scan .dt.hour seluruh log.
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine.shifts import SHIFT_CALENDAR, production_date
+
+PRESET_RENTANG = ['SEMUA DATA', 'HARI INI', 'SHIFT INI', '7 HARI', '30 HARI', 'CUSTOM']
+
+def production_day_start(tanggal) -> pd.Timestamp:
+    # Jam mulai hari produksi (jam mulai shift pertama) untuk satu tanggal produksi
+    return pd.Timestamp(tanggal).normalize() + pd.Timedelta(hours=SHIFT_CALENDAR[0][1])
+
+def preset_range(preset: str, acuan, custom: tuple | None = None) -> tuple[pd.Timestamp | None, pd.Timestamp | None]:
+    # Return (mulai, akhir) setengah terbuka [mulai, akhir); None = tanpa batas.
+    # acuan = scan terakhir (bukan jam server) supaya data lama/offline tetap punya "hari ini"
+    if preset == 'CUSTOM' and custom:
+        return production_day_start(custom[0]), production_day_start(custom[-1]) + pd.Timedelta(days=1)
+    if acuan is None or pd.isna(acuan) or preset not in PRESET_RENTANG[1:5]:
+        return None, None
+
+    awal_hari = production_day_start(production_date(acuan))
+    besok = awal_hari + pd.Timedelta(days=1)
+    if preset == 'HARI INI':
+        return awal_hari, besok
+    if preset == 'SHIFT INI':
+        offset = [(mulai - SHIFT_CALENDAR[0][1]) % 24 for _, mulai in SHIFT_CALENDAR] + [24.0]
+        jam_ke = (pd.Timestamp(acuan) - awal_hari) / pd.Timedelta(hours=1)
+        i = int(np.searchsorted(offset, jam_ke, side='right')) - 1
+        return awal_hari + pd.Timedelta(hours=offset[i]), awal_hari + pd.Timedelta(hours=offset[i + 1])
+    hari = 7 if preset == '7 HARI' else 30
+    return besok - pd.Timedelta(days=hari), besok
+
+def is_whole_days(mulai, akhir) -> bool:
+    # Rentang pas di batas hari produksi -> panel berbasis rollup harian tetap tepat
+    jam_mulai = pd.Timedelta(hours=SHIFT_CALENDAR[0][1])
+    return all(t is None or (pd.Timestamp(t) - jam_mulai) == (pd.Timestamp(t) - jam_mulai).normalize()
+               for t in (mulai, akhir))
+
+def time_bounds(timestamps: pd.Series, mulai=None, akhir=None) -> tuple[int, int]:
+    # Posisi baris [a, b) untuk rentang waktu; timestamps harus urut naik (NaT di akhir)
+    a = 0 if mulai is None else int(timestamps.searchsorted(pd.Timestamp(mulai), side='left'))
+    if akhir is None:
+        # Tanpa batas akhir: tetap berhenti sebelum NaT, sama seperti filter ts >= mulai
+        # (NaT diurutkan paling akhir -> posisi NaT pertama; Timestamp.max tidak muat di resolusi us/ms)
+        b = len(timestamps) if mulai is None else int(timestamps.searchsorted(pd.NaT, side='left'))
+    else:
+        b = int(timestamps.searchsorted(pd.Timestamp(akhir), side='left'))
+    return a, max(a, b)
+
+def is_time_sorted(timestamps: pd.Series) -> bool:
+    # Urut naik dengan NaT (gagal parse) semua di akhir = urutan hasil ingesti
+    valid = timestamps.notna()
+    n = int(valid.sum())
+    return bool(valid.iloc[:n].all()) and timestamps.iloc[:n].is_monotonic_increasing
+
+def build_unit_index(data: pd.DataFrame) -> dict[str, np.ndarray]:
+    # unit -> posisi baris (urut naik = urut waktu) di frame
+    if data.empty:
+        return {}
+    return data.groupby('unit', sort=False).indices
+
+def build_hour_index(data: pd.DataFrame) -> dict[int, np.ndarray]:
+    # jam (0-23) -> posisi baris (urut naik) di frame; baris NaT tidak ikut
+    if data.empty:
+        return {}
+    jam = data['timestamp'].dt.hour
+    return {int(k): v for k, v in jam.groupby(jam, sort=False).indices.items()}
+
+def select_rows(data: pd.DataFrame, mulai=None, akhir=None, unit: str | None = None,
+                unit_index: dict[str, np.ndarray] | None = None, urut: bool | None = None,
+                jam: int | None = None, hour_index: dict[int, np.ndarray] | None = None) -> pd.DataFrame:
+    # urut = hasil is_time_sorted (simpan per versi data supaya tidak dicek ulang tiap panggilan)
+    if mulai is None and akhir is None and unit is None and jam is None:
+        return data
+    if not (is_time_sorted(data['timestamp']) if urut is None else urut):
+        # Cadangan kalau frame tidak urut (mis. sumber lain): filter boolean biasa
+        pilih = pd.Series(True, index=data.index)
+        if mulai is not None:
+            pilih &= data['timestamp'] >= mulai
+        if akhir is not None:
+            pilih &= data['timestamp'] < akhir
+        if unit is not None:
+            pilih &= data['unit'] == unit
+        if jam is not None:
+            pilih &= data['timestamp'].dt.hour == jam
+        return data[pilih]
+
+    a, b = time_bounds(data['timestamp'], mulai, akhir)
+    if unit is None and jam is None:
+        return data.iloc[a:b]
+    # Posisi per unit / per jam dipotong ke [a, b); kalau dua-duanya dipilih, irisan dua daftar urut
+    posisi = None
+    for kunci, indeks, bangun in ((unit, unit_index, build_unit_index), (jam, hour_index, build_hour_index)):
+        if kunci is None:
+            continue
+        p = (indeks if indeks is not None else bangun(data)).get(kunci, np.empty(0, dtype=np.intp))
+        p = p[np.searchsorted(p, a):np.searchsorted(p, b)]
+        posisi = p if posisi is None else np.intersect1d(posisi, p, assume_unique=True)
+    return data.iloc[posisi]
+
+def rollup_range(rollup: pd.DataFrame, mulai=None, akhir=None) -> pd.DataFrame:
+    # Baris rollup (harian/per jam) yang tanggal produksinya jatuh di rentang
+    if rollup.empty or (mulai is None and akhir is None):
+        return rollup
+    tanggal = rollup['tanggal_produksi']
+    hari_awal = None if mulai is None else pd.Timestamp(production_date(mulai))
+    hari_akhir = None if akhir is None else pd.Timestamp(production_date(pd.Timestamp(akhir) - pd.Timedelta(microseconds=1)))
+    if tanggal.is_monotonic_increasing:
+        a = 0 if hari_awal is None else int(tanggal.searchsorted(hari_awal, side='left'))
+        b = len(tanggal) if hari_akhir is None else int(tanggal.searchsorted(hari_akhir, side='right'))
+        return rollup.iloc[a:max(a, b)]
+    pilih = pd.Series(True, index=rollup.index)
+    if hari_awal is not None:
+        pilih &= tanggal >= hari_awal
+    if hari_akhir is not None:
+        pilih &= tanggal <= hari_akhir
+    return rollup[pilih]
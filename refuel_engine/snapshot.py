@@ -0,0 +1,204 @@
+# ==========================================
+# SNAPSHOT BERSAMA UNTUK MODE MULTI-WORKER
+# ==========================================
+# Satu proses Streamlit per core di belakang proxy = tiap proses unduh, parse & simpan frame
+# sendiri (N salinan di RAM, N kali tarik sheet). Di mode ini SATU proses loader yang memuat +
+# membersihkan data, lalu menulis hasilnya sebagai file Arrow IPC. Worker cukup memetakan
+# file itu (mmap) -> halaman file ada sekali di page cache dan dipakai bersama semua worker.
+#
+#   <dir>/snapshot-<v>.arrow  : frame siap tampil (hasil prepare_refuel_frame)
+#   <dir>/duplikat-<v>.arrow  : scan dobel yang dibuang
+#   <dir>/karantina-<v>.arrow : baris yang gagal validasi (+ alasan)
+#   <dir>/daily-<v>.arrow, hourly-<v>.arrow : rollup (dihitung sekali oleh loader)
+#   <dir>/CURRENT             : JSON versi aktif; diganti atomik setelah semua file selesai ditulis
+#
+# Konversi ke pandas memakai split_blocks: kolom angka/teks tanpa null langsung menunjuk ke
+# buffer mmap, yang disalin hanya kolom ber-null (NaN/NaT) & bool -> +-40 MB per worker untuk
+# 1 juta baris (dulu +-180 MB), dtype tetap sama seperti frame biasa.
+#
+#   python -m refuel_engine.snapshot --source data/refuel_log --dir data/snapshot --interval 30
+#   REFUEL_SNAPSHOT_DIR=data/snapshot streamlit run dashboard.py --server.port 8501
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pyarrow as pa
+
+from refuel_engine.ingestion import CSV_URL, load_refuel_log
+from refuel_engine.metrics import data_version
+from refuel_engine.pipeline import prepare_refuel_frame
+from refuel_engine.profiling import timed
+from refuel_engine.rollup import build_rollups, update_rollups
+from refuel_engine.store import StoreReader, is_store_path
+
+logger = logging.getLogger('refuel.snapshot')
+
+SNAPSHOT_DIR = os.environ.get('REFUEL_SNAPSHOT_DIR', os.path.join('data', 'snapshot'))
+SNAPSHOT_REFRESH_DETIK = 60.0
+SNAPSHOT_SIMPAN = 2          # versi lama yang dipertahankan (worker yang masih memetakannya aman)
+BAGIAN = ['snapshot', 'duplikat', 'daily', 'hourly', 'karantina']
+
+@dataclass
+class Snapshot:
+    version: int = 0
+    data_version: tuple = (0, None, 0.0)
+    frame: pd.DataFrame = field(default_factory=pd.DataFrame)
+    duplikat: pd.DataFrame = field(default_factory=pd.DataFrame)
+    daily: pd.DataFrame = field(default_factory=pd.DataFrame)
+    hourly: pd.DataFrame = field(default_factory=pd.DataFrame)
+    karantina: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+def _current_path(snapshot_dir: str) -> str:
+    return os.path.join(snapshot_dir, 'CURRENT')
+
+def read_current(snapshot_dir: str = SNAPSHOT_DIR) -> dict:
+    try:
+        with open(_current_path(snapshot_dir)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _write_arrow(df: pd.DataFrame, path: str):
+    tabel = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = path + '.tmp'
+    with pa.OSFile(tmp, 'wb') as f, pa.ipc.new_file(f, tabel.schema) as writer:
+        writer.write_table(tabel)
+    os.replace(tmp, path)
+
+def _map_arrow(path: str) -> pd.DataFrame:
+    # Tabel tetap memegang mmap -> buffer yang tidak disalin tetap valid walau file sudah dihapus
+    tabel = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return tabel.to_pandas(split_blocks=True, self_destruct=False)
+
+# ------------------------------------------
+# SISI LOADER (SATU PROSES PER MESIN)
+# ------------------------------------------
+def publish_snapshot(df: pd.DataFrame, df_duplikat: pd.DataFrame, daily: pd.DataFrame, hourly: pd.DataFrame,
+                     df_karantina: pd.DataFrame | None = None, snapshot_dir: str = SNAPSHOT_DIR) -> int:
+    os.makedirs(snapshot_dir, exist_ok=True)
+    versi = read_current(snapshot_dir).get('version', 0) + 1
+    files = {}
+    with timed('snapshot_write'):
+        for nama, data in zip(BAGIAN, [df, df_duplikat, daily, hourly,
+                                       df.iloc[0:0] if df_karantina is None else df_karantina]):
+            files[nama] = f"{nama}-{versi}.arrow"
+            _write_arrow(data, os.path.join(snapshot_dir, files[nama]))
+
+    tmp = _current_path(snapshot_dir) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'version': versi, 'data_version': list(data_version(df)), 'files': files,
+                   'created': pd.Timestamp.now().isoformat(timespec='seconds')}, f)
+    os.replace(tmp, _current_path(snapshot_dir))
+
+    # Hapus versi lama; di Linux worker yang masih memetakan file tetap bisa membaca sampai lepas
+    for path in glob.glob(os.path.join(snapshot_dir, '*-*.arrow')):
+        try:
+            if int(os.path.basename(path).rsplit('-', 1)[1].split('.')[0]) <= versi - SNAPSHOT_SIMPAN:
+                os.remove(path)
+        except (ValueError, OSError):
+            pass
+    return versi
+
+class SnapshotLoader:
+    def __init__(self, source: str = CSV_URL, snapshot_dir: str = SNAPSHOT_DIR):
+        self.source = source
+        self.snapshot_dir = snapshot_dir
+        self._reader = StoreReader(source) if is_store_path(source) else None
+        self._versi_data = tuple(read_current(snapshot_dir).get('data_version') or ()) or None
+
+    def refresh_once(self) -> int | None:
+        # Return versi snapshot baru, None kalau data sumber tidak berubah
+        with timed('load_data'):
+            if self._reader is not None:
+                self._reader.refresh()
+                raw = self._reader.frame
+            else:
+                raw = load_refuel_log(self.source)
+        if raw.empty:
+            return None
+        with timed('prepare'):
+            df, df_duplikat, df_karantina = prepare_refuel_frame(raw)
+        if data_version(df) == self._versi_data:
+            return None
+        try:
+            daily, hourly = update_rollups(df, os.path.join(self.snapshot_dir, 'rollup'), sumber=self.source)
+        except OSError:
+            daily, hourly = build_rollups(df)
+        versi = publish_snapshot(df, df_duplikat, daily, hourly, df_karantina, self.snapshot_dir)
+        self._versi_data = data_version(df)
+        return versi
+
+    def run(self, interval: float = SNAPSHOT_REFRESH_DETIK, stop: threading.Event | None = None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                versi = self.refresh_once()
+                if versi:
+                    logger.info("snapshot versi %d ditulis ke %s", versi, self.snapshot_dir)
+            except Exception as e:
+                # Sumber gagal dibaca -> worker tetap memakai snapshot terakhir
+                logger.warning("snapshot gagal diperbarui: %s", e)
+            stop.wait(interval)
+
+# ------------------------------------------
+# SISI WORKER (TIAP PROSES STREAMLIT)
+# ------------------------------------------
+class SnapshotClient:
+    def __init__(self, snapshot_dir: str = SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self.snapshot = Snapshot()
+        self._lock = threading.Lock()
+
+    def get(self, timeout: float = 0.0) -> Snapshot:
+        # Cek CURRENT (satu baca file kecil); petakan ulang hanya kalau versinya berubah
+        batas = time.monotonic() + timeout
+        current = read_current(self.snapshot_dir)
+        while not current and time.monotonic() < batas:
+            time.sleep(0.2)
+            current = read_current(self.snapshot_dir)
+        if not current or current['version'] == self.snapshot.version:
+            return self.snapshot
+
+        with self._lock:
+            if current['version'] != self.snapshot.version:
+                try:
+                    with timed('snapshot_attach'):
+                        bagian = {nama: _map_arrow(os.path.join(self.snapshot_dir, f))
+                                  for nama, f in current['files'].items()}
+                except FileNotFoundError:
+                    # Loader baru saja mengganti versi di antara baca CURRENT & buka file -> coba lagi nanti
+                    return self.snapshot
+                self.snapshot = Snapshot(current['version'], tuple(current['data_version']),
+                                         bagian['snapshot'], bagian['duplikat'], bagian['daily'], bagian['hourly'],
+                                         bagian.get('karantina', pd.DataFrame()))
+            return self.snapshot
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Loader snapshot bersama (Arrow IPC, mmap) untuk mode multi-worker.")
+    parser.add_argument('--source', default=os.environ.get('REFUEL_SOURCE', CSV_URL))
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help=f"folder snapshot (default {SNAPSHOT_DIR})")
+    parser.add_argument('--interval', type=float, default=SNAPSHOT_REFRESH_DETIK, help="jeda refresh sumber (detik)")
+    parser.add_argument('--once', action='store_true', help="tulis satu snapshot lalu keluar")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    loader = SnapshotLoader(args.source, args.dir)
+    if args.once:
+        versi = loader.refresh_once()
+        logger.info("snapshot versi %s", versi or read_current(args.dir).get('version'))
+        return
+    try:
+        loader.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,406 @@
+# ==========================================
+# STORE LOKAL: LOG APPEND-ONLY BERSEGMEN (WAL)
+# ==========================================
+# Tujuan scan QR langsung dari aplikasi (lewat ingest_api), tanpa Google Sheet.
+# Bentuknya folder berisi segmen:
+#   <base>.log : record JSON satu per baris (hanya pernah di-append)
+#   <base>.idx : indeks jarang, tiap INDEX_SETIAP record satu entri biner
+#                (seq, posisi byte, ts maks SEBELUM posisi ini) -> struct '<QQd'
+# base = nomor urut (seq) record pertama di segmen. Segmen aktif di-rotasi kalau sudah
+# SEGMENT_MAX_BYTES; segmen lama yang kecil-kecil bisa digabung lewat compact().
+#
+# Baca "semua sejak seq X" = bisect segmen + bisect indeks + lompati < INDEX_SETIAP baris,
+# bukan scan file. "Sejak jam T" memakai ts maks berjalan di indeks (scan QR bisa telat masuk,
+# jadi urutan file tidak selalu urut waktu). Pembaca tail pakai mmap dari posisi terakhir,
+# jadi refresh = O(record baru).
+#
+# fsync per record mahal (~ms per panggilan), jadi dipakai group commit: penulis menunggu
+# sampai flusher melakukan satu fsync untuk seluruh batch (maks FSYNC_BATCH record atau
+# FSYNC_INTERVAL_DETIK), baru request dibalas -> tetap durable, throughput jauh lebih tinggi.
+#
+#   python -m refuel_engine.store stats   --store data/refuel_log
+#   python -m refuel_engine.store tail    --store data/refuel_log --since 2026-10-01T06:00
+#   python -m refuel_engine.store compact --store data/refuel_log
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from refuel_engine.ingestion import clean_refuel_frame
+from refuel_engine.profiling import timed
+
+STORE_PATH = os.environ.get('REFUEL_STORE', os.path.join('data', 'refuel_log'))
+SEGMENT_MAX_BYTES = 16 * 1024 ** 2
+INDEX_SETIAP = 256
+FSYNC_BATCH = 256
+FSYNC_INTERVAL_DETIK = 0.05
+KOLOM_STORE = ['timestamp', 'unit', 'location', 'quantity', 'hm', 'shift']
+ENTRI_INDEKS = struct.Struct('<QQd')    # seq, posisi byte, ts maks sebelum posisi (epoch detik)
+
+def is_store_path(source) -> bool:
+    return os.path.isdir(str(source))
+
+def _ts_epoch(record: dict) -> float:
+    try:
+        return datetime.fromisoformat(record['timestamp']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return float('-inf')
+
+# ------------------------------------------
+# SEGMEN & INDEKS
+# ------------------------------------------
+def _seg_path(path: str, base: int, ext: str) -> str:
+    return os.path.join(path, f"{base:020d}.{ext}")
+
+def list_segments(path: str) -> list[int]:
+    if not os.path.isdir(path):
+        return []
+    return sorted(int(f[:-4]) for f in os.listdir(path) if f.endswith('.log') and f[:-4].isdigit())
+
+def read_index(path: str, base: int) -> list[tuple[int, int, float]]:
+    try:
+        with open(_seg_path(path, base, 'idx'), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [(base, 0, float('-inf'))]
+    n = len(data) // ENTRI_INDEKS.size     # entri terakhir yang terpotong (crash) diabaikan
+    return [ENTRI_INDEKS.unpack_from(data, i * ENTRI_INDEKS.size) for i in range(n)] or [(base, 0, float('-inf'))]
+
+def _read_bytes(path: str, base: int, pos: int) -> bytes:
+    # Ambil byte dari `pos` s/d akhir segmen lewat mmap (hanya bagian baru yang disalin)
+    with open(_seg_path(path, base, 'log'), 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= pos:
+            return b''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return m[pos:size]
+
+def _skip_lines(data: bytes, n: int) -> int:
+    pos = 0
+    for _ in range(n):
+        pos = data.find(b'\n', pos) + 1
+        if pos == 0:
+            return len(data)
+    return pos
+
+def _segment_end(path: str, base: int) -> int:
+    # seq setelah record terakhir di segmen (entri indeks terakhir + baris sesudahnya)
+    seq, pos, _ = read_index(path, base)[-1]
+    return seq + _read_bytes(path, base, pos).count(b'\n')
+
+def seek_seq(path: str, seq: int) -> tuple[int, int]:
+    # (base segmen, posisi byte) tempat record `seq` berada
+    segments = list_segments(path)
+    if not segments:
+        return 0, 0
+    base = segments[max(bisect.bisect_right(segments, seq) - 1, 0)]
+    index = read_index(path, base)
+    e_seq, e_pos, _ = index[max(bisect.bisect_right([e[0] for e in index], seq) - 1, 0)]
+    lewati = max(seq - e_seq, 0)
+    if lewati == 0:
+        return base, e_pos
+    return base, e_pos + _skip_lines(_read_bytes(path, base, e_pos), lewati)
+
+def seek_time(path: str, ts: float) -> tuple[int, int, int]:
+    # (base, posisi, seq) terjauh yang semua record SEBELUMNYA pasti lebih awal dari `ts`
+    mulai = None
+    for base in list_segments(path):
+        index = read_index(path, base)
+        batas = bisect.bisect_left([e[2] for e in index], ts)    # ts maks berjalan -> monoton naik
+        if batas == 0:
+            break
+        e_seq, e_pos, _ = index[batas - 1]
+        mulai = (base, e_pos, e_seq)
+        if batas < len(index):
+            break
+    return mulai or (0, 0, 0)
+
+def _remove_segment(path: str, base: int):
+    for ext in ('log', 'idx'):
+        try:
+            os.remove(_seg_path(path, base, ext))
+        except FileNotFoundError:
+            pass
+
+def _drop_leftovers(path: str):
+    # Sisa compaction yang terputus: segmen yang isinya sudah tercakup segmen sebelumnya
+    akhir = None
+    for base in list_segments(path):
+        if akhir is not None and base < akhir:
+            _remove_segment(path, base)
+            continue
+        akhir = _segment_end(path, base)
+
+# ------------------------------------------
+# PENULIS (SATU PROSES: ingest_api)
+# ------------------------------------------
+class AppendStore:
+    def __init__(self, path: str = STORE_PATH, batch: int = FSYNC_BATCH, interval: float = FSYNC_INTERVAL_DETIK,
+                 segment_bytes: int = SEGMENT_MAX_BYTES):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._durable = threading.Condition(self._lock)
+        self._recover()
+        self._seq_synced = self.next_seq    # semua yang ada di disk saat start dianggap durable
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='refuel-store-fsync')
+        self._flusher.start()
+
+    def _recover(self):
+        _drop_leftovers(self.path)
+        segments = list_segments(self.path)
+        if not segments:
+            self._open_segment(0, float('-inf'))
+            return
+        base = segments[-1]
+        log_path = _seg_path(self.path, base, 'log')
+        size = os.path.getsize(log_path)
+        # Entri indeks yang menunjuk melewati akhir file (log belum sempat fsync) dibuang
+        index = [e for e in read_index(self.path, base) if e[1] <= size] or [(base, 0, float('-inf'))]
+        seq, pos, runmax = index[-1]
+        data = _read_bytes(self.path, base, pos)
+        utuh = data.rfind(b'\n') + 1
+        if pos + utuh < size:
+            # Baris terakhir terpotong (crash saat menulis) -> buang
+            with open(log_path, 'r+b') as f:
+                f.truncate(pos + utuh)
+        lines = data[:utuh].splitlines()
+        for baris in lines:
+            runmax = max(runmax, _ts_epoch(json.loads(baris)))
+
+        with open(_seg_path(self.path, base, 'idx'), 'wb') as f:
+            f.write(b''.join(ENTRI_INDEKS.pack(*e) for e in index))
+        self._base = base
+        self._f = open(log_path, 'ab')
+        self._idx = open(_seg_path(self.path, base, 'idx'), 'ab')
+        self._pos = pos + utuh
+        self.next_seq = seq + len(lines)
+        self._n_since_idx = len(lines)
+        self._runmax = runmax
+
+    def _open_segment(self, base: int, runmax: float):
+        self._base = base
+        self._f = open(_seg_path(self.path, base, 'log'), 'ab')
+        self._idx = open(_seg_path(self.path, base, 'idx'), 'ab')
+        self._idx.write(ENTRI_INDEKS.pack(base, 0, runmax))
+        self._pos = 0
+        self.next_seq = base
+        self._n_since_idx = 0
+        self._runmax = runmax
+
+    def _rotate(self):
+        # Dipanggil dengan lock dipegang: segmen lama di-fsync & ditutup, mulai segmen baru
+        for f in (self._f, self._idx):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        self._open_segment(self.next_seq, self._runmax)
+
+    def append(self, records: list[dict], durable: bool = True) -> int:
+        lines = [json.dumps(r, separators=(',', ':')).encode() + b'\n' for r in records]
+        with self._lock:
+            for record, line in zip(records, lines):
+                if self._pos >= self.segment_bytes:
+                    self._rotate()
+                if self._n_since_idx >= INDEX_SETIAP:
+                    self._idx.write(ENTRI_INDEKS.pack(self.next_seq, self._pos, self._runmax))
+                    self._n_since_idx = 0
+                self._f.write(line)
+                self._pos += len(line)
+                self.next_seq += 1
+                self._n_since_idx += 1
+                self._runmax = max(self._runmax, _ts_epoch(record))
+            seq = self.next_seq
+            if seq - self._seq_synced >= self.batch:
+                self._durable.notify_all()
+            if durable:
+                self._durable.wait_for(lambda: self._seq_synced >= seq or self._stop.is_set())
+        return len(records)
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                self._durable.wait_for(lambda: self.next_seq - self._seq_synced >= self.batch
+                                       or self._stop.is_set(), timeout=self.interval)
+                target = self.next_seq
+                if target == self._seq_synced:
+                    continue
+                self._f.flush()
+                self._idx.flush()
+                fds = (self._f.fileno(), self._idx.fileno())
+            # fsync di luar lock: penulis lain tetap bisa menulis ke buffer selama disk bekerja
+            with timed('store_fsync'):
+                for fd in fds:
+                    try:
+                        os.fsync(fd)
+                    except OSError:
+                        pass    # segmen sudah di-rotasi (rotasi selalu fsync sebelum menutup)
+            with self._lock:
+                self._seq_synced = max(self._seq_synced, target)
+                self._durable.notify_all()
+
+    def close(self):
+        with self._lock:
+            for f in (self._f, self._idx):
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+            self._seq_synced = self.next_seq
+            self._stop.set()
+            self._durable.notify_all()
+
+# ------------------------------------------
+# PEMBACA
+# ------------------------------------------
+def read_records(path: str, seq: int = 0) -> tuple[list[dict], int]:
+    # Semua record mulai nomor urut `seq`; return (records, seq berikutnya)
+    base, pos = seek_seq(path, seq)
+    records = []
+    for b in list_segments(path):
+        if b < base:
+            continue
+        data = _read_bytes(path, b, pos if b == base else 0)
+        data = data[:data.rfind(b'\n') + 1]
+        records.extend(json.loads(baris) for baris in data.splitlines())
+    return records, seq + len(records)
+
+def read_since_time(path: str, since: datetime) -> list[dict]:
+    # Record dengan timestamp >= since, mulai baca dari posisi indeks (bukan dari awal log)
+    ts = since.timestamp()
+    _, _, seq = seek_time(path, ts)
+    records, _ = read_records(path, seq)
+    return [r for r in records if _ts_epoch(r) >= ts]
+
+def records_to_frame(records: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(records, columns=KOLOM_STORE)
+    # Timestamp di store selalu ISO (sudah dinormalisasi ingest_api) -> parse cepat tanpa tebak format
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce')
+    return df
+
+def read_store(path: str = STORE_PATH) -> pd.DataFrame:
+    return records_to_frame(read_records(path)[0])
+
+class StoreReader:
+    # Frame bersih yang di-update incremental: tiap refresh hanya membaca & membersihkan record baru
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self.seq = 0
+        self._base, self._pos = 0, 0
+        self.frame = clean_refuel_frame(records_to_frame([]))
+        self._lock = threading.Lock()   # satu reader dipakai bersama banyak sesi dashboard
+
+    def _read_new(self) -> list[dict]:
+        segments = list_segments(self.path)
+        if not segments:
+            return []
+        if self._base not in segments:
+            # Segmen hilang karena compaction -> cari ulang posisi dari nomor urut
+            self._base, self._pos = seek_seq(self.path, self.seq)
+        records = []
+        for b in segments[segments.index(self._base):]:
+            if b != self._base:
+                self._base, self._pos = b, 0
+            data = _read_bytes(self.path, b, self._pos)
+            utuh = data.rfind(b'\n') + 1
+            records.extend(json.loads(baris) for baris in data[:utuh].splitlines())
+            self._pos += utuh
+        self.seq += len(records)
+        return records
+
+    def refresh(self) -> pd.DataFrame:
+        # Return record baru (sudah bersih); self.frame ikut bertambah
+        with self._lock:
+            with timed('fetch'):
+                records = self._read_new()
+            if not records:
+                return self.frame.iloc[0:0]
+            baru = clean_refuel_frame(records_to_frame(records))
+            frame = baru if self.frame.empty else pd.concat([self.frame, baru], ignore_index=True)
+            if not frame['timestamp'].is_monotonic_increasing:
+                frame = frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+            self.frame = frame
+            return baru
+
+# ------------------------------------------
+# COMPACTION: GABUNG SEGMEN TERTUTUP YANG KECIL
+# ------------------------------------------
+def compact(path: str = STORE_PATH, target_bytes: int = SEGMENT_MAX_BYTES) -> int:
+    # Segmen aktif (terakhir) tidak disentuh. Return jumlah segmen yang hilang karena digabung.
+    _drop_leftovers(path)
+    grup_semua, grup, ukuran = [], [], 0
+    for base in list_segments(path)[:-1]:
+        size = os.path.getsize(_seg_path(path, base, 'log'))
+        if grup and ukuran + size > target_bytes:
+            grup_semua.append(grup)
+            grup, ukuran = [], 0
+        grup.append(base)
+        ukuran += size
+    grup_semua.append(grup)
+
+    hilang = 0
+    for grup in (g for g in grup_semua if len(g) > 1):
+        base = grup[0]
+        runmax = read_index(path, base)[0][2]
+        seq, pos, n_since = base, 0, 0
+        tmp_log, tmp_idx = _seg_path(path, base, 'log.tmp'), _seg_path(path, base, 'idx.tmp')
+        with open(tmp_log, 'wb') as f_log, open(tmp_idx, 'wb') as f_idx:
+            f_idx.write(ENTRI_INDEKS.pack(base, 0, runmax))
+            for b in grup:
+                data = _read_bytes(path, b, 0)
+                for baris in data[:data.rfind(b'\n') + 1].splitlines(keepends=True):
+                    if n_since >= INDEX_SETIAP:
+                        f_idx.write(ENTRI_INDEKS.pack(seq, pos, runmax))
+                        n_since = 0
+                    f_log.write(baris)
+                    pos += len(baris)
+                    seq += 1
+                    n_since += 1
+                    runmax = max(runmax, _ts_epoch(json.loads(baris)))
+            for f in (f_log, f_idx):
+                f.flush()
+                os.fsync(f.fileno())
+        # Ganti segmen pertama dulu, baru hapus sisanya (crash di tengah -> dibersihkan _drop_leftovers)
+        os.replace(tmp_idx, _seg_path(path, base, 'idx'))
+        os.replace(tmp_log, _seg_path(path, base, 'log'))
+        for b in grup[1:]:
+            _remove_segment(path, b)
+        hilang += len(grup) - 1
+    return hilang
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Alat bantu log refueling lokal (stats / tail / compact).")
+    parser.add_argument('aksi', choices=['stats', 'tail', 'compact'])
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--since', help="tail: hanya record dengan timestamp >= ini (ISO, jam lokal)")
+    parser.add_argument('--seq', type=int, default=0, help="tail: mulai dari nomor urut ini")
+    args = parser.parse_args(argv)
+
+    if args.aksi == 'stats':
+        for base in list_segments(args.store):
+            size = os.path.getsize(_seg_path(args.store, base, 'log'))
+            print(f"{base:>12}  {size / 1024 ** 2:8.2f} MB  {len(read_index(args.store, base)):6d} entri indeks  "
+                  f"s/d seq {_segment_end(args.store, base)}")
+    elif args.aksi == 'tail':
+        if args.since:
+            records = read_since_time(args.store, datetime.fromisoformat(args.since))
+        else:
+            records = read_records(args.store, args.seq)[0]
+        for r in records:
+            print(json.dumps(r))
+    else:
+        print(f"{compact(args.store)} segmen digabung")
+
+if __name__ == '__main__':
+    main()
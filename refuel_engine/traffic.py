@@ -0,0 +1,128 @@
+# ==========================================
+# TRAFFIC ANTREAN & SIMULASI BAY
+# ==========================================
+from __future__ import annotations
+
+import heapq
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine.shifts import SHIFT_CALENDAR, production_date
+
+def hourly_traffic(data: pd.DataFrame, tanggal) -> pd.DataFrame:
+    # Jumlah unit masuk per jam pada satu tanggal produksi
+    df_daily = data[data['tanggal_produksi'] == pd.Timestamp(tanggal)]
+    hourly_counts = df_daily.groupby(df_daily['timestamp'].dt.hour).size().rename_axis('jam').reset_index(name='jumlah')
+    hourly_counts['jam_label'] = hourly_counts['jam'].apply(lambda x: f"{x:02d}:00")
+    return hourly_counts
+
+# ------------------------------------------
+# MATRIKS TRAFFIC HARI x JAM (UNTUK HEATMAP)
+# ------------------------------------------
+# Satu array padat [hari produksi x 24 slot jam] dari rollup per jam, dibangun dengan satu
+# np.bincount (indeks = hari_ke * 24 + slot). Slot 0 = jam mulai shift pertama, jadi urutan
+# kolom sama dengan hour_order(). Potong rentang = slice baris; payload dibatasi dengan
+# menggabung beberapa hari per kolom kalau rentangnya terlalu panjang.
+HEATMAP_MAKS_KOLOM = 120
+
+def traffic_matrix(hourly: pd.DataFrame) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    valid = hourly['tanggal_produksi'].notna() & hourly['jam'].notna() if not hourly.empty else []
+    if hourly.empty or not valid.any():
+        return pd.DatetimeIndex([]), np.zeros((0, 24), dtype=np.int64)
+    tanggal = hourly['tanggal_produksi'][valid]
+    hari0 = tanggal.min()
+    n_hari = (tanggal.max() - hari0).days + 1
+    hari_ke = ((tanggal - hari0) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+    slot = (hourly['jam'][valid].to_numpy(dtype=np.int64) - int(SHIFT_CALENDAR[0][1])) % 24
+    counts = np.bincount(hari_ke * 24 + slot, weights=hourly['pengisian'][valid].to_numpy(dtype=float),
+                         minlength=n_hari * 24)
+    return pd.date_range(hari0, periods=n_hari, freq='D'), counts.reshape(n_hari, 24).round().astype(np.int64)
+
+def slice_matrix(tanggal: pd.DatetimeIndex, counts: np.ndarray, mulai=None, akhir=None,
+                 shift: str | None = None) -> tuple[pd.DatetimeIndex, np.ndarray, list[int]]:
+    # Baris = hari produksi di rentang (searchsorted), kolom = slot jam (opsional hanya satu shift)
+    a = 0 if mulai is None else int(tanggal.searchsorted(pd.Timestamp(production_date(mulai))))
+    b = len(tanggal) if akhir is None else int(tanggal.searchsorted(
+        pd.Timestamp(production_date(pd.Timestamp(akhir) - pd.Timedelta(microseconds=1))), side='right'))
+    slots = list(range(24))
+    if shift is not None:
+        offset = [(jam - SHIFT_CALENDAR[0][1]) % 24 for _, jam in SHIFT_CALENDAR] + [24.0]
+        i = [nama for nama, _ in SHIFT_CALENDAR].index(shift)
+        slots = list(range(int(offset[i]), int(offset[i + 1])))
+    return tanggal[a:b], counts[a:b][:, slots], slots
+
+def bucket_days(tanggal: pd.DatetimeIndex, counts: np.ndarray, maks_kolom: int = HEATMAP_MAKS_KOLOM
+                ) -> tuple[pd.DatetimeIndex, np.ndarray, int]:
+    # Rentang panjang -> gabung `hari_per_kolom` hari jadi satu kolom (rata-rata per hari),
+    # supaya ukuran figure tetap <= maks_kolom x 24 sel berapa pun panjang datanya
+    hari_per_kolom = max(1, -(-len(tanggal) // maks_kolom))
+    if hari_per_kolom == 1:
+        return tanggal, counts.astype(float), 1
+    n_kolom = -(-len(tanggal) // hari_per_kolom)
+    pad = n_kolom * hari_per_kolom - len(tanggal)
+    isi = np.concatenate([counts, np.zeros((pad, counts.shape[1]), dtype=counts.dtype)])
+    jumlah = isi.reshape(n_kolom, hari_per_kolom, counts.shape[1]).sum(axis=1)
+    n_hari = np.full(n_kolom, hari_per_kolom)
+    n_hari[-1] -= pad
+    return tanggal[::hari_per_kolom], jumlah / n_hari[:, None], hari_per_kolom
+
+# ------------------------------------------
+# SIMULASI ANTREAN BAY (WHAT-IF KAPASITAS)
+# ------------------------------------------
+# Event-driven FIFO: tiap unit datang sesuai timestamp scan, masuk bay yang paling cepat kosong.
+# Waktu mulai isi selalu naik (FIFO), jadi panjang antrean & utilisasi bisa dihitung vectorized
+# pakai searchsorted setelah simulasi, tanpa loop per jam.
+JUMLAH_BAY = 2
+DURASI_SERVIS_MENIT = 8.0          # hasil observasi masuk bay s/d keluar bay
+DURASI_SERVIS_OBSERVASI = []       # isi daftar durasi (menit) hasil stopwatch kalau mau pakai distribusi
+
+def simulate_bay_queue(arrivals: pd.Series, n_bays: int, service_min: float,
+                       service_samples: Sequence[float] | None = None, seed: int = 39) -> pd.DataFrame:
+    # Satuan internal: menit sejak epoch (float) supaya gampang dihitung
+    t = arrivals.dropna().sort_values().to_numpy(dtype='datetime64[ns]').astype('int64') / 6e10
+    n = len(t)
+    if n == 0:
+        return pd.DataFrame(columns=['jam', 'kedatangan', 'rata_tunggu', 'maks_tunggu', 'maks_antrean', 'utilisasi'])
+
+    if service_samples:
+        durasi = np.random.default_rng(seed).choice(np.asarray(service_samples, dtype=float), size=n)
+    else:
+        durasi = np.full(n, float(service_min))
+
+    bay_kosong = [float('-inf')] * int(n_bays)
+    mulai = np.empty(n)
+    for i in range(n):
+        mulai[i] = max(t[i], bay_kosong[0])
+        heapq.heapreplace(bay_kosong, mulai[i] + durasi[i])
+    selesai = mulai + durasi
+    tunggu = mulai - t
+
+    # Panjang antrean saat unit i datang = unit sebelumnya yang belum mulai diisi
+    idx = np.arange(n)
+    antrean = idx - np.minimum(idx, np.searchsorted(mulai, t, side='right'))
+
+    # Utilisasi per jam: B(x) = total menit bay terpakai s/d x, lalu selisihkan antar batas jam
+    jam_awal = np.floor(t[0] / 60) * 60
+    batas = np.arange(jam_awal, selesai.max() + 60, 60)
+    selesai_urut = np.sort(selesai)
+    cum_mulai = np.concatenate([[0.0], np.cumsum(mulai)])
+    cum_selesai = np.concatenate([[0.0], np.cumsum(selesai_urut)])
+    k_mulai = np.searchsorted(mulai, batas, side='right')
+    k_selesai = np.searchsorted(selesai_urut, batas, side='right')
+    terpakai = (batas * k_mulai - cum_mulai[k_mulai]) - (batas * k_selesai - cum_selesai[k_selesai])
+    util = np.diff(terpakai) / (60 * n_bays)
+
+    per_unit = pd.DataFrame({
+        'jam': pd.to_datetime(np.floor(t / 60) * 3.6e12, unit='ns'),
+        'tunggu': tunggu, 'antrean': antrean,
+    })
+    hourly = per_unit.groupby('jam').agg(
+        kedatangan=('tunggu', 'size'), rata_tunggu=('tunggu', 'mean'),
+        maks_tunggu=('tunggu', 'max'), maks_antrean=('antrean', 'max'),
+    )
+    semua_jam = pd.to_datetime(batas[:-1] * 6e10, unit='ns')
+    hourly = hourly.reindex(semua_jam, fill_value=0)
+    hourly['utilisasi'] = util
+    return hourly.rename_axis('jam').reset_index()
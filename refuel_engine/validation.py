@@ -0,0 +1,189 @@
+# ==========================================
+# VALIDASI KUALITAS DATA + KARANTINA
+# ==========================================
+# Dijalankan setelah parse & paksa tipe (ingestion), sebelum dedup. Semua aturan dicek sekaligus
+# untuk seluruh frame (operasi kolom, tanpa loop per baris). Baris yang gagal masuk tabel
+# karantina beserta alasannya, jadi metrik hilir hanya melihat data yang bersih & bertipe benar:
+#   - timestamp tidak terbaca (NaT) / di masa depan
+#   - quantity kosong, <= 0 atau melebihi kapasitas tangki unit
+#   - kode unit kosong / tidak dikenal, lokasi tidak dikenal (hanya kalau daftar master diisi)
+#   - HM mundur / lompat tidak wajar di urutan HM unit (lihat hm_status) -> baris TIDAK dibuang
+#     (liter yang keluar tetap nyata), hanya HM-nya dikosongkan supaya hitungan L/HM tidak rusak
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from refuel_engine.shifts import site_now
+
+KAPASITAS_TANGKI_DEFAULT_L = 1000.0            # sama dengan batas ingest_api (tangki terbesar < 1000 L)
+KAPASITAS_TANGKI_L: dict[str, float] = {}      # awalan kode unit -> kapasitas tangki, mis. {'DT': 600.0}
+TOLERANSI_MASA_DEPAN = pd.Timedelta(minutes=10)
+HM_TOLERANSI_MUNDUR = 0.5                      # jam; selisih kecil = salah baca/pembulatan
+HM_TOLERANSI_LOMPAT = 1.0                      # jam; HM boleh sedikit mendahului jam dinding (jam HP/pembulatan)
+HM_LANGKAH_KALI = 5.0                          # lompat juga harus > N x langkah HM median unit itu
+
+# Status pembacaan HM per baris (kolom hm_status, int8)
+HM_OK, HM_KOSONG, HM_MUNDUR, HM_LOMPAT = 0, 1, 2, 3
+HM_STATUS = {HM_OK: 'OK', HM_KOSONG: 'KOSONG', HM_MUNDUR: 'MUNDUR', HM_LOMPAT: 'LOMPAT'}
+
+def _daftar_env(nama: str) -> set[str]:
+    return {x.strip().upper() for x in os.environ.get(nama, '').split(',') if x.strip()}
+
+# Daftar master (opsional), dipisah koma: REFUEL_UNIT_DIKENAL=DT001,DT002  REFUEL_LOKASI_DIKENAL=PIT A,PIT B
+UNIT_DIKENAL = _daftar_env('REFUEL_UNIT_DIKENAL')
+LOKASI_DIKENAL = _daftar_env('REFUEL_LOKASI_DIKENAL')
+
+def tank_capacity(units: pd.Series) -> np.ndarray:
+    # Kapasitas per baris dari awalan kode unit; awalan terpanjang yang cocok menang
+    kapasitas = np.full(len(units), KAPASITAS_TANGKI_DEFAULT_L)
+    for awalan, liter in sorted(KAPASITAS_TANGKI_L.items(), key=lambda x: len(x[0])):
+        kapasitas[units.str.startswith(awalan).to_numpy(dtype=bool, na_value=False)] = liter
+    return kapasitas
+
+# ------------------------------------------
+# URUTAN HM PER UNIT (ODOMETER MESIN)
+# ------------------------------------------
+# Satu sort (unit, waktu) atas pembacaan yang terisi, lalu selisih ke pembacaan sebelumnya di
+# unit yang sama (tanpa groupby: cukup bandingkan kode unit dengan baris tetangga):
+#   - MUNDUR : HM turun lebih dari toleransi
+#   - LOMPAT : HM naik lebih cepat dari jam dinding (mesin tidak bisa jalan > 1 jam per jam) DAN
+#              jauh di atas langkah HM median unit itu (kebiasaan unit, tahan jam HP yang meleset)
+# Satu salah ketik membuat DUA selisih aneh (ke baris itu & dari baris itu). Kalau tetangga
+# kiri-kanannya saling cocok, hanya baris salah ketik yang ditandai, tetangganya tidak.
+def hm_status(data: pd.DataFrame, toleransi_mundur: float = HM_TOLERANSI_MUNDUR,
+              toleransi_lompat: float = HM_TOLERANSI_LOMPAT) -> pd.Series:
+    status = pd.Series(np.int8(HM_OK), index=data.index, dtype='int8')
+    if data.empty or 'hm' not in data.columns:
+        return status
+    terisi = data['hm'].notna().to_numpy()
+    status[~terisi] = HM_KOSONG
+    baca = data.loc[terisi, ['unit', 'timestamp', 'hm']]
+    if len(baca) < 2:
+        return status
+
+    # Urut (unit, waktu) lewat kode integer unit; log hasil ingesti sudah urut waktu -> cukup argsort stabil
+    kode_unit = pd.factorize(baca['unit'])[0]
+    ts = baca['timestamp'].to_numpy(dtype='datetime64[ns]')
+    urutan = (np.argsort(kode_unit, kind='stable') if baca['timestamp'].is_monotonic_increasing
+              else np.lexsort((ts, kode_unit)))
+    unit = kode_unit[urutan]
+    hm = baca['hm'].to_numpy(dtype=float)[urutan]
+    jam = (ts[urutan] - ts[urutan].min()) / np.timedelta64(1, 'h')
+    ada_kiri = np.r_[False, unit[1:] == unit[:-1]]
+    ada_kanan = np.r_[ada_kiri[1:], False]
+
+    selisih = np.where(ada_kiri, hm - np.r_[np.nan, hm[:-1]], np.nan)
+    durasi = np.where(ada_kiri, jam - np.r_[np.nan, jam[:-1]], np.nan)
+    median_langkah = pd.Series(np.where(selisih > 0, selisih, np.nan)).groupby(unit, sort=False).transform('median').to_numpy()
+    batas_lompat = np.fmax(durasi, HM_LANGKAH_KALI * median_langkah) + toleransi_lompat
+    mundur = selisih < -toleransi_mundur
+    lompat = selisih > batas_lompat
+
+    # Tetangga kiri (i-1) & kanan (i+1) saling cocok -> yang salah baris i sendiri
+    apit = ada_kiri & ada_kanan
+    selisih_apit = np.r_[np.nan, hm[2:] - hm[:-2], np.nan]
+    durasi_apit = np.r_[np.nan, jam[2:] - jam[:-2], np.nan]
+    batas_apit = np.fmax(durasi_apit, 2 * HM_LANGKAH_KALI * median_langkah) + toleransi_lompat
+    apit_cocok = apit & (selisih_apit >= -toleransi_mundur) & (selisih_apit <= batas_apit)
+    salah_rendah = mundur & np.r_[lompat[1:], False] & apit_cocok     # i kekecilan -> i+1 bukan lompat
+    lompat &= ~np.r_[False, salah_rendah[:-1]]
+    salah_tinggi = lompat & np.r_[mundur[1:], False] & apit_cocok     # i kebesaran -> i+1 bukan mundur
+    mundur &= ~np.r_[False, salah_tinggi[:-1]]
+
+    kode = np.where(mundur, HM_MUNDUR, np.where(lompat, HM_LOMPAT, HM_OK)).astype('int8')
+    status.iloc[np.flatnonzero(terisi)[urutan]] = kode
+    return status
+
+def hm_rollback_mask(data: pd.DataFrame, toleransi: float = HM_TOLERANSI_MUNDUR) -> pd.Series:
+    # HM lebih kecil dari pembacaan sebelumnya di unit yang sama (urut waktu)
+    return hm_status(data, toleransi_mundur=toleransi) == HM_MUNDUR
+
+def hm_health(data: pd.DataFrame) -> pd.DataFrame:
+    # Skor kesehatan data HM per unit: % pembacaan yang terisi & wajar (100 = semua OK)
+    kolom = ['pembacaan', 'hm_kosong', 'hm_mundur', 'hm_lompat', 'skor']
+    if data.empty:
+        return pd.DataFrame(columns=kolom).rename_axis('unit')
+    status = data['hm_status'] if 'hm_status' in data.columns else hm_status(data)
+    hitung = status.groupby(data['unit'], sort=False).value_counts().unstack(fill_value=0)
+    hitung = hitung.reindex(columns=list(HM_STATUS), fill_value=0)
+    hasil = pd.DataFrame({
+        'pembacaan': hitung.sum(axis=1),
+        'hm_kosong': hitung[HM_KOSONG],
+        'hm_mundur': hitung[HM_MUNDUR],
+        'hm_lompat': hitung[HM_LOMPAT],
+    })
+    hasil['skor'] = (100 * hitung[HM_OK] / hasil['pembacaan']).round(1)
+    return hasil.sort_values(['skor', 'pembacaan'], ascending=[True, False])[kolom]
+
+def validation_rules(data: pd.DataFrame, now=None) -> dict[str, np.ndarray]:
+    # alasan -> mask baris yang gagal (True = gagal); semua aturan di sini membuang baris
+    # now = jam site (timestamp sheet tanpa zona), bukan jam server yang bisa UTC
+    now = site_now() if now is None else pd.Timestamp(now)
+    unit = data['unit'].astype('string').str.strip().str.upper()
+    unit_kosong = unit.isna() | (unit == '')
+    aturan = {
+        'timestamp tidak terbaca': data['timestamp'].isna(),
+        'timestamp di masa depan': data['timestamp'] > now + TOLERANSI_MASA_DEPAN,
+        'quantity kosong / bukan angka': data['quantity'].isna(),
+        'quantity <= 0': data['quantity'] <= 0,
+        'quantity melebihi kapasitas tangki': data['quantity'] > tank_capacity(unit),
+        'kode unit kosong': unit_kosong,
+    }
+    if UNIT_DIKENAL:
+        # Tanpa daftar master tidak ada tebakan pola kode: HD785-7, EX2500-6, VOLVO01 semua sah
+        aturan['kode unit tidak dikenal'] = ~unit_kosong & ~unit.isin(UNIT_DIKENAL)
+    if LOKASI_DIKENAL and 'location' in data.columns:
+        aturan['lokasi tidak dikenal'] = ~data['location'].astype('string').str.strip().str.upper().isin(LOKASI_DIKENAL)
+    return {alasan: np.asarray(mask.fillna(False) if isinstance(mask, pd.Series) else mask, dtype=bool)
+            for alasan, mask in aturan.items()}
+
+def validate_refuel_frame(data: pd.DataFrame, now=None,
+                          konteks: pd.DataFrame | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Return (frame bersih, karantina). Karantina = baris asli + kolom alasan & tindakan.
+    # konteks = pembacaan terakhir per unit yang sudah divalidasi (mode live: data = batch baru saja),
+    # ikut diurutkan bersama supaya HM baris baru dibandingkan dengan HM sebelumnya; statusnya tidak diubah
+    kosong = data.iloc[0:0].assign(alasan=pd.Series(dtype=str), tindakan=pd.Series(dtype=str))
+    if data.empty:
+        return data, kosong
+
+    aturan = validation_rules(data, now)
+    buang = np.logical_or.reduce(list(aturan.values()))
+    # HM dicek hanya di baris yang lolos aturan lain (NaT / unit kosong tidak ikut urutan HM)
+    status = np.full(len(data), HM_OK, dtype='int8')
+    if 'hm' in data.columns:
+        if konteks is None or konteks.empty:
+            status[~buang] = hm_status(data[~buang]).to_numpy()
+        else:
+            kolom = ['unit', 'timestamp', 'hm']
+            gabung = pd.concat([konteks[kolom], data.loc[~buang, kolom]], ignore_index=True)
+            status[~buang] = hm_status(gabung).to_numpy()[len(konteks):]
+    aturan['HM mundur'] = status == HM_MUNDUR
+    aturan['HM lompat'] = status == HM_LOMPAT
+    hm_rusak = aturan['HM mundur'] | aturan['HM lompat']
+
+    gagal = buang | hm_rusak
+    if not gagal.any():
+        return (data.assign(hm_status=status) if 'hm' in data.columns else data), kosong
+
+    # Susun teks alasan hanya untuk baris yang gagal (satu operasi per aturan, bukan per baris)
+    alasan = np.full(int(gagal.sum()), '', dtype=object)
+    for teks, mask in aturan.items():
+        pilih = mask[gagal]
+        alasan[pilih] = alasan[pilih] + np.where(alasan[pilih] == '', '', '; ') + teks
+    karantina = data[gagal].assign(alasan=alasan, tindakan=np.where(buang[gagal], 'DIBUANG', 'HM DIKOSONGKAN'))
+
+    bersih = data[~buang] if buang.any() else data
+    if 'hm' in data.columns:
+        # hm_status tetap disimpan (skor kesehatan HM), HM yang rusak dikosongkan
+        bersih = bersih.assign(hm=bersih['hm'].mask(hm_rusak[~buang]), hm_status=status[~buang])
+    return bersih, karantina
+
+def quarantine_summary(karantina: pd.DataFrame) -> pd.DataFrame:
+    # Jumlah baris per alasan (satu baris bisa punya beberapa alasan)
+    if karantina.empty:
+        return pd.DataFrame({'alasan': pd.Series(dtype=str), 'baris': pd.Series(dtype=int)})
+    hitung = karantina['alasan'].str.split('; ').explode().value_counts()
+    return hitung.rename_axis('alasan').reset_index(name='baris')
@@ -0,0 +1,7 @@
+import sys
+
+from refuel_engine.report import main
+
+if __name__ == '__main__':
+    # Laporan batch tanpa Streamlit: python report.py --start 2026-09-01 --end 2026-09-30
+    sys.exit(main())
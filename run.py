@@ -1,13 +1,44 @@
 import sys
 import os
+import argparse
+import subprocess
 from streamlit.web import cli as stcli
 
 if __name__ == '__main__':
     # 1. Pastikan nama filenya sesuai dengan file utama Mas Faiz
     target_file = "dashboard.py"
-    
-    # 2. Trik 'Menipu' Python agar menjalankan perintah: streamlit run dashboard.py
-    sys.argv = ["streamlit", "run", target_file]
-    
-    # 3. Panggil mesin utama Streamlit
-    sys.exit(stcli.main())
\ No newline at end of file
+
+    # Mode multi-worker (opsional): python run.py --workers 4 --base-port 8501
+    # -> 1 proses loader snapshot + N proses Streamlit (port 8501..8504) untuk dipasang di belakang proxy
+    parser = argparse.ArgumentParser(description="Jalankan dashboard refueling.")
+    parser.add_argument('--workers', type=int, default=0, help="jumlah proses Streamlit (0 = satu proses biasa)")
+    parser.add_argument('--base-port', type=int, default=8501)
+    parser.add_argument('--snapshot-dir', default=os.environ.get('REFUEL_SNAPSHOT_DIR', os.path.join('data', 'snapshot')))
+    parser.add_argument('--interval', type=float, default=60.0, help="jeda refresh snapshot (detik)")
+    args, sisa = parser.parse_known_args()
+
+    if args.workers <= 0:
+        # 2. Trik 'Menipu' Python agar menjalankan perintah: streamlit run dashboard.py
+        sys.argv = ["streamlit", "run", target_file, *sisa]
+
+        # 3. Panggil mesin utama Streamlit
+        sys.exit(stcli.main())
+
+    # 4. Loader menulis snapshot sekali untuk semua worker, worker hanya memetakan file-nya
+    env = {**os.environ, 'REFUEL_SNAPSHOT_DIR': args.snapshot_dir}
+    proses = [subprocess.Popen([sys.executable, '-m', 'refuel_engine.snapshot',
+                                '--dir', args.snapshot_dir, '--interval', str(args.interval)], env=env)]
+    for i in range(args.workers):
+        port = args.base_port + i
+        proses.append(subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', target_file,
+                                        '--server.port', str(port), '--server.headless', 'true', *sisa], env=env))
+    print(f"Loader + {args.workers} worker jalan di port {args.base_port}..{args.base_port + args.workers - 1}"
+          f" (snapshot: {args.snapshot_dir})")
+    try:
+        for p in proses:
+            p.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in proses:
+            p.terminate()